@@ -0,0 +1,25 @@
+"""
+Núcleo de esteganografía LSB sin interfaz gráfica.
+
+- estego.portadores: interfaz común de imagen y video (carga perezosa de Pillow/OpenCV).
+- estego.lsb: núcleo LSB vectorizado común.
+- estego.imagen: imágenes (cabecera 'STG').
+- estego.bandas: lectura y escritura de PNG por bandas de filas.
+- estego.video: video sin pérdida (FFV1).
+- estego.sondeo: sondeo de videos con caché y conteo exacto de cuadros.
+- estego.salidas: formatos de salida sin pérdida del video y elección automática.
+- estego.segmentos: incrustación de video por segmentos reanudables.
+- estego.avi: unión de segmentos AVI sin recodificar.
+- estego.memoria: entradas en memoria (bytes, buffers, flujos) para la API sin archivos.
+- estego.flujo: lectura del secreto por bloques, convertida a bits bajo demanda.
+- estego.compresion: compresión opcional del secreto (zlib, lzma, zstd).
+- estego.archivo: carpetas ocultas con tabla de contenido.
+- estego.fragmentos: un secreto repartido entre varias portadas.
+- estego.deteccion: detección rápida de secretos (detect).
+- estego.indice: índice lateral de videos con secreto.
+- estego.cli: línea de comandos (python -m estego).
+- estego.servicio: servicio HTTP local sobre asyncio con pool de procesos (python -m estego serve).
+- estego.metricas: tiempos por etapa y perfilado con cProfile.
+- estego.progreso: progreso y cancelación de trabajos largos.
+- estego.benchmark: rendimiento con medios sintéticos (python -m estego.benchmark).
+"""
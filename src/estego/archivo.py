@@ -0,0 +1,269 @@
+"""
+Contenido de varias entradas con tabla de contenido, para ocultar carpetas.
+
+Una carpeta se oculta como un solo archivo `<carpeta>.earc`:
+
+    [4 bytes: "EARC"] [1 byte: versión] [4 bytes: n entradas] [4 bytes: tam_toc]
+    toc, por entrada:
+        [2 bytes: len_nombre] [nombre utf-8, con "/"] [8 bytes: desplazamiento]
+        [8 bytes: longitud] [1 byte: compresión] [8 bytes: tamaño original]
+        [4 bytes: CRC32 del contenido original]
+    [4 bytes: CRC32 de todo lo anterior]
+    [datos de las entradas, uno tras otro]
+
+El desplazamiento es relativo al inicio de los datos. Cada entrada se
+comprime por separado (no el archivo entero), así que conociendo la tabla
+se puede leer una sola entrada del flujo oculto sin recorrer las demás.
+"""
+import os
+import struct
+import tempfile
+import zlib
+from collections import namedtuple
+
+from .compresion import METODOS, SalidaDescomprimida, preparar_secreto
+from .memoria import NOMBRE_SECRETO, es_ruta
+from .progreso import Cancelado
+
+MAGIA = b"EARC"
+VERSION_ARCHIVO = 1
+EXTENSION = ".earc"
+TAM_INICIO = len(MAGIA) + 1 + 4 + 4
+TAM_BLOQUE = 1024 * 1024
+
+Entrada = namedtuple("Entrada", "nombre desplazamiento longitud codigo_compresion tam_original crc")
+# `tam` incluye el inicio, la tabla y su CRC: los datos empiezan ahí
+Tabla = namedtuple("Tabla", "entradas tam")
+
+_FORMATO_ENTRADA = "<QQBQI"
+
+
+def es_carpeta(ruta):
+    return os.path.isdir(ruta)
+
+
+def _nombres(carpeta):
+    """Rutas relativas (con "/") de todos los archivos de `carpeta`, en orden estable."""
+    nombres = []
+    for raiz, subcarpetas, archivos in os.walk(carpeta):
+        subcarpetas.sort()
+        for archivo in sorted(archivos):
+            relativa = os.path.relpath(os.path.join(raiz, archivo), carpeta)
+            nombres.append(relativa.replace(os.sep, "/"))
+    return nombres
+
+
+def _tam_tabla(nombres):
+    return sum(2 + len(n.encode("utf-8")) + struct.calcsize(_FORMATO_ENTRADA) for n in nombres)
+
+
+def _tabla_bytes(entradas):
+    partes = []
+    for e in entradas:
+        nombre = e.nombre.encode("utf-8")
+        partes.append(struct.pack("<H", len(nombre)) + nombre
+                      + struct.pack(_FORMATO_ENTRADA, e.desplazamiento, e.longitud,
+                                    e.codigo_compresion, e.tam_original, e.crc))
+    tabla = b"".join(partes)
+    inicio = MAGIA + bytes([VERSION_ARCHIVO]) + struct.pack("<II", len(entradas), len(tabla))
+    return inicio + tabla + struct.pack("<I", zlib.crc32(inicio + tabla))
+
+
+def _crc_archivo(ruta):
+    crc = 0
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAM_BLOQUE), b""):
+            crc = zlib.crc32(bloque, crc)
+    return crc
+
+
+def empaquetar(carpeta, compresion="none", cancelar=None):
+    """
+    Empaqueta los archivos de `carpeta` en un temporal con el formato de
+    arriba, comprimiendo cada uno con `compresion` si lo justifica. Devuelve
+    (archivo abierto y rebobinado, tamaño); el llamador lo cierra.
+    """
+    nombres = _nombres(carpeta)
+    if not nombres:
+        raise ValueError("La carpeta no tiene archivos.")
+    if any(len(n.encode("utf-8")) > 0xFFFF for n in nombres):
+        raise ValueError("Nombre de archivo demasiado largo para el formato.")
+
+    temporal = tempfile.TemporaryFile()
+    try:
+        # La tabla ocupa lo mismo con ceros que con los valores reales: se reserva y se escribe al final
+        inicio_datos = TAM_INICIO + _tam_tabla(nombres) + 4
+        temporal.write(bytes(inicio_datos))
+        entradas = []
+        for nombre in nombres:
+            ruta = os.path.join(carpeta, *nombre.split("/"))
+            origen, longitud, metodo, tam_original = preparar_secreto(ruta, compresion, cancelar)
+            crc = 0
+            with origen:
+                desplazamiento = temporal.tell() - inicio_datos
+                for bloque in iter(lambda: origen.read(TAM_BLOQUE), b""):
+                    if cancelar is not None and cancelar.is_set():
+                        raise Cancelado()
+                    if metodo == "none":
+                        crc = zlib.crc32(bloque, crc)
+                    temporal.write(bloque)
+            if metodo != "none":
+                crc = _crc_archivo(ruta)
+            entradas.append(Entrada(nombre, desplazamiento, longitud, METODOS[metodo], tam_original, crc))
+        tam = temporal.tell()
+        temporal.seek(0)
+        temporal.write(_tabla_bytes(entradas))
+        temporal.seek(0)
+        return temporal, tam
+    except BaseException:
+        temporal.close()
+        raise
+
+
+def preparar_carga(ruta, compresion="none", cancelar=None, nombre=None):
+    """
+    Como compresion.preparar_secreto, pero acepta carpetas: las empaqueta
+    (con compresión por entrada) y el contenido se oculta sin comprimir.
+    Devuelve (archivo, tamaño guardado, método, tamaño original, nombre), donde
+    `nombre` es la ruta que dan la extensión o el nombre de la cabecera.
+
+    `ruta` también puede ser un dato en memoria (bytes, buffer o archivo
+    abierto, ver estego.memoria). Para un dato en memoria o un archivo,
+    `nombre` (si se indica) reemplaza al nombre guardado; sin él se usa el
+    del archivo, o NOMBRE_SECRETO en memoria.
+    """
+    if not es_ruta(ruta):
+        return preparar_secreto(ruta, compresion, cancelar) + (nombre or NOMBRE_SECRETO,)
+    if not es_carpeta(ruta):
+        return preparar_secreto(ruta, compresion, cancelar) + (nombre or ruta,)
+    archivo, tam = empaquetar(ruta, compresion, cancelar)
+    return archivo, tam, "none", tam, os.path.normpath(ruta) + EXTENSION
+
+
+def leer_tabla(leer):
+    """
+    Lee la tabla desde el inicio del contenido con `leer(n)` (devuelve hasta
+    n bytes en orden). Devuelve una Tabla, o None si el contenido no empieza
+    con la firma; lanza ValueError si la tabla está incompleta o corrupta.
+    """
+    inicio = leer(TAM_INICIO)
+    if len(inicio) < TAM_INICIO or inicio[:len(MAGIA)] != MAGIA:
+        return None
+    version = inicio[len(MAGIA)]
+    if version > VERSION_ARCHIVO:
+        raise ValueError(f"Versión de archivo no soportada: {version}")
+    num_entradas, tam_tabla = struct.unpack("<II", inicio[len(MAGIA) + 1:])
+
+    tabla = leer(tam_tabla + 4)
+    if len(tabla) < tam_tabla + 4 or struct.unpack("<I", tabla[-4:])[0] != zlib.crc32(inicio + tabla[:-4]):
+        raise ValueError("Tabla de contenido corrupta: el CRC no coincide.")
+
+    entradas = []
+    pos = 0
+    tam_fijo = struct.calcsize(_FORMATO_ENTRADA)
+    for _ in range(num_entradas):
+        len_nombre = struct.unpack_from("<H", tabla, pos)[0]
+        nombre = tabla[pos + 2:pos + 2 + len_nombre].decode("utf-8")
+        pos += 2 + len_nombre
+        entradas.append(Entrada(nombre, *struct.unpack_from(_FORMATO_ENTRADA, tabla, pos)))
+        pos += tam_fijo
+    return Tabla(entradas, TAM_INICIO + tam_tabla + 4)
+
+
+def buscar(tabla, nombre):
+    """Entrada llamada `nombre` (con "/" o el separador del sistema); ValueError si no existe."""
+    nombre = nombre.replace(os.sep, "/").strip("/")
+    for entrada in tabla.entradas:
+        if entrada.nombre == nombre:
+            return entrada
+    raise ValueError(f"No existe la entrada '{nombre}' en el contenido.")
+
+
+def ruta_segura(carpeta, nombre):
+    """Ruta de `nombre` dentro de `carpeta`; rechaza rutas absolutas o que salgan de ella."""
+    partes = nombre.split("/")
+    if not nombre or nombre.startswith("/") or any(p in ("", ".", "..") for p in partes) \
+            or any(os.sep in p or (os.altsep and os.altsep in p) or ":" in p for p in partes):
+        raise ValueError(f"Nombre de entrada no válido: {nombre!r}")
+    return os.path.join(carpeta, *partes)
+
+
+def extraer_entrada(entrada, leer, carpeta, avance=None):
+    """
+    Escribe `entrada` en `carpeta` (creando sus subcarpetas) leyendo sus
+    `longitud` bytes guardados con `leer(n)`, descomprimiendo al vuelo y
+    verificando el CRC. `avance(n)` se llama con los bytes leídos de cada
+    bloque. Borra el archivo incompleto si algo falla. Devuelve su ruta.
+    """
+    ruta = ruta_segura(carpeta, entrada.nombre)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    completo = False
+    try:
+        with open(ruta, "wb") as f:
+            destino = _ArchivoConCRC(f)
+            salida = SalidaDescomprimida(destino, entrada.codigo_compresion, entrada.tam_original)
+            restantes = entrada.longitud
+            while restantes:
+                datos = leer(min(TAM_BLOQUE, restantes))
+                if not datos:
+                    raise ValueError("Contenido incompleto o corrupto.")
+                salida.escribir(datos)
+                restantes -= len(datos)
+                if avance is not None:
+                    avance(len(datos))
+            salida.cerrar()
+        if destino.crc != entrada.crc:
+            raise ValueError(f"La entrada '{entrada.nombre}' no coincide con su CRC.")
+        completo = True
+    finally:
+        if not completo and os.path.exists(ruta):
+            os.remove(ruta)
+    return ruta
+
+
+def es_archivo(ruta):
+    """True si `ruta` es un archivo con el formato de arriba."""
+    try:
+        with open(ruta, "rb") as f:
+            return f.read(len(MAGIA)) == MAGIA
+    except OSError:
+        return False
+
+
+def desempaquetar(ruta, carpeta):
+    """Extrae todas las entradas del archivo `ruta` en `carpeta`. Devuelve la lista de rutas."""
+    with open(ruta, "rb") as f:
+        tabla = leer_tabla(f.read)
+        if tabla is None:
+            raise ValueError("No es un archivo de varias entradas.")
+        rutas = []
+        for entrada in sorted(tabla.entradas, key=lambda e: e.desplazamiento):
+            f.seek(tabla.tam + entrada.desplazamiento)
+            rutas.append(extraer_entrada(entrada, f.read, carpeta))
+    return rutas
+
+
+def desempaquetar_recuperado(ruta):
+    """
+    Si el archivo recuperado en `ruta` es un contenido de varias entradas, lo
+    extrae en una carpeta con su nombre (sin la extensión) y lo borra.
+    Devuelve (ruta final, número de entradas o None si no era un archivo).
+    """
+    if not ruta.endswith(EXTENSION) or not es_archivo(ruta):
+        return ruta, None
+    carpeta = ruta[:-len(EXTENSION)]
+    rutas = desempaquetar(ruta, carpeta)
+    os.remove(ruta)
+    return carpeta, len(rutas)
+
+
+class _ArchivoConCRC:
+    """Envuelve un archivo abierto para escritura y calcula el CRC32 de lo escrito."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.crc = 0
+
+    def write(self, datos):
+        self.crc = zlib.crc32(datos, self.crc)
+        return self.archivo.write(datos)
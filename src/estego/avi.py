@@ -0,0 +1,211 @@
+"""
+Unión de segmentos AVI sin recodificar.
+
+Los segmentos que escribe OpenCV (FFmpeg) con códecs intra-cuadro (FFV1,
+HuffYUV, sin compresión) se pueden concatenar copiando sus paquetes: aquí se
+leen los chunks de cuadro de cada segmento y se escribe un AVI OpenDML con
+las cabeceras del primero (cuadros totales corregidos), un índice estándar
+(ix00) por cada RIFF de hasta LIMITE_RIFF bytes, el superíndice (indx) y el
+índice idx1 clásico del primer RIFF. Todos los cuadros se marcan como clave.
+"""
+import struct
+
+LIMITE_RIFF = 1 << 30
+# Entradas del superíndice: las mismas que reserva FFmpeg (256 RIFF)
+ENTRADAS_SUPERINDICE = 256
+TAM_SUPERINDICE = 24 + 16 * ENTRADAS_SUPERINDICE
+TAM_DMLH = 248
+AVIIF_KEYFRAME = 0x10
+
+
+def _chunks(f, fin):
+    """Itera (id, tipo de lista o None, posición de los datos, tamaño) entre la posición actual y `fin`."""
+    while f.tell() + 8 <= fin:
+        cid, tam = struct.unpack("<4sI", f.read(8))
+        pos = f.tell()
+        tipo = f.read(4) if cid in (b"RIFF", b"LIST") else None
+        yield cid, tipo, pos, tam
+        f.seek(pos + tam + (tam & 1))
+
+
+def _leer_segmento(ruta):
+    """Devuelve (hdrl en bytes, [(id, posición, tamaño) de cada cuadro]) de un AVI."""
+    hdrl = None
+    cuadros = []
+    with open(ruta, "rb") as f:
+        f.seek(0, 2)
+        fin_archivo = f.tell()
+        f.seek(0)
+        for cid, tipo, pos, tam in _chunks(f, fin_archivo):
+            if cid != b"RIFF" or tipo not in (b"AVI ", b"AVIX"):
+                raise ValueError(f"{ruta} no es un AVI válido.")
+            f.seek(pos + 4)
+            for cid2, tipo2, pos2, tam2 in _chunks(f, pos + tam):
+                if cid2 == b"LIST" and tipo2 == b"hdrl" and hdrl is None:
+                    f.seek(pos2 - 8)
+                    hdrl = f.read(tam2 + 8)
+                    f.seek(pos2 + tam2)
+                elif cid2 == b"LIST" and tipo2 == b"movi":
+                    f.seek(pos2 + 4)
+                    for cid3, _, pos3, tam3 in _chunks(f, pos2 + tam2):
+                        if cid3[2:] in (b"dc", b"db"):
+                            cuadros.append((cid3, pos3, tam3))
+                    f.seek(pos2 + tam2)
+    if hdrl is None:
+        raise ValueError(f"{ruta} no tiene cabecera AVI.")
+    return hdrl, cuadros
+
+
+def _preparar_hdrl(hdrl, total_cuadros, cuadros_primer_riff):
+    """
+    Copia de `hdrl` con los cuadros totales corregidos y el superíndice y
+    dmlh en su sitio (reemplazando los JUNK que reserva FFmpeg o añadiéndolos).
+    Devuelve (bytes, posición del superíndice dentro de hdrl).
+    """
+    hdrl = bytearray(hdrl)
+    pos_superindice = None
+    tiene_odml = False
+    partes = [bytes(hdrl[:12])]
+    i = 12
+    while i + 8 <= len(hdrl):
+        cid, tam = struct.unpack_from("<4sI", hdrl, i)
+        chunk = bytearray(hdrl[i:i + 8 + tam + (tam & 1)])
+        if cid == b"avih":
+            struct.pack_into("<I", chunk, 8 + 16, cuadros_primer_riff)
+        elif cid == b"LIST" and chunk[8:12] == b"strl":
+            chunk, pos_superindice = _preparar_strl(chunk, total_cuadros)
+            pos_superindice += sum(len(p) for p in partes)
+        elif cid == b"JUNK" and chunk[8:16] == b"odmldmlh" or cid == b"LIST" and chunk[8:12] == b"odml":
+            chunk = _odml(total_cuadros)
+            tiene_odml = True
+        partes.append(bytes(chunk))
+        i += 8 + tam + (tam & 1)
+    if not tiene_odml:
+        partes.append(_odml(total_cuadros))
+    resultado = bytearray(b"".join(partes))
+    struct.pack_into("<I", resultado, 4, len(resultado) - 8)
+    return bytes(resultado), pos_superindice
+
+
+def _odml(total_cuadros):
+    dmlh = struct.pack("<I", total_cuadros) + bytes(TAM_DMLH - 4)
+    return b"LIST" + struct.pack("<I", 4 + 8 + TAM_DMLH) + b"odml" + b"dmlh" + struct.pack("<I", TAM_DMLH) + dmlh
+
+
+def _preparar_strl(strl, total_cuadros):
+    partes = [bytes(strl[:12])]
+    pos_superindice = None
+    i = 12
+    while i + 8 <= len(strl):
+        cid, tam = struct.unpack_from("<4sI", strl, i)
+        chunk = bytearray(strl[i:i + 8 + tam + (tam & 1)])
+        if cid == b"strh":
+            struct.pack_into("<I", chunk, 8 + 32, total_cuadros)
+        elif cid in (b"JUNK", b"indx") and tam == TAM_SUPERINDICE:
+            pos_superindice = sum(len(p) for p in partes)
+            chunk = bytearray(b"indx" + struct.pack("<I", TAM_SUPERINDICE) + bytes(TAM_SUPERINDICE))
+        partes.append(bytes(chunk))
+        i += 8 + tam + (tam & 1)
+    if pos_superindice is None:
+        pos_superindice = sum(len(p) for p in partes)
+        partes.append(b"indx" + struct.pack("<I", TAM_SUPERINDICE) + bytes(TAM_SUPERINDICE))
+    resultado = bytearray(b"".join(partes))
+    struct.pack_into("<I", resultado, 4, len(resultado) - 8)
+    return resultado, pos_superindice
+
+
+def _superindice(id_cuadro, entradas):
+    datos = struct.pack("<HBBI4s3I", 4, 0, 0, len(entradas), id_cuadro, 0, 0, 0)
+    for offset, tam, duracion in entradas:
+        datos += struct.pack("<QII", offset, tam, duracion)
+    return b"indx" + struct.pack("<I", TAM_SUPERINDICE) + datos.ljust(TAM_SUPERINDICE, b"\x00")
+
+
+def _indice_estandar(id_cuadro, base, posiciones):
+    """ix00: desplazamientos de los datos de cada cuadro respecto a `base`."""
+    datos = struct.pack("<HBBI4sQI", 2, 0, 1, len(posiciones), id_cuadro, base, 0)
+    datos += b"".join(struct.pack("<II", pos - base, tam) for pos, tam in posiciones)
+    return b"ix" + id_cuadro[:2] + struct.pack("<I", len(datos)) + datos
+
+
+def _copiar(origen, destino, tam, bloque=1024 * 1024):
+    while tam:
+        datos = origen.read(min(bloque, tam))
+        if not datos:
+            raise ValueError("Segmento truncado.")
+        destino.write(datos)
+        tam -= len(datos)
+
+
+def unir_avi(segmentos, destino):
+    """Concatena los AVI `segmentos` (mismo formato) en `destino`. Devuelve el número de cuadros."""
+    leidos = [_leer_segmento(ruta) for ruta in segmentos]
+    cuadros = [(ruta, c) for ruta, (_, lista) in zip(segmentos, leidos) for c in lista]
+    if not cuadros:
+        raise ValueError("Los segmentos no tienen cuadros.")
+    id_cuadro = cuadros[0][1][0]
+    total = len(cuadros)
+
+    # Reparto en RIFF de hasta LIMITE_RIFF bytes
+    riffs = [[]]
+    tam_riff = 0
+    for cuadro in cuadros:
+        tam = 8 + cuadro[1][2] + (cuadro[1][2] & 1)
+        if riffs[-1] and tam_riff + tam > LIMITE_RIFF:
+            riffs.append([])
+            tam_riff = 0
+        riffs[-1].append(cuadro)
+        tam_riff += tam
+    if len(riffs) > ENTRADAS_SUPERINDICE:
+        raise ValueError("El video unido es demasiado grande para el índice AVI.")
+
+    hdrl, pos_superindice = _preparar_hdrl(leidos[0][0], total, len(riffs[0]))
+    entradas_superindice = []
+    abiertos = {}
+    try:
+        with open(destino, "wb") as out:
+            for numero, riff in enumerate(riffs):
+                inicio_riff = out.tell()
+                out.write(b"RIFF\x00\x00\x00\x00" + (b"AVI " if numero == 0 else b"AVIX"))
+                if numero == 0:
+                    pos_hdrl = out.tell()
+                    out.write(hdrl)
+                inicio_movi = out.tell()
+                out.write(b"LIST\x00\x00\x00\x00movi")
+                posiciones = []
+                for ruta, (cid, pos, tam) in riff:
+                    origen = abiertos.get(ruta)
+                    if origen is None:
+                        for anterior in abiertos.values():
+                            anterior.close()
+                        abiertos = {ruta: open(ruta, "rb")}
+                        origen = abiertos[ruta]
+                    out.write(cid + struct.pack("<I", tam))
+                    posiciones.append((out.tell(), tam))
+                    origen.seek(pos)
+                    _copiar(origen, out, tam)
+                    if tam & 1:
+                        out.write(b"\x00")
+                pos_ix = out.tell()
+                ix = _indice_estandar(id_cuadro, inicio_movi, posiciones)
+                out.write(ix)
+                entradas_superindice.append((pos_ix, len(ix), len(riff)))
+                fin_movi = out.tell()
+                out.seek(inicio_movi + 4)
+                out.write(struct.pack("<I", fin_movi - inicio_movi - 8))
+                out.seek(fin_movi)
+                if numero == 0:
+                    # idx1 clásico: desplazamientos desde el "movi" de la lista
+                    idx1 = b"".join(struct.pack("<4sIII", id_cuadro, AVIIF_KEYFRAME, pos - 8 - (inicio_movi + 8), tam)
+                                    for pos, tam in posiciones)
+                    out.write(b"idx1" + struct.pack("<I", len(idx1)) + idx1)
+                fin_riff = out.tell()
+                out.seek(inicio_riff + 4)
+                out.write(struct.pack("<I", fin_riff - inicio_riff - 8))
+                out.seek(fin_riff)
+            out.seek(pos_hdrl + pos_superindice)
+            out.write(_superindice(id_cuadro, entradas_superindice))
+    finally:
+        for origen in abiertos.values():
+            origen.close()
+    return total
@@ -0,0 +1,301 @@
+"""
+Lectura y escritura de PNG por bandas de filas, con memoria acotada.
+
+Pillow decodifica y codifica la imagen completa de una vez; con imágenes de
+cientos de megapíxeles eso no cabe en memoria. Aquí el flujo IDAT se
+descomprime por partes y cada banda de filas filtradas se entrega a Pillow
+dentro de un PNG mínimo en memoria (deflate sin compresión, precedido de la
+última fila de la banda anterior), así el desfiltrado sigue en C. Al
+escribir, las filas se filtran con NumPy (heurística adaptativa de libpng) y
+se comprimen en bloques IDAT sucesivos.
+
+Solo se leen por bandas los PNG de 8 bits no entrelazados (L, LA, RGB,
+RGBA y paleta); `admite_bandas` indica si un archivo lo es.
+"""
+import io
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from .memoria import es_ruta
+
+FIRMA_PNG = b"\x89PNG\r\n\x1a\n"
+# Tipo de color PNG -> canales por pixel con 8 bits
+CANALES_TIPO = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+TAM_LECTURA = 256 * 1024
+TAM_IDAT = 256 * 1024
+
+
+def _leer_chunk(f):
+    cabecera = f.read(8)
+    if len(cabecera) < 8:
+        raise ValueError("PNG truncado.")
+    longitud, tipo = struct.unpack(">I4s", cabecera)
+    return tipo, longitud
+
+
+def _chunk(tipo, datos):
+    return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+
+
+def _ihdr(ruta):
+    with open(ruta, "rb") as f:
+        if f.read(8) != FIRMA_PNG:
+            return None
+        tipo, longitud = _leer_chunk(f)
+        if tipo != b"IHDR" or longitud != 13:
+            return None
+        return struct.unpack(">IIBBBBB", f.read(13))
+
+
+def admite_bandas(ruta):
+    """True si `ruta` es un PNG que se puede leer por bandas."""
+    if not es_ruta(ruta):
+        return False  # Datos en memoria: se leen con Pillow
+    try:
+        ihdr = _ihdr(ruta)
+    except (OSError, ValueError, struct.error):
+        return False
+    if ihdr is None:
+        return False
+    _, _, profundidad, tipo_color, _, _, entrelazado = ihdr
+    return profundidad == 8 and tipo_color in CANALES_TIPO and entrelazado == 0
+
+
+class LectorBandasPNG:
+    """
+    Lee un PNG admitido por bandas: `leer(filas)` devuelve la siguiente banda
+    como Image (en el modo del archivo) o None al terminar. Nunca tiene en
+    memoria más que una banda.
+    """
+
+    def __init__(self, ruta):
+        self._f = open(ruta, "rb")
+        try:
+            if self._f.read(8) != FIRMA_PNG:
+                raise ValueError("No es un PNG.")
+            self._auxiliares = b""
+            while True:
+                tipo, longitud = _leer_chunk(self._f)
+                if tipo == b"IDAT":
+                    break
+                datos = self._f.read(longitud)
+                self._f.read(4)  # CRC
+                if tipo == b"IHDR":
+                    self._ihdr = datos
+                    (self.ancho, self.alto, profundidad, self._tipo_color,
+                     _, _, entrelazado) = struct.unpack(">IIBBBBB", datos)
+                    if profundidad != 8 or self._tipo_color not in CANALES_TIPO or entrelazado:
+                        raise ValueError("PNG no admitido para lectura por bandas.")
+                elif tipo in (b"PLTE", b"tRNS"):
+                    self._auxiliares += _chunk(tipo, datos)
+                elif tipo == b"IEND":
+                    raise ValueError("PNG sin datos de imagen.")
+        except BaseException:
+            self._f.close()
+            raise
+        self._restante_idat = longitud
+        self._zlib = zlib.decompressobj()
+        self._filtrado = bytearray()
+        self._tam_fila = 1 + self.ancho * CANALES_TIPO[self._tipo_color]
+        self._fila_previa = None
+        self.filas_leidas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._f.close()
+
+    def _datos_idat(self):
+        """Siguiente trozo comprimido de los chunks IDAT consecutivos (b"" al terminar)."""
+        while self._restante_idat == 0:
+            self._f.read(4)  # CRC
+            tipo, longitud = _leer_chunk(self._f)
+            if tipo != b"IDAT":
+                return b""
+            self._restante_idat = longitud
+        datos = self._f.read(min(TAM_LECTURA, self._restante_idat))
+        if not datos:
+            raise ValueError("PNG truncado.")
+        self._restante_idat -= len(datos)
+        return datos
+
+    def _llenar(self, tam):
+        """Descomprime hasta tener `tam` bytes filtrados (o hasta el final del flujo)."""
+        while len(self._filtrado) < tam:
+            if self._zlib.unconsumed_tail:
+                datos = self._zlib.unconsumed_tail
+            else:
+                datos = self._datos_idat()
+                if not datos:
+                    break
+            self._filtrado += self._zlib.decompress(datos, max(tam - len(self._filtrado), TAM_LECTURA))
+
+    def leer(self, filas):
+        filas = min(filas, self.alto - self.filas_leidas)
+        if filas <= 0:
+            return None
+        tam = filas * self._tam_fila
+        self._llenar(tam)
+        if len(self._filtrado) < tam:
+            raise ValueError("PNG truncado.")
+        bloque = bytes(self._filtrado[:tam])
+        del self._filtrado[:tam]
+
+        # PNG mínimo: la fila previa sin filtro (tipo 0) y luego la banda tal cual
+        previa = b"" if self._fila_previa is None else b"\x00" + self._fila_previa
+        alto = filas + (self._fila_previa is not None)
+        ihdr = struct.pack(">II", self.ancho, alto) + self._ihdr[8:]
+        png = (FIRMA_PNG + _chunk(b"IHDR", ihdr) + self._auxiliares
+               + _chunk(b"IDAT", zlib.compress(previa + bloque, 0)) + _chunk(b"IEND", b""))
+        with Image.open(io.BytesIO(png)) as img:
+            img.load()
+            inicio = alto - filas
+            banda = img.crop((0, inicio, self.ancho, alto)) if inicio else img.copy()
+            self._fila_previa = img.crop((0, alto - 1, self.ancho, alto)).tobytes()
+        self.filas_leidas += filas
+        return banda
+
+    def bandas(self, filas):
+        """Itera las bandas de `filas` filas hasta el final de la imagen."""
+        while True:
+            banda = self.leer(filas)
+            if banda is None:
+                return
+            yield banda
+
+
+def _arriba(x, previa):
+    """Filas de arriba de `x` (int16), con `previa` antes de la primera."""
+    arriba = np.empty_like(x)
+    arriba[0] = previa
+    arriba[1:] = x[:-1]
+    return arriba
+
+
+def _desplazar(x, bpp):
+    """`x` desplazado un pixel a la derecha (el pixel de la izquierda, 0 en el borde)."""
+    izquierda = np.zeros_like(x)
+    izquierda[:, bpp:] = x[:, :-bpp]
+    return izquierda
+
+
+def _paeth(izquierda, arriba, diagonal):
+    p = izquierda + arriba - diagonal
+    pa, pb, pc = np.abs(p - izquierda), np.abs(p - arriba), np.abs(p - diagonal)
+    return np.where((pa <= pb) & (pa <= pc), izquierda, np.where(pb <= pc, arriba, diagonal))
+
+
+def _predictor(tipo, x, arriba, bpp):
+    if tipo == 1:
+        return _desplazar(x, bpp)
+    if tipo == 2:
+        return arriba
+    if tipo == 3:
+        return (_desplazar(x, bpp) + arriba) >> 1
+    return _paeth(_desplazar(x, bpp), arriba, _desplazar(arriba, bpp))
+
+
+def _filtrar(filas, previa, bpp, tipo=None):
+    """
+    Aplica a cada fila el filtro PNG (0-4) con menor suma de valores
+    absolutos con signo, como la heurística de libpng, o siempre el filtro
+    `tipo` si se indica (mucho más rápido). `filas` es uint8
+    (n, ancho * bpp); `previa` la fila anterior sin filtrar.
+    Devuelve los bytes listos para comprimir (tipo de filtro + fila).
+    """
+    salida = np.empty((filas.shape[0], filas.shape[1] + 1), dtype=np.uint8)
+    salida[:, 0] = tipo or 0
+    if tipo == 0:
+        salida[:, 1:] = filas
+        return salida
+    x = filas.astype(np.int16)
+    arriba = _arriba(x, previa)
+    if tipo is not None:
+        salida[:, 1:] = (x - _predictor(tipo, x, arriba, bpp)).astype(np.uint8)
+        return salida
+
+    # Un candidato a la vez para no multiplicar la memoria de la banda por cinco
+    salida[:, 1:] = filas
+    mejor = np.abs(filas.view(np.int8).astype(np.int32)).sum(axis=1)
+    for tipo in range(1, 5):
+        candidato = (x - _predictor(tipo, x, arriba, bpp)).astype(np.uint8)
+        costo = np.abs(candidato.view(np.int8).astype(np.int16)).sum(axis=1, dtype=np.int64)
+        gana = costo < mejor
+        salida[gana, 0] = tipo
+        salida[gana, 1:] = candidato[gana]
+        mejor = np.where(gana, costo, mejor)
+    return salida
+
+
+class EscritorBandasPNG:
+    """
+    Escribe un PNG RGB de 8 bits banda a banda: `escribir(arr)` recibe un
+    arreglo (filas, ancho, 3) uint8 y `close()` cierra el archivo. Falla si
+    no se escribieron exactamente `alto` filas. `filtro` fija el tipo de
+    filtro PNG de todas las filas (None: adaptativo) y `estrategia` es la
+    estrategia de zlib (zlib.Z_RLE, zlib.Z_HUFFMAN_ONLY...). `ruta` también
+    puede ser un archivo abierto para escritura (p. ej. BytesIO), que no se
+    cierra.
+    """
+
+    def __init__(self, ruta, ancho, alto, nivel=6, filtro=None, estrategia=zlib.Z_DEFAULT_STRATEGY):
+        self.ancho = ancho
+        self.alto = alto
+        self.filas_escritas = 0
+        self._filtro = filtro
+        self._propio = not hasattr(ruta, "write")
+        self._f = open(ruta, "wb") if self._propio else ruta
+        self._cerrado = False
+        self._zlib = zlib.compressobj(nivel, zlib.DEFLATED, zlib.MAX_WBITS, 8, estrategia)
+        self._pendiente = bytearray()
+        self._previa = np.zeros(ancho * 3, dtype=np.int16)
+        self._f.write(FIRMA_PNG + _chunk(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 2, 0, 0, 0)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_exc, *exc):
+        if tipo_exc is not None:
+            self._cerrar_archivo()  # Ya hay un error: no se completa el archivo
+        else:
+            self.close()
+
+    def _volcar(self, final=False):
+        while len(self._pendiente) >= TAM_IDAT or (final and self._pendiente):
+            self._f.write(_chunk(b"IDAT", bytes(self._pendiente[:TAM_IDAT])))
+            del self._pendiente[:TAM_IDAT]
+
+    def escribir(self, arr):
+        filas = np.ascontiguousarray(arr, dtype=np.uint8).reshape(-1, self.ancho * 3)
+        if self.filas_escritas + filas.shape[0] > self.alto:
+            raise ValueError("Se escribieron más filas que las de la imagen.")
+        filtradas = _filtrar(filas, self._previa, 3, self._filtro)
+        self._previa = filas[-1].astype(np.int16)
+        self._pendiente += self._zlib.compress(filtradas.tobytes())
+        self.filas_escritas += filas.shape[0]
+        self._volcar()
+
+    def _cerrar_archivo(self):
+        self._cerrado = True
+        if self._propio:
+            self._f.close()
+
+    def close(self):
+        if self._cerrado:
+            return
+        try:
+            if self.filas_escritas == self.alto:
+                self._pendiente += self._zlib.flush()
+                self._volcar(final=True)
+                self._f.write(_chunk(b"IEND", b""))
+        finally:
+            self._cerrar_archivo()
+        if self.filas_escritas != self.alto:
+            raise ValueError("La imagen quedó incompleta.")
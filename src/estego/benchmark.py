@@ -0,0 +1,274 @@
+"""
+Banco de pruebas de rendimiento con medios sintéticos.
+
+    python -m estego.benchmark [--preset rapido|completo] [-o resultados.json]
+                               [--baseline base.json] [--tolerancia 0.15]
+
+Genera portadas locales (PNG a varias resoluciones y clips AVI FFV1), oculta
+y extrae secretos aleatorios de varios tamaños y mide MB/s del secreto,
+cuadros/s y pico de memoria (RSS). Cada operación corre en un proceso nuevo
+para que el pico de RSS sea solo suyo. Los resultados se guardan en JSON y
+se pueden comparar con una ejecución anterior para detectar regresiones.
+Todo caso comprueba que el archivo recuperado sea idéntico al original.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+KIB = 1024
+MIB = 1024 * KIB
+
+# (nombre, portador, ancho, alto, cuadros, tamaños de secreto)
+PRESETS = {
+    "rapido": [
+        ("imagen-480p", "imagen", 640, 480, 0, [16 * KIB, 96 * KIB]),
+        ("imagen-1080p", "imagen", 1920, 1080, 0, [256 * KIB, 700 * KIB]),
+        ("video-360p", "video", 640, 360, 60, [64 * KIB, 512 * KIB]),
+    ],
+    "completo": [
+        ("imagen-480p", "imagen", 640, 480, 0, [16 * KIB, 96 * KIB]),
+        ("imagen-1080p", "imagen", 1920, 1080, 0, [256 * KIB, 700 * KIB]),
+        ("imagen-4k", "imagen", 3840, 2160, 0, [1 * MIB, 3 * MIB]),
+        ("video-360p", "video", 640, 360, 120, [64 * KIB, 1 * MIB]),
+        ("video-720p", "video", 1280, 720, 120, [1 * MIB, 4 * MIB]),
+    ],
+}
+
+# Métricas donde más es mejor / donde menos es mejor
+METRICAS_MAYOR = ("mb_s", "cuadros_s")
+METRICAS_MENOR = ("pico_rss_mb",)
+
+
+def generar_imagen(ruta, ancho, alto, semilla=0):
+    """PNG RGB con ruido: el peor caso para el compresor, como una foto real."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(semilla)
+    Image.fromarray(rng.integers(0, 256, (alto, ancho, 3), dtype=np.uint8), "RGB").save(ruta, "PNG")
+
+
+def generar_video(ruta, ancho, alto, cuadros, fps=30, semilla=0):
+    """Clip AVI FFV1 con ruido que cambia en cada cuadro."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    base = rng.integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+    out = cv2.VideoWriter(ruta, cv2.VideoWriter_fourcc(*"FFV1"), fps, (ancho, alto))
+    if not out.isOpened():
+        raise RuntimeError("No se pudo crear el video sintético (FFV1).")
+    try:
+        for i in range(cuadros):
+            out.write(np.roll(base, i, axis=1))
+    finally:
+        out.release()
+
+
+def generar_secreto(ruta, tam, semilla=0):
+    import numpy as np
+
+    with open(ruta, "wb") as f:
+        f.write(np.random.default_rng(semilla).bytes(tam))
+
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(MIB), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _pico_rss_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KiB, macOS en bytes
+    return round(pico / (MIB if sys.platform == "darwin" else KIB), 1)
+
+
+def _operacion(portador, op, entrada, secreto, salida):
+    """Corre en un proceso nuevo: ejecuta una operación y mide tiempo y memoria."""
+    # Los imports (cv2, Pillow) quedan fuera del tiempo medido
+    from . import imagen, video
+
+    inicio = time.perf_counter()
+    if portador == "imagen":
+        if op == "embed":
+            ok, msg = imagen.embed_logic(entrada, secreto, salida)
+        else:
+            ok, msg = imagen.extract_logic(entrada, salida)
+        if not ok:
+            raise RuntimeError(msg)
+        resultado = salida
+    else:
+        if op == "embed":
+            resultado = video.ocultar_archivo_en_video(entrada, secreto, salida)
+        else:
+            resultado, _ = video.extraer_archivo_de_video(entrada, salida)
+    return resultado, time.perf_counter() - inicio, _pico_rss_mb()
+
+
+def _en_proceso_nuevo(*args):
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(_operacion, *args).result()
+
+
+def ejecutar_caso(nombre, portador, portada, cuadros, tam_secreto, carpeta):
+    """Oculta y extrae un secreto de `tam_secreto` bytes; devuelve un dict de resultados."""
+    secreto = os.path.join(carpeta, f"secreto_{tam_secreto}.bin")
+    if not os.path.exists(secreto):
+        generar_secreto(secreto, tam_secreto, semilla=tam_secreto)
+
+    caso = {"caso": f"{nombre}/{tam_secreto // KIB}KiB", "portador": portador, "bytes": tam_secreto, "ok": False}
+    if portador == "imagen":
+        estego = os.path.join(carpeta, f"{nombre}_{tam_secreto}_SECRETO.png")
+        carpeta_extraccion = os.path.join(carpeta, "extraido")
+        recuperado = os.path.join(carpeta_extraccion, f"{nombre}_{tam_secreto}_SECRETO_recuperado.bin")
+    else:
+        estego = os.path.join(carpeta, f"{nombre}_{tam_secreto}_SECRETO.avi")
+        carpeta_extraccion = os.path.join(carpeta, f"extraido_{nombre}_{tam_secreto}")
+        recuperado = None
+
+    try:
+        estego, t_embed, rss_embed = _en_proceso_nuevo(portador, "embed", portada, secreto, estego)
+        salida, t_extract, rss_extract = _en_proceso_nuevo(portador, "extract", estego, None, carpeta_extraccion)
+        recuperado = recuperado or salida
+
+        for op, segundos, rss in (("embed", t_embed, rss_embed), ("extract", t_extract, rss_extract)):
+            metricas = {"segundos": round(segundos, 4),
+                        "mb_s": round(tam_secreto / segundos / 1e6, 3),
+                        "pico_rss_mb": rss}
+            # Ocultar recodifica todos los cuadros; extraer solo lee los que tienen datos
+            if cuadros and op == "embed":
+                metricas["cuadros_s"] = round(cuadros / segundos, 2)
+            caso[op] = metricas
+
+        caso["ok"] = _sha256(recuperado) == _sha256(secreto)
+        if not caso["ok"]:
+            caso["error"] = "El archivo recuperado no coincide con el original."
+    except Exception as e:
+        caso["error"] = str(e)
+    return caso
+
+
+def ejecutar(preset="rapido", carpeta=None, log=print):
+    """Genera los medios del preset, corre todos los casos y devuelve el informe."""
+    propia = carpeta is None
+    carpeta = carpeta or tempfile.mkdtemp(prefix="estego_bench_")
+    os.makedirs(carpeta, exist_ok=True)
+    resultados = []
+    try:
+        for nombre, portador, ancho, alto, cuadros, tamanos in PRESETS[preset]:
+            if portador == "imagen":
+                portada = os.path.join(carpeta, f"{nombre}.png")
+                generar_imagen(portada, ancho, alto)
+            else:
+                portada = os.path.join(carpeta, f"{nombre}.avi")
+                generar_video(portada, ancho, alto, cuadros)
+            for tam in tamanos:
+                caso = ejecutar_caso(nombre, portador, portada, cuadros, tam, carpeta)
+                log(_resumen(caso))
+                resultados.append(caso)
+    finally:
+        if propia:
+            shutil.rmtree(carpeta, ignore_errors=True)
+    return {"preset": preset, "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "entorno": _entorno(),
+            "resultados": resultados}
+
+
+def _entorno():
+    import cv2
+    import numpy as np
+    import PIL
+
+    return {"python": platform.python_version(), "plataforma": platform.platform(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "opencv": cv2.__version__,
+            "pillow": PIL.__version__}
+
+
+def _resumen(caso):
+    if not caso["ok"]:
+        return f"[FALLO] {caso['caso']}: {caso.get('error')}"
+    partes = []
+    for op in ("embed", "extract"):
+        m = caso[op]
+        texto = f"{op} {m['mb_s']:.2f} MB/s"
+        if "cuadros_s" in m:
+            texto += f" {m['cuadros_s']:.1f} cuadros/s"
+        if m["pico_rss_mb"] is not None:
+            texto += f" RSS {m['pico_rss_mb']:.0f} MB"
+        partes.append(texto)
+    return f"[ok] {caso['caso']}: " + " | ".join(partes)
+
+
+def comparar(actual, base, tolerancia=0.15):
+    """
+    Compara dos informes caso por caso. Devuelve una lista de textos con las
+    regresiones: métricas de velocidad que bajan más de `tolerancia` o picos
+    de memoria que suben más de `tolerancia`.
+    """
+    anteriores = {c["caso"]: c for c in base.get("resultados", []) if c.get("ok")}
+    regresiones = []
+    for caso in actual["resultados"]:
+        previo = anteriores.get(caso["caso"])
+        if previo is None or not caso["ok"]:
+            continue
+        for op in ("embed", "extract"):
+            for metrica in METRICAS_MAYOR + METRICAS_MENOR:
+                nuevo, viejo = caso[op].get(metrica), previo[op].get(metrica)
+                if not nuevo or not viejo:
+                    continue
+                cambio = nuevo / viejo - 1
+                if (metrica in METRICAS_MAYOR and cambio < -tolerancia) or \
+                        (metrica in METRICAS_MENOR and cambio > tolerancia):
+                    regresiones.append(f"{caso['caso']} {op} {metrica}: {viejo} -> {nuevo} ({cambio:+.0%})")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m estego.benchmark",
+                                     description="Mide el rendimiento de ocultar/extraer con medios sintéticos.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="rapido")
+    parser.add_argument("-o", "--output", help="Guarda el informe JSON en esta ruta.")
+    parser.add_argument("--baseline", help="Informe JSON anterior con el que comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="Cambio relativo permitido antes de marcar una regresión (0.15 = 15%%).")
+    parser.add_argument("--carpeta", help="Carpeta de trabajo (por defecto una temporal que se borra).")
+    args = parser.parse_args(argv)
+
+    informe = ejecutar(args.preset, args.carpeta)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    fallos = [c for c in informe["resultados"] if not c["ok"]]
+    regresiones = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regresiones = comparar(informe, json.load(f), args.tolerancia)
+        for texto in regresiones:
+            print(f"[REGRESIÓN] {texto}")
+        if not regresiones:
+            print("Sin regresiones respecto a la línea base.")
+
+    return 1 if fallos or regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""
+Interfaz de línea de comandos sin Tk.
+
+    python -m estego embed PORTADA SECRETO [-o SALIDA] [--bits K] [--channels BGR] [--compress zlib]
+                           [--codec auto|ffv1|huffyuv|raw|png] [--disk-budget MiB] [--segment-frames N]
+                           [--image-format png|bmp|webp|tiff] [--preset default|fast] [--png-level 0-9]
+    python -m estego extract ESTEGO [-o CARPETA] [--procesos N] [--entry NOMBRE]
+    python -m estego capacity PORTADA [--bits K] [--channels BGR] [--exact]
+    python -m estego detect PATRONES... [-j N] [--report R.jsonl]
+    python -m estego shard SECRETO PORTADAS... -o CARPETA [-j N] [--bits K] [--channels BGR]
+    python -m estego join ESTEGOS... [-o CARPETA] [-j N]
+    python -m estego batch [--manifest TRABAJOS.jsonl] [PATRONES...] --jobs N [--report R.jsonl]
+    python -m estego serve [--port P | --unix RUTA] [-j N] [--queue N] [--max-body MiB]
+
+El tipo de portador (imagen o video) se deduce de la extensión del archivo.
+SECRETO puede ser una carpeta: se oculta con tabla de contenido y --entry
+recupera una sola de sus entradas.
+Con --metrics se informan los tiempos por etapa; con --profile CARPETA
+(antes del subcomando) cada operación deja un perfil cProfile en CARPETA.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .deteccion import detect
+from .metricas import VARIABLE_PERFIL, Metricas
+from .portadores import para
+
+OPERACIONES = ("embed", "extract", "capacity", "detect")
+CODECS = ("auto", "ffv1", "huffyuv", "raw", "png")
+# Opciones de imagen.embed_logic (ver OUTPUT_FORMATS, PRESETS, PNG_FILTERS y PNG_STRATEGIES)
+FORMATOS_IMAGEN = ("png", "bmp", "webp", "tiff")
+PRESETS = ("default", "fast")
+FILTROS_PNG = ("adaptive", "none", "sub", "up", "average", "paeth")
+ESTRATEGIAS_PNG = ("default", "filtered", "huffman", "rle", "fixed")
+
+
+def _salida_por_defecto(portada, formato_imagen=None):
+    return para(portada).salida_por_defecto(portada, image_format=formato_imagen)
+
+
+def ejecutar_trabajo(trabajo):
+    """
+    Ejecuta un trabajo descrito por un diccionario y devuelve su resultado.
+
+    Claves: op (embed/extract/capacity/detect), input, secret, output, bits,
+    channels, compress, procesos, exact, metrics, index (en video: escribir el
+    índice lateral al ocultar; usarlo y crearlo si falta al extraer) y entry
+    (extraer solo esa entrada de una carpeta oculta), codec, disk_budget_mb,
+    threads y slices (formato de salida del video, ver estego.salidas) y
+    segment_frames (video: escribir por segmentos reanudables, ver
+    estego.segmentos); en imagen, image_format, preset, png_level,
+    png_filter y png_strategy (formato y opciones de la salida, ver
+    imagen.embed_logic). Nunca lanza excepciones: los
+    errores quedan en el resultado con ok=False. Con metrics, el resultado
+    incluye el resumen de estego.metricas.
+    """
+    inicio = time.perf_counter()
+    op = trabajo.get("op", "extract")
+    entrada = trabajo.get("input")
+    resultado = {"op": op, "input": entrada, "ok": False}
+    try:
+        if op not in OPERACIONES:
+            raise ValueError(f"Operación desconocida: {op}")
+        if not entrada:
+            raise ValueError("Falta la ruta de entrada.")
+
+        if op == "detect":
+            encontrado = detect(entrada)
+            resultado.update(found=encontrado is not None, detected=encontrado)
+            resultado["ok"] = True
+            resultado["seconds"] = round(time.perf_counter() - inicio, 3)
+            return resultado
+
+        compresion = trabajo.get("compress", "none")
+        metricas = Metricas() if trabajo.get("metrics") else None
+
+        portador = para(entrada)
+        if op == "embed":
+            salida = trabajo.get("output") or portador.salida_por_defecto(entrada, **trabajo)
+            resultado.update(portador.ocultar(entrada, trabajo["secret"], salida, compresion, metricas, **trabajo))
+        elif op == "extract" and trabajo.get("entry"):
+            resultado.update(portador.extraer_entrada(entrada, trabajo["entry"], trabajo.get("output"), metricas))
+        elif op == "extract":
+            resultado.update(portador.extraer(entrada, trabajo.get("output"), metricas, **trabajo))
+        else:
+            resultado.update(bytes=portador.capacidad(entrada, **trabajo))
+
+        if metricas is not None:
+            resultado["metrics"] = metricas.resumen()
+        resultado["ok"] = True
+    except KeyError as e:
+        resultado["error"] = f"Falta el campo {e} en el trabajo."
+    except Exception as e:
+        resultado["error"] = str(e)
+    resultado["seconds"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def _leer_manifiesto(ruta):
+    """Un trabajo JSON por línea; se ignoran líneas vacías y comentarios (#)."""
+    trabajos = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if linea and not linea.startswith("#"):
+                trabajos.append(json.loads(linea))
+    return trabajos
+
+
+def _trabajos_de_lote(args):
+    trabajos = _leer_manifiesto(args.manifest) if args.manifest else []
+    for patron in args.patterns:
+        for ruta in sorted(glob.glob(patron)):
+            trabajo = {"op": args.op, "input": ruta, "bits": args.bits, "channels": args.channels,
+                       "compress": args.compress, "metrics": args.metrics, "codec": args.codec,
+                       "disk_budget_mb": args.disk_budget, "threads": args.ffv1_threads,
+                       "slices": args.ffv1_slices, "segment_frames": args.segment_frames,
+                       **_opciones_imagen(args)}
+            if args.index is not None:
+                trabajo["index"] = args.index
+            if args.secret:
+                trabajo["secret"] = args.secret
+            if args.output_dir:
+                if args.op == "embed":
+                    nombre = os.path.basename(_salida_por_defecto(ruta, args.image_format))
+                    trabajo["output"] = os.path.join(args.output_dir, nombre)
+                else:
+                    trabajo["output"] = args.output_dir
+            trabajos.append(trabajo)
+    return trabajos
+
+
+def _imprimir(resultado):
+    if "metrics" in resultado:
+        print(json.dumps(resultado["metrics"], indent=2, ensure_ascii=False), file=sys.stderr)
+    if not resultado["ok"]:
+        print(f"Error: {resultado['error']}", file=sys.stderr)
+        return 1
+    if resultado["op"] == "capacity":
+        print(f"Capacidad: {resultado['bytes']} bytes")
+    elif resultado.get("message"):
+        print(resultado["message"])
+    else:
+        print(f"Listo: {resultado['output']}")
+    return 0
+
+
+def _cmd_embed(args):
+    return _imprimir(ejecutar_trabajo({
+        "op": "embed", "input": args.cover, "secret": args.secret, "output": args.output,
+        "bits": args.bits, "channels": args.channels, "compress": args.compress,
+        "metrics": args.metrics, "index": args.index, "codec": args.codec, "disk_budget_mb": args.disk_budget,
+        "threads": args.ffv1_threads, "slices": args.ffv1_slices, "segment_frames": args.segment_frames,
+        **_opciones_imagen(args),
+    }))
+
+
+def _cmd_extract(args):
+    return _imprimir(ejecutar_trabajo({
+        "op": "extract", "input": args.stego, "output": args.output, "procesos": args.procesos,
+        "metrics": args.metrics, "index": args.index, "entry": args.entry,
+    }))
+
+
+def _cmd_capacity(args):
+    return _imprimir(ejecutar_trabajo({
+        "op": "capacity", "input": args.cover, "bits": args.bits, "channels": args.channels,
+        "exact": args.exact,
+    }))
+
+
+def _cmd_shard(args):
+    from .fragmentos import ocultar_en_fragmentos
+
+    try:
+        salidas = ocultar_en_fragmentos(args.secret, args.covers, args.output, args.jobs, args.bits,
+                                        args.channels, args.compress)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for salida in salidas:
+        print(f"Listo: {salida}")
+    return 0
+
+
+def _cmd_join(args):
+    from .fragmentos import extraer_fragmentos
+
+    try:
+        ruta = extraer_fragmentos(args.stegos, args.output, args.jobs)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Listo: {ruta}")
+    return 0
+
+
+def _cmd_serve(args):
+    from .servicio import main as servir
+
+    return servir(args)
+
+
+def _ejecutar_lote(trabajos, jobs, ruta_reporte, chunksize=1):
+    """Ejecuta los trabajos en un pool y escribe una línea JSON por resultado. Devuelve los resultados."""
+    reporte = open(ruta_reporte, "w", encoding="utf-8") if ruta_reporte else sys.stdout
+    resultados = []
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for numero, resultado in enumerate(pool.map(ejecutar_trabajo, trabajos, chunksize=chunksize)):
+                resultado = {"job": numero, **resultado}
+                resultados.append(resultado)
+                reporte.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+                reporte.flush()
+    finally:
+        if reporte is not sys.stdout:
+            reporte.close()
+    return resultados
+
+
+def _cmd_batch(args):
+    trabajos = _trabajos_de_lote(args)
+    if not trabajos:
+        print("Error: no hay trabajos (usa --manifest o patrones glob).", file=sys.stderr)
+        return 1
+
+    fallidos = sum(not r["ok"] for r in _ejecutar_lote(trabajos, args.jobs, args.report))
+    print(f"{len(trabajos) - fallidos}/{len(trabajos)} trabajos completados.", file=sys.stderr)
+    return 1 if fallidos else 0
+
+
+def _cmd_detect(args):
+    rutas = []
+    for patron in args.patterns:
+        rutas.extend(sorted(glob.glob(patron)) or [patron])
+    trabajos = [{"op": "detect", "input": ruta} for ruta in rutas]
+
+    # Cada archivo tarda milisegundos: se reparten en grupos para no pagar el pool por archivo
+    resultados = _ejecutar_lote(trabajos, args.jobs, args.report,
+                                chunksize=max(1, len(trabajos) // (4 * args.jobs)))
+    encontrados = sum(r.get("found", False) for r in resultados)
+    fallidos = sum(not r["ok"] for r in resultados)
+    print(f"{encontrados} con secreto, {len(resultados) - encontrados - fallidos} limpios, "
+          f"{fallidos} con error.", file=sys.stderr)
+    return 1 if fallidos else 0
+
+
+def _agregar_disposicion(parser):
+    parser.add_argument("--bits", type=int, default=1,
+                        help="Bits menos significativos por canal en video (1-4).")
+    parser.add_argument("--channels", default="B",
+                        help="Canales de video a usar, subconjunto de BGR.")
+
+
+def _agregar_compresion(parser):
+    parser.add_argument("--compress", choices=("none", "zlib", "lzma", "zstd"), default="none",
+                        help="Comprime el secreto antes de ocultarlo (se omite si no se reduce).")
+
+
+def _agregar_codec(parser):
+    parser.add_argument("--codec", choices=CODECS, default="ffv1",
+                        help="Video: formato sin pérdida de la salida; auto mide todos y elige el más rápido "
+                             "que quepa en el disco.")
+    parser.add_argument("--disk-budget", type=float, metavar="MiB",
+                        help="Video con --codec auto: tamaño máximo de la salida (por defecto el espacio libre).")
+    parser.add_argument("--ffv1-threads", type=int, help="Video FFV1: hilos del codificador.")
+    parser.add_argument("--ffv1-slices", type=int, choices=(4, 6, 9, 12, 16, 24, 30),
+                        help="Video FFV1: slices por cuadro.")
+    parser.add_argument("--segment-frames", type=int, metavar="N",
+                        help="Video: escribe la salida en segmentos de N cuadros con punto de control; "
+                             "repetir el mismo comando tras una interrupción reanuda el trabajo.")
+
+
+def _agregar_formato_imagen(parser):
+    parser.add_argument("--image-format", choices=FORMATOS_IMAGEN,
+                        help="Imagen: formato sin pérdida de la salida (por defecto según la extensión, o png).")
+    parser.add_argument("--preset", choices=PRESETS, default="default",
+                        help="Imagen: opciones de guardado; fast codifica mucho más rápido a cambio de tamaño.")
+    parser.add_argument("--png-level", type=int, choices=range(10), metavar="0-9",
+                        help="Imagen PNG: nivel de compresión (reemplaza el del preajuste).")
+    parser.add_argument("--png-filter", choices=FILTROS_PNG, help="Imagen PNG: filtro de las filas.")
+    parser.add_argument("--png-strategy", choices=ESTRATEGIAS_PNG, help="Imagen PNG: estrategia de zlib.")
+
+
+def _opciones_imagen(args):
+    return {"image_format": args.image_format, "preset": args.preset, "png_level": args.png_level,
+            "png_filter": args.png_filter, "png_strategy": args.png_strategy}
+
+
+def _agregar_metricas(parser):
+    parser.add_argument("--metrics", action="store_true",
+                        help="Informa tiempos por etapa, contadores y colas (JSON en stderr o en el reporte).")
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="estego", description="Esteganografía LSB en imágenes y video.")
+    parser.add_argument("--profile", metavar="CARPETA",
+                        help="Guarda un perfil cProfile (.prof) de cada operación en CARPETA.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("embed", help="Oculta un archivo en una imagen o video.")
+    p.add_argument("cover", help="Imagen o video de portada.")
+    p.add_argument("secret", help="Archivo o carpeta a ocultar.")
+    p.add_argument("-o", "--output", help="Ruta de salida (por defecto <portada>_SECRETO).")
+    _agregar_disposicion(p)
+    _agregar_compresion(p)
+    _agregar_codec(p)
+    _agregar_formato_imagen(p)
+    _agregar_metricas(p)
+    p.add_argument("--index", action="store_true",
+                   help="Video: guarda un índice lateral (<salida>.estego.json) para extracciones repetidas.")
+    p.set_defaults(func=_cmd_embed)
+
+    p = sub.add_parser("extract", help="Recupera el archivo oculto.")
+    p.add_argument("stego", help="Imagen o video con el secreto.")
+    p.add_argument("-o", "--output", help="Carpeta de salida.")
+    p.add_argument("--procesos", type=int, default=1,
+                   help="Procesos para extraer video en paralelo (0 = todos los núcleos).")
+    _agregar_metricas(p)
+    p.add_argument("--index", action="store_true",
+                   help="Video: usa el índice lateral y lo crea (<video>.estego.json) si falta.")
+    p.add_argument("--entry", metavar="NOMBRE",
+                   help="Recupera solo esta entrada de una carpeta oculta (ruta relativa con /).")
+    p.set_defaults(func=_cmd_extract)
+
+    p = sub.add_parser("capacity", help="Muestra cuántos bytes caben en una portada.")
+    p.add_argument("cover", help="Imagen o video de portada.")
+    _agregar_disposicion(p)
+    p.add_argument("--exact", action="store_true",
+                   help="Cuenta los cuadros reales del video en lugar de usar la estimación.")
+    p.set_defaults(func=_cmd_capacity)
+
+    p = sub.add_parser("detect", help="Revisa rápido qué archivos tienen un secreto.")
+    p.add_argument("patterns", nargs="+", help="Rutas o patrones glob.")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Procesos simultáneos.")
+    p.add_argument("--report", help="Reporte JSON lines (por defecto la salida estándar).")
+    p.set_defaults(func=_cmd_detect)
+
+    p = sub.add_parser("shard", help="Reparte un secreto entre varias portadas.")
+    p.add_argument("secret", help="Archivo o carpeta a ocultar.")
+    p.add_argument("covers", nargs="+", help="Imágenes y/o videos de portada.")
+    p.add_argument("-o", "--output", required=True, help="Carpeta para las portadas con su fragmento.")
+    p.add_argument("-j", "--jobs", type=int, help="Procesos simultáneos (por defecto uno por portada).")
+    _agregar_disposicion(p)
+    _agregar_compresion(p)
+    p.set_defaults(func=_cmd_shard)
+
+    p = sub.add_parser("join", help="Recupera un secreto repartido entre varias portadas.")
+    p.add_argument("stegos", nargs="+", help="Portadas con fragmento, en cualquier orden.")
+    p.add_argument("-o", "--output", default="recuperado", help="Carpeta de salida.")
+    p.add_argument("-j", "--jobs", type=int, help="Procesos simultáneos (por defecto uno por portada).")
+    p.set_defaults(func=_cmd_join)
+
+    p = sub.add_parser("batch", help="Ejecuta muchos trabajos en paralelo.")
+    p.add_argument("patterns", nargs="*", help="Patrones glob de entradas.")
+    p.add_argument("--manifest", help="Archivo JSON lines con un trabajo por línea.")
+    p.add_argument("--op", choices=OPERACIONES, default="extract",
+                   help="Operación para las entradas de los patrones glob.")
+    p.add_argument("--secret", help="Archivo secreto para --op embed.")
+    p.add_argument("--output-dir", help="Carpeta de salida para las entradas de los patrones.")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Trabajos simultáneos.")
+    p.add_argument("--report", help="Reporte JSON lines (por defecto la salida estándar).")
+    _agregar_disposicion(p)
+    _agregar_compresion(p)
+    _agregar_codec(p)
+    _agregar_formato_imagen(p)
+    _agregar_metricas(p)
+    p.add_argument("--index", action=argparse.BooleanOptionalAction, default=None,
+                   help="Video: escribir el índice lateral al ocultar / usarlo al extraer.")
+    p.set_defaults(func=_cmd_batch)
+
+    p = sub.add_parser("serve", help="Servicio HTTP local de ocultar/extraer (solo localhost).")
+    p.add_argument("--host", default="127.0.0.1", help="Dirección local: 127.0.0.1, ::1 o localhost.")
+    p.add_argument("--port", type=int, help="Puerto TCP (por defecto 8750; 0 elige uno libre).")
+    p.add_argument("--unix", metavar="RUTA", help="Escucha en un socket Unix en lugar de TCP.")
+    p.add_argument("-j", "--jobs", type=int, help="Procesos de trabajo (por defecto todos los núcleos).")
+    p.add_argument("--queue", type=int,
+                   help="Peticiones en espera además de las que están en curso; las demás reciben 503 "
+                        "(por defecto 2 por proceso).")
+    p.add_argument("--max-body", type=float, default=2048, metavar="MiB",
+                   help="Tamaño máximo del cuerpo de una petición.")
+    p.set_defaults(func=_cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if getattr(args, "procesos", None) == 0:
+        args.procesos = None
+    if args.profile:
+        # Por entorno, para que también lo vean los procesos de batch y de extracción
+        os.environ[VARIABLE_PERFIL] = os.path.abspath(args.profile)
+    return args.func(args)
@@ -0,0 +1,189 @@
+"""
+Compresión opcional del archivo secreto antes de ocultarlo.
+
+Métodos: none, zlib, lzma y zstd (si está instalado el paquete `zstandard`).
+El método y el tamaño original viajan en la cabecera; al extraer se
+descomprime por bloques mientras se leen los datos.
+"""
+import lzma
+import tempfile
+import zlib
+
+from .memoria import TAM_EN_MEMORIA, abrir_datos, es_ruta
+from .progreso import Cancelado
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional
+    zstandard = None
+
+# Código guardado en la cabecera para cada método
+METODOS = {"none": 0, "zlib": 1, "lzma": 2, "zstd": 3}
+NOMBRES = {codigo: nombre for nombre, codigo in METODOS.items()}
+_ERRORES = (zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+TAM_BLOQUE = 1024 * 1024
+TAM_MUESTRA = 256 * 1024
+# Si la muestra no baja de esta proporción, no vale la pena comprimir
+PROPORCION_MINIMA = 0.95
+
+
+def disponibles():
+    return [nombre for nombre in METODOS if nombre != "zstd" or zstandard is not None]
+
+
+def _validar(metodo):
+    if metodo not in METODOS:
+        raise ValueError(f"Método de compresión desconocido: {metodo}")
+    if metodo not in disponibles():
+        raise ValueError(f"El método de compresión '{metodo}' no está disponible (falta el paquete zstandard).")
+
+
+def _compresor(metodo):
+    if metodo == "zlib":
+        return zlib.compressobj(6)
+    if metodo == "lzma":
+        return lzma.LZMACompressor()
+    return zstandard.ZstdCompressor().compressobj()
+
+
+class _Descompresor:
+    """Interfaz común: decompress(datos) por bloques y flush() al final."""
+
+    def __init__(self, metodo):
+        if metodo == "zlib":
+            self._obj = zlib.decompressobj()
+        elif metodo == "lzma":
+            self._obj = lzma.LZMADecompressor()
+        else:
+            self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, datos):
+        return self._obj.decompress(datos)
+
+    def flush(self):
+        flush = getattr(self._obj, "flush", None)
+        return flush() if flush is not None else b""
+
+
+def descompresor(codigo):
+    """Descompresor por bloques para el código de la cabecera (None si no hay compresión)."""
+    if codigo not in NOMBRES:
+        raise ValueError(f"Método de compresión desconocido en la cabecera: {codigo}")
+    metodo = NOMBRES[codigo]
+    if metodo == "none":
+        return None
+    _validar(metodo)
+    return _Descompresor(metodo)
+
+
+def vale_la_pena(origen, metodo):
+    """
+    Comprime una muestra del inicio del archivo y decide si conviene comprimir todo.
+    `origen` es una ruta o un archivo abierto con seek, que se deja donde estaba.
+    """
+    if es_ruta(origen):
+        with open(origen, "rb") as f:
+            muestra = f.read(TAM_MUESTRA)
+    else:
+        posicion = origen.tell()
+        muestra = origen.read(TAM_MUESTRA)
+        origen.seek(posicion)
+    if not muestra:
+        return False
+    compresor = _compresor(metodo)
+    tam = len(compresor.compress(muestra)) + len(compresor.flush())
+    return tam < len(muestra) * PROPORCION_MINIMA
+
+
+def comprimir_archivo(origen, metodo, cancelar=None):
+    """
+    Comprime `origen` por bloques en un archivo temporal y lo devuelve abierto
+    y rebobinado (el llamador lo cierra). Devuelve (archivo, tamaño).
+    `origen` es una ruta, o un archivo abierto que se lee desde su posición;
+    en ese caso el temporal queda en memoria hasta TAM_EN_MEMORIA bytes.
+    """
+    _validar(metodo)
+    compresor = _compresor(metodo)
+    propio = es_ruta(origen)
+    f = open(origen, "rb") if propio else origen
+    temporal = tempfile.TemporaryFile() if propio else tempfile.SpooledTemporaryFile(max_size=TAM_EN_MEMORIA)
+    try:
+        while True:
+            if cancelar is not None and cancelar.is_set():
+                raise Cancelado()
+            bloque = f.read(TAM_BLOQUE)
+            if not bloque:
+                break
+            temporal.write(compresor.compress(bloque))
+        temporal.write(compresor.flush())
+        tam = temporal.tell()
+        temporal.seek(0)
+        return temporal, tam
+    except BaseException:
+        temporal.close()
+        raise
+    finally:
+        if propio:
+            f.close()
+
+
+def preparar_secreto(origen, metodo="none", cancelar=None):
+    """
+    Abre el secreto para ocultarlo, comprimido si `metodo` lo indica y la
+    muestra lo justifica. Devuelve (archivo abierto, tamaño guardado,
+    método usado, tamaño original).
+
+    `origen` es una ruta o cualquier dato que acepte
+    estego.memoria.abrir_datos (bytes, buffers, archivos abiertos), que se
+    prepara en memoria.
+    """
+    _validar(metodo)
+    archivo, tam_original = abrir_datos(origen)
+    try:
+        if metodo != "none" and vale_la_pena(archivo, metodo):
+            # Una ruta se vuelve a abrir para que el temporal vaya a disco como siempre
+            comprimido, tam = comprimir_archivo(origen if es_ruta(origen) else archivo, metodo, cancelar)
+            if tam < tam_original:
+                archivo.close()
+                return comprimido, tam, metodo, tam_original
+            comprimido.close()
+            archivo.seek(0)
+    except BaseException:
+        archivo.close()
+        raise
+    return archivo, tam_original, "none", tam_original
+
+
+class SalidaDescomprimida:
+    """
+    Recibe por bloques los datos guardados y escribe en `archivo` los datos
+    originales, descomprimiendo al vuelo según el código de la cabecera.
+    """
+
+    def __init__(self, archivo, codigo, tam_original):
+        self.archivo = archivo
+        self.tam_original = tam_original
+        self.escritos = 0
+        self._descompresor = descompresor(codigo)
+
+    def _guardar(self, datos):
+        self.escritos += len(datos)
+        if self.escritos > self.tam_original:
+            raise ValueError("Contenido incompleto o corrupto.")
+        self.archivo.write(datos)
+
+    def escribir(self, datos):
+        if self._descompresor is None:
+            self._guardar(datos)
+        else:
+            try:
+                self._guardar(self._descompresor.decompress(datos))
+            except _ERRORES as e:
+                raise ValueError(f"Contenido incompleto o corrupto ({e}).")
+
+    def cerrar(self):
+        if self._descompresor is not None:
+            self._guardar(self._descompresor.flush())
+        if self.escritos != self.tam_original:
+            raise ValueError("Contenido incompleto o corrupto.")
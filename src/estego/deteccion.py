@@ -0,0 +1,33 @@
+"""
+Detección rápida de secretos, para revisar muchos archivos.
+
+`detect(ruta)` elige el portador por la extensión y solo decodifica lo
+necesario para validar la cabecera: las primeras filas de una imagen o el
+primer cuadro de un video. Devuelve None si el archivo está limpio o un
+diccionario con lo que dice la cabecera. Un archivo que no es imagen ni
+video (por la extensión) se rechaza antes de abrirlo con "Formato no
+admitido", para no confundirlo con un video dañado.
+"""
+import os
+
+EXTENSIONES_IMAGEN = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+EXTENSIONES_VIDEO = {".avi", ".mp4", ".m4v", ".mov", ".mkv", ".webm", ".mpg", ".mpeg", ".wmv", ".flv",
+                     ".ogv", ".3gp", ".ts", ".mts", ".m2ts"}
+
+
+def es_imagen(ruta):
+    return os.path.splitext(ruta)[1].lower() in EXTENSIONES_IMAGEN
+
+
+def es_video(ruta):
+    """True si `ruta` tiene extensión de video o es una carpeta (la salida png)."""
+    return os.path.splitext(ruta)[1].lower() in EXTENSIONES_VIDEO or os.path.isdir(ruta)
+
+
+def detect(ruta):
+    from .portadores import para
+
+    if not es_imagen(ruta) and not es_video(ruta):
+        extension = os.path.splitext(ruta)[1] or "sin extensión"
+        raise ValueError(f"Formato no admitido ({extension}): no es una imagen ni un video.")
+    return para(ruta).detectar(ruta)
@@ -0,0 +1,67 @@
+"""Lectura del archivo secreto por bloques, convertida a bits bajo demanda."""
+import os
+
+import numpy as np
+
+
+class FuenteBits:
+    """
+    Entrega los bits (uint8 0/1, MSB primero) de `cabecera` seguida del
+    contenido de `archivo`, leyendo del archivo solo los bytes necesarios
+    para cada petición. La memoria usada depende del tamaño de la petición
+    (un cuadro o una banda de filas), no del tamaño del archivo.
+    """
+
+    def __init__(self, cabecera, archivo, tam_archivo):
+        self._cabecera = memoryview(bytes(cabecera))
+        self._archivo = archivo
+        self._resto = np.empty(0, dtype=np.uint8)  # bits (< 8) que sobraron de la petición anterior
+        self.total_bits = (len(cabecera) + tam_archivo) * 8
+        self.entregados = 0
+
+    @property
+    def pendientes(self):
+        return self.total_bits - self.entregados
+
+    def _leer_bytes(self, n):
+        datos = b""
+        if self._cabecera:
+            datos, self._cabecera = bytes(self._cabecera[:n]), self._cabecera[n:]
+        if len(datos) < n:
+            datos += self._archivo.read(n - len(datos))
+        return datos
+
+    def siguientes(self, n):
+        """Devuelve hasta `n` bits; menos solo cuando se acaba el flujo."""
+        n = min(n, self.pendientes)
+        if n <= 0:
+            return np.empty(0, dtype=np.uint8)
+
+        faltan = n - self._resto.size
+        bits = self._resto
+        if faltan > 0:
+            datos = self._leer_bytes(-(-faltan // 8))
+            nuevos = np.unpackbits(np.frombuffer(datos, dtype=np.uint8))
+            bits = np.concatenate([self._resto, nuevos]) if self._resto.size else nuevos
+
+        self._resto = bits[n:].copy()
+        bits = bits[:n]
+        self.entregados += bits.size
+        return bits
+
+    def saltar(self, n):
+        """Descarta los siguientes `n` bits sin leerlos del archivo (para reanudar un trabajo)."""
+        n = min(n, self.pendientes)
+        del_resto = min(n, self._resto.size)
+        self._resto = self._resto[del_resto:].copy()
+        self.entregados += del_resto
+        n -= del_resto
+
+        num_bytes = n // 8
+        de_cabecera = min(num_bytes, len(self._cabecera))
+        self._cabecera = self._cabecera[de_cabecera:]
+        if num_bytes > de_cabecera:
+            self._archivo.seek(num_bytes - de_cabecera, os.SEEK_CUR)
+        self.entregados += num_bytes * 8
+        if n % 8:
+            self.siguientes(n % 8)
@@ -0,0 +1,241 @@
+"""
+Un secreto repartido en varias portadas (imágenes, videos o ambos).
+
+Cada portada lleva un fragmento: un archivo `.eshd` con
+
+    [4 bytes: "ESHD"] [1 byte: versión] [2 bytes: índice] [2 bytes: total]
+    [32 bytes: SHA-256 del secreto completo] [8 bytes: tamaño del secreto]
+    [8 bytes: desplazamiento del fragmento] [1 byte: len_nombre] [nombre utf-8]
+    [datos del fragmento]
+
+que se oculta con el formato normal de cada portada. El secreto se reparte
+en proporción a la capacidad de cada portada. Ocultar y extraer corren en
+un pool de procesos, una portada por trabajo; al unir, los fragmentos se
+aceptan en cualquier orden y el resultado se verifica con el SHA-256.
+"""
+import os
+import shutil
+import struct
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .archivo import EXTENSION as EXTENSION_ARCHIVO, desempaquetar_recuperado, empaquetar, es_carpeta
+from .indice import TAM_BLOQUE, sha256_abierto
+from .portadores import para
+
+MAGIA = b"ESHD"
+VERSION_FRAGMENTO = 1
+EXTENSION = ".eshd"
+_FORMATO = "<BHH32sQQ"
+TAM_FIJO = len(MAGIA) + struct.calcsize(_FORMATO) + 1
+# Cabecera de portada más larga: 'STZ' en imagen, v3 con nombre de 255 bytes en video
+RESERVA_PORTADA = 1 + 255 + 4 + 9 + 4
+
+Fragmento = namedtuple("Fragmento", "indice total sha256 tam_total desplazamiento nombre tam_cabecera")
+
+
+def _cabecera(indice, total, sha256, tam_total, desplazamiento, nombre):
+    nombre = nombre.encode("utf-8")[:255]
+    return (MAGIA + struct.pack(_FORMATO, VERSION_FRAGMENTO, indice, total, bytes.fromhex(sha256),
+                                tam_total, desplazamiento) + bytes([len(nombre)]) + nombre)
+
+
+def leer_cabecera(archivo):
+    """Lee la cabecera de un fragmento abierto. Devuelve un Fragmento o None si no lo es."""
+    fijo = archivo.read(TAM_FIJO)
+    if len(fijo) < TAM_FIJO or fijo[:len(MAGIA)] != MAGIA:
+        return None
+    version, indice, total, sha256, tam_total, desplazamiento = struct.unpack_from(_FORMATO, fijo, len(MAGIA))
+    if version > VERSION_FRAGMENTO:
+        raise ValueError(f"Versión de fragmento no soportada: {version}")
+    nombre = archivo.read(fijo[-1]).decode("utf-8", errors="replace")
+    return Fragmento(indice, total, sha256.hex(), tam_total, desplazamiento, nombre, TAM_FIJO + fijo[-1])
+
+
+def _salida(portada, carpeta):
+    return os.path.join(carpeta, os.path.basename(para(portada).salida_por_defecto(portada)))
+
+
+def capacidad(portada, bits_por_canal=1, canales="B"):
+    """Bytes del secreto que caben en `portada` como fragmento (sin las cabeceras)."""
+    bruta = para(portada).capacidad(portada, bits=bits_por_canal, channels=canales, exact=True)
+    return max(bruta - RESERVA_PORTADA - TAM_FIJO - 255, 0)
+
+
+def repartir(tam, capacidades):
+    """Tamaño de cada fragmento, proporcional a la capacidad de cada portada."""
+    total = sum(capacidades)
+    if tam > total:
+        raise ValueError(f"El secreto no cabe en las portadas.\nCapacidad: {total} bytes\nArchivo: {tam} bytes")
+    tamanos = [tam * c // total for c in capacidades] if total else [0] * len(capacidades)
+    # Lo que sobra del redondeo va a las portadas con espacio libre
+    resto = tam - sum(tamanos)
+    for i, c in enumerate(capacidades):
+        extra = min(resto, c - tamanos[i])
+        tamanos[i] += extra
+        resto -= extra
+    return tamanos
+
+
+def _ocultar_fragmento(portada, ruta_secreto, cabecera, desplazamiento, longitud, salida, opciones):
+    """Trabajo de un proceso: escribe su fragmento en un temporal y lo oculta en `portada`."""
+    carpeta = tempfile.mkdtemp(prefix="estego_fragmento_")
+    try:
+        ruta_fragmento = os.path.join(carpeta, f"{os.path.basename(salida)}{EXTENSION}")
+        with open(ruta_secreto, "rb") as origen, open(ruta_fragmento, "wb") as destino:
+            destino.write(cabecera)
+            origen.seek(desplazamiento)
+            restantes = longitud
+            while restantes:
+                bloque = origen.read(min(TAM_BLOQUE, restantes))
+                if not bloque:
+                    raise ValueError("El archivo secreto cambió durante la lectura.")
+                destino.write(bloque)
+                restantes -= len(bloque)
+
+        try:
+            return para(portada).ocultar(portada, ruta_fragmento, salida, opciones["compresion"],
+                                         bits=opciones["bits"], channels=opciones["canales"])["output"]
+        except ValueError as e:
+            raise ValueError(f"{os.path.basename(portada)}: {e}")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def ocultar_en_fragmentos(ruta_secreto, portadas, carpeta_salida, procesos=None, bits_por_canal=1, canales="B",
+                          compresion="none", log_callback=None):
+    """
+    Reparte `ruta_secreto` (archivo o carpeta) entre `portadas` y oculta cada
+    fragmento en paralelo con `procesos` procesos (None = uno por portada,
+    hasta el número de núcleos). Las salidas quedan en `carpeta_salida` como
+    `<portada>_SECRETO.png/.avi`. Devuelve sus rutas, en el orden de `portadas`.
+    """
+    if not portadas:
+        raise ValueError("No hay portadas.")
+    if len(portadas) > 0xFFFF:
+        raise ValueError("Demasiadas portadas.")
+    os.makedirs(carpeta_salida, exist_ok=True)
+    salidas = [_salida(p, carpeta_salida) for p in portadas]
+    if len(set(salidas)) < len(salidas):
+        raise ValueError("Dos portadas tendrían el mismo nombre de salida.")
+
+    carpeta_temporal = None
+    try:
+        if es_carpeta(ruta_secreto):
+            # Los trabajos leen el secreto por ruta: la carpeta se empaqueta a un archivo
+            carpeta_temporal = tempfile.mkdtemp(prefix="estego_fragmentos_")
+            nombre = os.path.basename(os.path.normpath(ruta_secreto)) + EXTENSION_ARCHIVO
+            empaquetado, _ = empaquetar(ruta_secreto, compresion)
+            with empaquetado, open(os.path.join(carpeta_temporal, nombre), "wb") as destino:
+                shutil.copyfileobj(empaquetado, destino, TAM_BLOQUE)
+            ruta_secreto = os.path.join(carpeta_temporal, nombre)
+            compresion = "none"
+        nombre = os.path.basename(ruta_secreto)
+        tam = os.path.getsize(ruta_secreto)
+        with open(ruta_secreto, "rb") as f:
+            sha256 = sha256_abierto(f)
+
+        tamanos = repartir(tam, [capacidad(p, bits_por_canal, canales) for p in portadas])
+        opciones = {"bits": bits_por_canal, "canales": canales, "compresion": compresion}
+        trabajos = []
+        desplazamiento = 0
+        for indice, (portada, longitud, salida) in enumerate(zip(portadas, tamanos, salidas)):
+            cabecera = _cabecera(indice, len(portadas), sha256, tam, desplazamiento, nombre)
+            trabajos.append((portada, ruta_secreto, cabecera, desplazamiento, longitud, salida, opciones))
+            desplazamiento += longitud
+
+        procesos = procesos or min(len(portadas), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = [pool.submit(_ocultar_fragmento, *trabajo) for trabajo in trabajos]
+            resultados = []
+            for portada, longitud, futuro in zip(portadas, tamanos, futuros):
+                resultados.append(futuro.result())
+                if log_callback:
+                    log_callback(f"> Fragmento de {longitud} bytes oculto en: {resultados[-1]}\n")
+        return resultados
+    finally:
+        if carpeta_temporal:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+
+def _extraer_fragmento(ruta, carpeta):
+    """Trabajo de un proceso: recupera el fragmento oculto en `ruta` dentro de `carpeta`."""
+    os.makedirs(carpeta, exist_ok=True)
+    try:
+        para(ruta).extraer(ruta, carpeta, index=False)
+    except ValueError as e:
+        raise ValueError(f"{os.path.basename(ruta)}: {e}")
+    archivos = os.listdir(carpeta)
+    if len(archivos) != 1:
+        raise ValueError(f"{os.path.basename(ruta)}: no contiene un fragmento.")
+    return os.path.join(carpeta, archivos[0])
+
+
+def unir(rutas_fragmentos, carpeta_salida):
+    """
+    Une los fragmentos recuperados (en cualquier orden) en `carpeta_salida`,
+    comprueba que estén todos y verifica el SHA-256 del secreto. Si era una
+    carpeta, la desempaqueta. Devuelve la ruta del secreto.
+    """
+    fragmentos = []
+    for ruta in rutas_fragmentos:
+        with open(ruta, "rb") as f:
+            fragmento = leer_cabecera(f)
+        if fragmento is None:
+            raise ValueError(f"{os.path.basename(ruta)} no es un fragmento.")
+        fragmentos.append((fragmento, ruta))
+
+    primero = fragmentos[0][0]
+    if any((f.sha256, f.total, f.tam_total) != (primero.sha256, primero.total, primero.tam_total)
+           for f, _ in fragmentos):
+        raise ValueError("Los fragmentos pertenecen a secretos distintos.")
+    indices = sorted(f.indice for f, _ in fragmentos)
+    if indices != list(range(primero.total)):
+        faltan = sorted(set(range(primero.total)) - set(indices))
+        if faltan:
+            raise ValueError(f"Faltan fragmentos: {', '.join(str(i + 1) for i in faltan)} de {primero.total}.")
+        raise ValueError("Hay fragmentos repetidos o de más.")
+
+    os.makedirs(carpeta_salida, exist_ok=True)
+    nombre = os.path.basename(primero.nombre) or "secreto_recuperado.bin"
+    ruta_salida = os.path.join(carpeta_salida, nombre)
+    completo = False
+    try:
+        with open(ruta_salida, "wb") as destino:
+            for fragmento, ruta in sorted(fragmentos):
+                if fragmento.desplazamiento != destino.tell():
+                    raise ValueError("Los fragmentos no son contiguos.")
+                with open(ruta, "rb") as origen:
+                    origen.seek(fragmento.tam_cabecera)
+                    shutil.copyfileobj(origen, destino, TAM_BLOQUE)
+        with open(ruta_salida, "rb") as f:
+            if os.path.getsize(ruta_salida) != primero.tam_total or sha256_abierto(f) != primero.sha256:
+                raise ValueError("El secreto unido no coincide con su SHA-256.")
+        completo = True
+    finally:
+        if not completo and os.path.exists(ruta_salida):
+            os.remove(ruta_salida)
+    return desempaquetar_recuperado(ruta_salida)[0]
+
+
+def extraer_fragmentos(portadas_estego, carpeta_salida, procesos=None, log_callback=None):
+    """
+    Recupera en paralelo el fragmento de cada portada (en cualquier orden) y
+    los une en `carpeta_salida`. Devuelve la ruta del secreto recuperado.
+    """
+    if not portadas_estego:
+        raise ValueError("No hay portadas.")
+    carpeta_temporal = tempfile.mkdtemp(prefix="estego_fragmentos_")
+    try:
+        procesos = procesos or min(len(portadas_estego), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = [pool.submit(_extraer_fragmento, ruta, os.path.join(carpeta_temporal, str(i)))
+                       for i, ruta in enumerate(portadas_estego)]
+            rutas = [futuro.result() for futuro in futuros]
+        ruta = unir(rutas, carpeta_salida)
+    finally:
+        shutil.rmtree(carpeta_temporal, ignore_errors=True)
+    if log_callback:
+        log_callback(f"> Secreto recuperado de {len(portadas_estego)} fragmentos: {ruta}\n")
+    return ruta
@@ -0,0 +1,603 @@
+"""Lógica de esteganografía LSB en imágenes (sin interfaz gráfica)."""
+from PIL import Image
+import numpy as np
+import io
+import os
+import struct
+import zlib
+
+from . import lsb
+from .archivo import EXTENSION, buscar, desempaquetar_recuperado, extraer_entrada, leer_tabla, preparar_carga
+from .bandas import EscritorBandasPNG, LectorBandasPNG, admite_bandas
+from .compresion import METODOS, NOMBRES, SalidaDescomprimida
+from .flujo import FuenteBits
+from .memoria import abrir_datos, es_ruta
+from .metricas import como_metricas, perfilar
+from .progreso import Cancelado, Progreso
+
+# CONFIGURACIÓN
+# Cabecera: 'STG' (3) + Tamaño (4) + Extensión (8) = 15 bytes
+HEADER_SIZE = 15 
+# Con compresión: 'STZ' (3) + Tamaño (4) + Extensión (8) + Método (1) + Tamaño original (8) = 24 bytes
+COMPRESSED_HEADER_SIZE = 24
+
+# Bytes de cobertura procesados por banda de filas al incrustar
+BAND_BYTES = 4 * 1024 * 1024
+
+# A partir de estos bytes decodificados (RGB), los PNG se procesan por bandas
+STRIP_THRESHOLD = 64 * 1024 * 1024
+
+# Formatos de salida sin pérdida: nombre -> (formato de Pillow, extensiones; la primera es la de salida)
+OUTPUT_FORMATS = {
+    "png": ("PNG", (".png",)),
+    "bmp": ("BMP", (".bmp",)),
+    "webp": ("WEBP", (".webp",)),
+    "tiff": ("TIFF", (".tiff", ".tif")),
+}
+# Filtro PNG de todas las filas; "adaptive" elige uno por fila (lo que hace Pillow)
+PNG_FILTERS = {"adaptive": None, "none": 0, "sub": 1, "up": 2, "average": 3, "paeth": 4}
+# Estrategia de zlib para los datos PNG
+PNG_STRATEGIES = {"default": zlib.Z_DEFAULT_STRATEGY, "filtered": zlib.Z_FILTERED,
+                  "huffman": zlib.Z_HUFFMAN_ONLY, "rle": zlib.Z_RLE, "fixed": zlib.Z_FIXED}
+# Preajustes de guardado. "fast" prioriza la velocidad de codificación sobre el
+# tamaño: en PNG, filtro "up" + RLE a nivel 1 codifica ~10x más rápido que el
+# adaptativo a nivel 6, y sobre los LSB ya aleatorios el archivo crece poco.
+PRESETS = {
+    "default": {"compress_level": 6, "png_filter": "adaptive", "png_strategy": "default",
+                "webp_method": 4, "webp_quality": 80, "tiff_compression": "tiff_adobe_deflate"},
+    "fast": {"compress_level": 1, "png_filter": "up", "png_strategy": "rle",
+             "webp_method": 0, "webp_quality": 0, "tiff_compression": None},
+}
+
+def output_path_for(output_path, output_format=None):
+    """
+    Formato y ruta real de la salida. Sin `output_format` se deduce de la
+    extensión (PNG si no es ninguna de OUTPUT_FORMATS, como siempre); con
+    él, se cambia la extensión si no le corresponde. Devuelve (formato, ruta).
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    if output_format is None:
+        output_format = next((name for name, (_, exts) in OUTPUT_FORMATS.items() if ext in exts), "png")
+        return output_format, output_path
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida desconocido: {output_format}")
+    exts = OUTPUT_FORMATS[output_format][1]
+    if ext not in exts:
+        output_path = os.path.splitext(output_path)[0] + exts[0]
+    return output_format, output_path
+
+def save_options(preset="default", compress_level=None, png_filter=None, png_strategy=None):
+    """Opciones de guardado del preajuste, con las indicadas reemplazando las suyas."""
+    if preset not in PRESETS:
+        raise ValueError(f"Preajuste desconocido: {preset}")
+    options = dict(PRESETS[preset])
+    if compress_level is not None:
+        if not 0 <= compress_level <= 9:
+            raise ValueError("El nivel de compresión PNG va de 0 a 9.")
+        options["compress_level"] = compress_level
+    if png_filter is not None:
+        if png_filter not in PNG_FILTERS:
+            raise ValueError(f"Filtro PNG desconocido: {png_filter}")
+        options["png_filter"] = png_filter
+    if png_strategy is not None:
+        if png_strategy not in PNG_STRATEGIES:
+            raise ValueError(f"Estrategia PNG desconocida: {png_strategy}")
+        options["png_strategy"] = png_strategy
+    return options
+
+def _png_writer(output_path, width, height, options):
+    return EscritorBandasPNG(output_path, width, height, options["compress_level"],
+                             PNG_FILTERS[options["png_filter"]], PNG_STRATEGIES[options["png_strategy"]])
+
+def _save_image(arr, output_path, output_format, options):
+    """Guarda `arr` (alto, ancho, 3) sin pérdida en `output_format`."""
+    if output_format == "png" and PNG_FILTERS[options["png_filter"]] is not None:
+        # Filtro fijo: Pillow no lo permite, se escribe por bandas con estego.bandas
+        height, width = arr.shape[:2]
+        rows_per_band = max(1, BAND_BYTES // (width * 3))
+        with _png_writer(output_path, width, height, options) as writer:
+            for y in range(0, height, rows_per_band):
+                writer.escribir(arr[y:y + rows_per_band])
+        return
+    img = Image.fromarray(arr, 'RGB')
+    if output_format == "png":
+        kwargs = {"compress_level": options["compress_level"]}
+        if options["png_strategy"] != "default":
+            # Sin compress_type, Pillow elige la estrategia como siempre
+            kwargs["compress_type"] = PNG_STRATEGIES[options["png_strategy"]]
+        img.save(output_path, "PNG", **kwargs)
+    elif output_format == "webp":
+        # exact: conserva los valores RGB tal cual (sin él, libwebp puede tocarlos)
+        img.save(output_path, "WEBP", lossless=True, exact=True, method=options["webp_method"],
+                 quality=options["webp_quality"])
+    elif output_format == "tiff":
+        img.save(output_path, "TIFF", compression=options["tiff_compression"])
+    else:
+        img.save(output_path, OUTPUT_FORMATS[output_format][0])
+
+def _blob_header(file_path, stored_size=None, method="none", original_size=0):
+    """Cabecera 'STG' (o 'STZ' si va comprimido) + Tamaño + Extensión, y el tamaño guardado."""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    file_size = os.path.getsize(file_path) if stored_size is None else stored_size
+    
+    # Usamos [:8] para asegurar que no se pase y ljust para rellenar con ceros
+    ext_bytes = file_ext.encode('utf-8').ljust(8, b'\x00')[:8]
+    
+    if method == "none":
+        # Estructura: Marca (3) + Tamaño (4) + Extensión (8)
+        return b'STG' + struct.pack("I", file_size) + ext_bytes, file_size
+    return (b'STZ' + struct.pack("I", file_size) + ext_bytes
+            + struct.pack("<BQ", METODOS[method], original_size)), file_size
+
+def prepare_blob(file_path):
+    """Convierte el archivo secreto a un arreglo de bits (uint8 0/1) con cabecera."""
+    header, _ = _blob_header(file_path)
+    
+    with open(file_path, "rb") as f:
+        file_bytes = f.read()
+    
+    full_data = np.frombuffer(header + file_bytes, dtype=np.uint8)
+    # MSB primero, igual que el bucle original bit a bit
+    return np.unpackbits(full_data)
+
+def _embed_band(flat, source, metrics):
+    """Escribe en los LSB de `flat` los siguientes bits del secreto. Devuelve cuántos escribió."""
+    with metrics.etapa("lectura_secreto"):
+        bits = source.siguientes(flat.size)
+    n = bits.size
+    with metrics.etapa("lsb"):
+        lsb.escribir(flat, bits)
+    metrics.sumar("bits", n)
+    return n
+
+def _embed_strips(cover_path, output_path, source, width, height, progress, metrics, options):
+    """
+    Camino para imágenes grandes: decodifica, incrusta y codifica banda a
+    banda, así la memoria depende de BAND_BYTES y no del tamaño de la imagen.
+    La salida incompleta se borra si algo falla o se cancela.
+    """
+    rows_per_band = max(1, BAND_BYTES // (width * 3))
+    done = False
+    try:
+        with LectorBandasPNG(cover_path) as reader, _png_writer(output_path, width, height, options) as writer:
+            while True:
+                with metrics.etapa("decodificacion"):
+                    band = reader.leer(rows_per_band)
+                    if band is None:
+                        break
+                    band = np.array(band.convert('RGB'), dtype=np.uint8)
+                if source.pendientes:
+                    _embed_band(band.reshape(-1), source, metrics)
+                with metrics.etapa("codificacion"):
+                    writer.escribir(band)
+                metrics.sumar("filas", band.shape[0])
+                metrics.publicar()
+                progress.avanzar(band.shape[0], band.size)
+        done = True
+    finally:
+        if not done and os.path.exists(output_path):
+            os.remove(output_path)
+
+class _EmbedError(ValueError):
+    """Error de incrustación con el mensaje ya listo para el usuario."""
+
+def _embed(cover, secret, output, output_format, options, progress_callback, cancel_event, compression,
+           metrics, secret_name=None):
+    """
+    Núcleo de embed_logic y embed_data. `cover` es una ruta o un archivo con
+    seek y `output` una ruta o un archivo abierto para escritura. Lanza
+    _EmbedError si el secreto no cabe y Cancelado si se cancela.
+    """
+    with metrics.etapa("decodificacion"):
+        img = Image.open(cover)
+    width, height = img.size
+    strips = (output_format == "png" and width * height * 3 > STRIP_THRESHOLD
+              and es_ruta(output) and admite_bandas(cover))
+    
+    with metrics.etapa("compresion"):
+        f, file_size, method, original_size, name = preparar_carga(secret, compression, cancel_event, secret_name)
+    with f:
+        header, file_size = _blob_header(name, file_size, method, original_size)
+        total_bits = (len(header) + file_size) * 8
+        total_pixels = width * height
+        
+        # Verificación de capacidad
+        if total_bits > total_pixels * 3:
+            raise _EmbedError(f"Error: Archivo muy grande. Necesitas una imagen de al menos {total_bits//3 + 1} pixeles.")
+        
+        # El secreto se lee por bandas de filas, así nunca se expande completo a bits
+        source = FuenteBits(header, f, file_size)
+        if strips:
+            img.close()
+            progress = Progreso(progress_callback, height, "filas", cancel_event)
+            _embed_strips(cover, output, source, width, height, progress, metrics, options)
+        else:
+            # Vista plana R,G,B,R,G,B... en orden de filas: mismo recorrido que pixels[x, y]
+            with metrics.etapa("decodificacion"):
+                arr = np.array(img.convert('RGB'), dtype=np.uint8)
+            del img
+            rows_per_band = max(1, BAND_BYTES // (width * 3))
+            progress = Progreso(progress_callback, -(-total_bits // (width * 3)), "filas", cancel_event)
+            for y in range(0, height, rows_per_band):
+                if not source.pendientes:
+                    break
+                band = arr[y:y + rows_per_band].reshape(-1)
+                n = _embed_band(band, source, metrics)
+                metrics.sumar("filas", min(-(-n // (width * 3)), rows_per_band))
+                metrics.publicar()
+                progress.avanzar(min(-(-n // (width * 3)), rows_per_band), band.size)
+    
+    if source.pendientes:
+        if strips:
+            os.remove(output)
+        raise _EmbedError("Error: El archivo secreto cambió durante la lectura.")
+    
+    if not strips:
+        progress.comprobar()
+        with metrics.etapa("codificacion"):
+            _save_image(arr, output, output_format, options)
+    progress.terminar()
+
+@perfilar
+def embed_logic(cover_path, secret_path, output_path, progress_callback=None, cancel_event=None,
+                compression="none", metrics=None, output_format=None, preset="default", compress_level=None,
+                png_filter=None, png_strategy=None):
+    """
+    Oculta el archivo en la imagen. `progress_callback` recibe eventos de
+    progreso por filas (ver estego.progreso) y `cancel_event` (threading.Event)
+    detiene el trabajo antes de escribir la salida. `compression`
+    (none/zlib/lzma/zstd) comprime el secreto si una muestra lo justifica.
+    `metrics` recibe los tiempos por etapa (ver estego.metricas).
+    Si `secret_path` es una carpeta se oculta como un contenido de varias
+    entradas (ver estego.archivo), comprimidas una a una.
+
+    `output_format` (ver OUTPUT_FORMATS: png, bmp, webp, tiff; por defecto
+    según la extensión de `output_path`, que se corrige si no corresponde)
+    elige el formato sin pérdida de la salida. `preset` ("default" o "fast",
+    ver PRESETS) fija sus opciones de guardado; `compress_level` (0-9),
+    `png_filter` (PNG_FILTERS) y `png_strategy` (PNG_STRATEGIES) reemplazan
+    las del preajuste en PNG.
+
+    Las portadas PNG de más de STRIP_THRESHOLD bytes decodificados se
+    procesan por bandas de filas (ver estego.bandas) con memoria acotada
+    cuando la salida también es PNG.
+    """
+    metrics = como_metricas(metrics)
+    try:
+        output_format, output_path = output_path_for(output_path, output_format)
+        options = save_options(preset, compress_level, png_filter, png_strategy)
+        _embed(cover_path, secret_path, output_path, output_format, options, progress_callback, cancel_event,
+               compression, metrics)
+        return True, f"¡Éxito! Archivo ocultado en:\n{output_path}"
+    except (Cancelado, _EmbedError) as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"Error inesperado: {str(e)}"
+    finally:
+        metrics.publicar(forzar=True)
+
+@perfilar
+def embed_data(cover, secret, secret_name=None, output=None, output_format="png", compression="none",
+               preset="default", compress_level=None, png_filter=None, png_strategy=None, progress_callback=None,
+               cancel_event=None, metrics=None):
+    """
+    Como embed_logic, pero sin archivos intermedios: `cover` y `secret` son
+    bytes, buffers o archivos binarios abiertos (ver estego.memoria; también
+    se aceptan rutas) y `secret_name` es el nombre del secreto, del que la
+    cabecera guarda la extensión (por defecto el del archivo, o NOMBRE_SECRETO
+    para datos en memoria). La imagen se escribe en `output` (un
+    archivo abierto para escritura) o, si es None, se devuelve en bytes.
+
+    En lugar de devolver (ok, mensaje) lanza ValueError (formato desconocido,
+    secreto que no cabe...) o Cancelado.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida desconocido: {output_format}")
+    metrics = como_metricas(metrics)
+    options = save_options(preset, compress_level, png_filter, png_strategy)
+    destination = io.BytesIO() if output is None else output
+    try:
+        cover_file, _ = abrir_datos(cover)
+        with cover_file:
+            _embed(cover_file, secret, destination, output_format, options, progress_callback, cancel_event,
+                   compression, metrics, secret_name)
+    finally:
+        metrics.publicar(forzar=True)
+    return destination.getvalue() if output is None else None
+
+def _read_lsb_bytes(flat, start_byte, num_bytes):
+    """Empaqueta los LSB de `flat` correspondientes a los bytes [start_byte, start_byte + num_bytes)."""
+    return lsb.leer_bytes(flat[start_byte * 8:(start_byte + num_bytes) * 8])
+
+def _open_rows(image_path, pixels):
+    """
+    Abre la imagen decodificando solo las filas que contienen sus primeros
+    `pixels` pixeles cuando el formato lo permite (PNG no entrelazado: el decodificador va fila a fila y
+    se detiene al llenar la imagen). En otros formatos se carga completa.
+    Devuelve (imagen RGB, ancho, alto total).
+    """
+    img = Image.open(image_path)
+    width, height = img.size
+    rows = min(-(-pixels // width), height)
+    if img.format == "PNG" and not img.info.get("interlace") and len(img.tile) == 1:
+        tile = img.tile[0]
+        if tuple(tile[1]) == (0, 0, width, height):
+            extents = (0, 0, width, rows)
+            img.tile = [tile._replace(extents=extents) if hasattr(tile, "_replace")
+                        else (tile[0], extents) + tuple(tile[2:])]
+            img._size = (width, rows)
+    return img.convert('RGB'), width, height
+
+def _parse_header(header):
+    """
+    Interpreta los primeros bytes LSB. Devuelve (header_size, data_size, ext,
+    method_code, original_size) o None si no hay firma 'STG'/'STZ'.
+    """
+    header_size = {b'STG': HEADER_SIZE, b'STZ': COMPRESSED_HEADER_SIZE}.get(header[:3])
+    if header_size is None or len(header) < header_size:
+        return None
+    # Bytes 3 al 7: Tamaño
+    data_size = struct.unpack("I", header[3:7])[0]
+    # Bytes 7 al 15: Extensión
+    try:
+        ext = header[7:15].decode('utf-8').strip('\x00')
+    except UnicodeDecodeError:
+        ext = ".bin" # Fallback si falla la decodificación
+    # 'STZ', bytes 15 al 24: Método de compresión y tamaño original
+    method_code, original_size = 0, data_size
+    if header_size == COMPRESSED_HEADER_SIZE:
+        method_code, original_size = struct.unpack("<BQ", header[15:24])
+    return header_size, data_size, ext, method_code, original_size
+
+def _read_header(stego_path):
+    """Decodifica solo las filas de la cabecera. Devuelve (cabecera interpretada o None, ancho, alto)."""
+    # La cabecera más larga ocupa COMPRESSED_HEADER_SIZE * 8 valores, 3 por pixel
+    img, width, height = _open_rows(stego_path, -(-COMPRESSED_HEADER_SIZE * 8 // 3))
+    flat = np.asarray(img, dtype=np.uint8).reshape(-1)
+    if flat.size < HEADER_SIZE * 8:
+        return None, width, height
+    parsed = _parse_header(_read_lsb_bytes(flat, 0, min(COMPRESSED_HEADER_SIZE, flat.size // 8)))
+    # Una firma casual con un tamaño que no cabe no es un secreto
+    if parsed is not None and (parsed[0] + parsed[1]) * 8 > width * height * 3:
+        parsed = None
+    return parsed, width, height
+
+def detect(stego_path):
+    """
+    Indica si la imagen tiene un secreto decodificando solo las filas de la
+    cabecera. Devuelve None si está limpia o un diccionario con format
+    ('STG' o 'STZ'), ext, size, original_size, compression y verified (la
+    cabecera de imagen no lleva CRC: solo se valida que el contenido quepa).
+    """
+    parsed, _, _ = _read_header(stego_path)
+    if parsed is None:
+        return None
+    header_size, data_size, ext, method_code, original_size = parsed
+    return {"carrier": "image", "format": "STG" if header_size == HEADER_SIZE else "STZ", "ext": ext,
+            "size": data_size, "original_size": original_size,
+            "compression": NOMBRES.get(method_code, str(method_code)), "verified": False}
+
+def _value_bands(stego_path, width, rows, metrics, lazy=False):
+    """
+    Genera los valores R,G,B de las primeras `rows` filas en bandas planas.
+    Los PNG grandes se leen por bandas (memoria acotada); el resto con
+    _open_rows, que en PNG tampoco decodifica filas de más. Con `lazy`, todo
+    PNG admitido se lee por bandas a medida que se piden.
+    """
+    rows_per_band = max(1, BAND_BYTES // (width * 3))
+    if (lazy or rows * width * 3 > STRIP_THRESHOLD) and admite_bandas(stego_path):
+        with LectorBandasPNG(stego_path) as reader:
+            while reader.filas_leidas < rows:
+                with metrics.etapa("decodificacion"):
+                    band = reader.leer(min(rows_per_band, rows - reader.filas_leidas))
+                    flat = np.asarray(band.convert('RGB'), dtype=np.uint8).reshape(-1)
+                yield flat
+    else:
+        with metrics.etapa("decodificacion"):
+            img, _, _ = _open_rows(stego_path, rows * width)
+            flat = np.asarray(img, dtype=np.uint8).reshape(-1)[:rows * width * 3]
+        step = rows_per_band * width * 3
+        for start in range(0, flat.size, step):
+            yield flat[start:start + step]
+
+class _LSBReader:
+    """Empaqueta en bytes los LSB de bandas sucesivas, decodificando solo las necesarias."""
+
+    def __init__(self, bands):
+        self._bands = iter(bands)
+        self._bits = np.empty(0, dtype=np.uint8)  # LSB aún sin entregar
+
+    def read(self, num_bytes):
+        need = num_bytes * 8
+        parts, have = [self._bits], self._bits.size
+        while have < need:
+            flat = next(self._bands, None)
+            if flat is None:
+                break
+            parts.append(lsb.leer(flat))
+            have += flat.size
+        bits = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        usable = min(need, bits.size - bits.size % 8)
+        self._bits = bits[usable:]
+        return np.packbits(bits[:usable]).tobytes()
+
+    def skip(self, num_bytes):
+        """Descarta `num_bytes`; las bandas que quedan enteras dentro no se desempaquetan."""
+        need = num_bytes * 8
+        if self._bits.size >= need:
+            self._bits = self._bits[need:]
+            return
+        need -= self._bits.size
+        self._bits = np.empty(0, dtype=np.uint8)
+        for flat in self._bands:
+            if flat.size > need:
+                self._bits = lsb.leer(flat[need:])
+                return
+            need -= flat.size
+
+def get_capacity(cover_path):
+    """Bytes que caben en la imagen, descontando la cabecera (solo lee las dimensiones)."""
+    with Image.open(cover_path) as img:
+        width, height = img.size
+    return max(width * height * 3 // 8 - HEADER_SIZE, 0)
+
+def _copy_payload(stego, parsed, width, destination, progress_callback, cancel_event, metrics):
+    """
+    Núcleo de extract_logic y extract_data: escribe en `destination` (archivo
+    abierto) el contenido original, por bloques de BAND_BYTES de portada para
+    informar progreso, poder cancelar y descomprimir al vuelo sin tener todo
+    el contenido en memoria.
+    """
+    header_size, data_size, ext, method_code, original_size = parsed
+    row_bytes = width * 3
+    total_rows = -(-(header_size + data_size) * 8 // row_bytes)
+    progress = Progreso(progress_callback, total_rows, "filas", cancel_event)
+    reader = _LSBReader(_value_bands(stego, width, total_rows, metrics))
+    reader.read(header_size)
+    chunk = BAND_BYTES // 8
+    rows_done = 0
+    output = SalidaDescomprimida(destination, method_code, original_size)
+    for start in range(0, data_size, chunk):
+        n = min(chunk, data_size - start)
+        with metrics.etapa("lsb"):
+            data = reader.read(n)
+        if len(data) < n:
+            raise ValueError("Contenido incompleto o corrupto.")
+        with metrics.etapa("escritura"):
+            output.escribir(data)
+        rows = -(-(header_size + start + n) * 8 // row_bytes)
+        metrics.sumar("filas", rows - rows_done)
+        metrics.sumar("bits", n * 8)
+        metrics.sumar("bytes_secreto", n)
+        metrics.publicar()
+        progress.avanzar(rows - rows_done, n * 8)
+        rows_done = rows
+    with metrics.etapa("escritura"):
+        output.cerrar()
+    return progress
+
+@perfilar
+def extract_logic(stego_path, output_dir=None, progress_callback=None, cancel_event=None, metrics=None):
+    metrics = como_metricas(metrics)
+    try:
+        # Descarta imágenes limpias sin decodificarlas completas; después solo
+        # se decodifican las filas que contienen la cabecera y el contenido
+        with metrics.etapa("deteccion"):
+            parsed, width, height = _read_header(stego_path)
+        if parsed is None:
+            return False, "No se detectó firma 'STG'. La imagen está limpia."
+        ext, original_size = parsed[2], parsed[4]
+        
+        base_name = os.path.splitext(os.path.basename(stego_path))[0]
+        # Limpieza extra del nombre para evitar errores
+        clean_ext = ext if ext.startswith('.') else '.' + ext
+        
+        output_filename = f"{base_name}_recuperado{clean_ext}"
+        if output_dir is None:
+            output_dir = os.path.dirname(stego_path)
+        elif not os.path.isdir(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        output_full_path = os.path.join(output_dir, output_filename)
+
+        done = False
+        try:
+            with open(output_full_path, "wb") as f:
+                progress = _copy_payload(stego_path, parsed, width, f, progress_callback, cancel_event, metrics)
+            done = True
+        finally:
+            if not done and os.path.exists(output_full_path):
+                os.remove(output_full_path)
+        
+        # Una carpeta oculta se recupera como carpeta
+        final_path, entries = desempaquetar_recuperado(output_full_path)
+        if entries is not None:
+            output_filename = f"{os.path.basename(final_path)}{os.sep} ({entries} archivos)"
+        
+        progress.terminar()
+        return True, f"¡Recuperado!\nTipo: {clean_ext}\nTamaño: {original_size} bytes\nGuardado: {output_filename}"
+
+    except Cancelado as e:
+        return False, str(e)
+    except Exception as e:
+         return False, f"Error crítico: {str(e)}"
+    finally:
+        metrics.publicar(forzar=True)
+
+@perfilar
+def extract_data(stego, progress_callback=None, cancel_event=None, metrics=None):
+    """
+    Como extract_logic, pero sin archivos: `stego` son bytes, un buffer o un
+    archivo binario abierto (ver estego.memoria; también una ruta). Devuelve
+    (extensión, memoryview con el contenido original), sin copiarlo. Una
+    carpeta oculta se devuelve tal cual, como contenido de varias entradas
+    con extensión estego.archivo.EXTENSION.
+
+    En lugar de devolver (ok, mensaje) lanza ValueError (imagen limpia,
+    contenido corrupto) o Cancelado.
+    """
+    metrics = como_metricas(metrics)
+    try:
+        stego_file, _ = abrir_datos(stego)
+        with stego_file:
+            with metrics.etapa("deteccion"):
+                parsed, width, height = _read_header(stego_file)
+            if parsed is None:
+                raise ValueError("No se detectó firma 'STG'. La imagen está limpia.")
+            ext = parsed[2]
+            destination = io.BytesIO()
+            progress = _copy_payload(stego_file, parsed, width, destination, progress_callback, cancel_event,
+                                     metrics)
+        progress.terminar()
+        return (ext if ext.startswith('.') else '.' + ext), destination.getbuffer()
+    finally:
+        metrics.publicar(forzar=True)
+
+@perfilar
+def extract_entry(stego_path, entry, output_dir=None, progress_callback=None, cancel_event=None, metrics=None):
+    """
+    Recupera solo la entrada `entry` de una carpeta oculta (ver
+    estego.archivo): lee la tabla de contenido, salta hasta la entrada y se
+    detiene al terminarla, así que no se decodifican las filas posteriores ni
+    se desempaquetan los LSB de las anteriores. Se guarda en `output_dir`
+    (por defecto junto a la imagen) con sus subcarpetas.
+    """
+    metrics = como_metricas(metrics)
+    try:
+        with metrics.etapa("deteccion"):
+            parsed, width, height = _read_header(stego_path)
+        if parsed is None:
+            return False, "No se detectó firma 'STG'. La imagen está limpia."
+        header_size, data_size, ext, method_code, _ = parsed
+        if ext != EXTENSION or method_code:
+            return False, "Error: La imagen no contiene una carpeta con entradas."
+        
+        reader = _LSBReader(_value_bands(stego_path, width, height, metrics, lazy=True))
+        reader.skip(header_size)
+        with metrics.etapa("lsb"):
+            table = leer_tabla(reader.read)
+        if table is None:
+            return False, "Error: La imagen no contiene una carpeta con entradas."
+        item = buscar(table, entry)
+        if table.tam + item.desplazamiento + item.longitud > data_size:
+            return False, "Error crítico: Contenido incompleto o corrupto."
+        reader.skip(item.desplazamiento)
+        
+        if output_dir is None:
+            output_dir = os.path.dirname(stego_path)
+        progress = Progreso(progress_callback, item.longitud, "bytes", cancel_event)
+        
+        def advance(n):
+            metrics.sumar("bytes_secreto", n)
+            metrics.publicar()
+            progress.avanzar(n, n * 8)
+        
+        path = extraer_entrada(item, reader.read, output_dir, advance)
+        progress.terminar()
+        return True, f"¡Recuperado!\nEntrada: {item.nombre}\nTamaño: {item.tam_original} bytes\nGuardado: {path}"
+
+    except Cancelado as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"Error crítico: {str(e)}"
+    finally:
+        metrics.publicar(forzar=True)
@@ -0,0 +1,106 @@
+"""
+Índice lateral de un video con secreto.
+
+`<video>.estego.json` guarda dónde está el contenido (rango de cuadros,
+disposición de bits), su nombre, tamaño y SHA-256. Con él, una extracción
+repetida puede saltarse todo el trabajo si el archivo ya extraído coincide,
+y cualquier extracción verifica que lo recuperado sea lo que se ocultó.
+
+El índice se descarta si el video cambió (tamaño o primeros bytes).
+"""
+import hashlib
+import json
+import os
+
+VERSION_INDICE = 1
+SUFIJO = ".estego.json"
+BYTES_HUELLA = 64 * 1024
+TAM_BLOQUE = 1024 * 1024
+
+
+def ruta_indice(ruta_video):
+    return os.path.normpath(ruta_video) + SUFIJO
+
+
+def sha256_archivo(ruta, limite=None):
+    """SHA-256 de todo el archivo, o de sus primeros `limite` bytes."""
+    h = hashlib.sha256()
+    restantes = limite
+    with open(ruta, "rb") as f:
+        while restantes is None or restantes > 0:
+            bloque = f.read(TAM_BLOQUE if restantes is None else min(TAM_BLOQUE, restantes))
+            if not bloque:
+                break
+            h.update(bloque)
+            if restantes is not None:
+                restantes -= len(bloque)
+    return h.hexdigest()
+
+
+def sha256_abierto(archivo):
+    """SHA-256 del resto de un archivo abierto en modo binario; lo deja donde estaba."""
+    h = hashlib.sha256()
+    posicion = archivo.tell()
+    for bloque in iter(lambda: archivo.read(TAM_BLOQUE), b""):
+        h.update(bloque)
+    archivo.seek(posicion)
+    return h.hexdigest()
+
+
+def huella_video(ruta_video):
+    if os.path.isdir(ruta_video):
+        # Salida en secuencia PNG: la huella es la de sus cuadros
+        cuadros = sorted(os.listdir(ruta_video))
+        return {"tam_video": sum(os.path.getsize(os.path.join(ruta_video, c)) for c in cuadros),
+                "sha256_inicio": sha256_archivo(os.path.join(ruta_video, cuadros[0]), BYTES_HUELLA)
+                if cuadros else ""}
+    return {"tam_video": os.path.getsize(ruta_video),
+            "sha256_inicio": sha256_archivo(ruta_video, BYTES_HUELLA)}
+
+
+def escribir_indice(ruta_video, **datos):
+    """Escribe el índice de `ruta_video` con los campos dados más la huella del video."""
+    indice = {"version": VERSION_INDICE, **huella_video(ruta_video), **datos}
+    temporal = ruta_indice(ruta_video) + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta_indice(ruta_video))
+    return ruta_indice(ruta_video)
+
+
+def leer_indice(ruta_video):
+    """Devuelve el índice si existe y corresponde al video actual; si no, None."""
+    try:
+        with open(ruta_indice(ruta_video), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+        if indice.get("version") != VERSION_INDICE:
+            return None
+        huella = huella_video(ruta_video)
+    except (OSError, ValueError):
+        return None
+    if any(indice.get(clave) != valor for clave, valor in huella.items()):
+        return None
+    return indice
+
+
+def coincide(ruta, tam, sha256):
+    """True si `ruta` existe con ese tamaño y hash."""
+    try:
+        return os.path.getsize(ruta) == tam and sha256_archivo(ruta) == sha256
+    except OSError:
+        return False
+
+
+class ArchivoConHash:
+    """Envuelve un archivo abierto para escritura y calcula el SHA-256 de lo escrito."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.hash = hashlib.sha256()
+
+    def write(self, datos):
+        self.hash.update(datos)
+        return self.archivo.write(datos)
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
@@ -0,0 +1,45 @@
+"""
+Núcleo LSB vectorizado, común a imagen y video.
+
+Trabaja sobre un arreglo plano uint8 de muestras (los valores de canal ya
+elegidos por el portador, en orden) y bits 0/1 con el más significativo
+primero: cada muestra guarda `k` bits del flujo en sus k bits bajos.
+"""
+import numpy as np
+
+
+def escribir(muestras, bits, k=1):
+    """
+    Escribe `bits` en los k LSB de `muestras` (vista modificable, en su
+    lugar). El último grupo incompleto se rellena con ceros. Devuelve el
+    número de muestras usadas.
+    """
+    n = bits.size
+    num_muestras = -(-n // k)
+    if k == 1:
+        valores = bits
+    else:
+        # Agrupa de k en k bits (MSB primero); packbits rellena con ceros a la derecha
+        grupos = np.zeros(num_muestras * k, dtype=np.uint8)
+        grupos[:n] = bits
+        valores = np.packbits(grupos.reshape(-1, k), axis=1)[:, 0] >> (8 - k)
+    destino = muestras[:num_muestras]
+    destino &= np.uint8((0xFF << k) & 0xFF)
+    destino |= valores
+    return num_muestras
+
+
+def leer(muestras, k=1):
+    """Inverso de `escribir`: los k LSB de cada muestra como bits (0/1)."""
+    if k == 1:
+        return muestras & 1
+    bits = np.empty((muestras.size, k), dtype=np.uint8)
+    for j in range(k):
+        np.bitwise_and(muestras >> (k - 1 - j), 1, out=bits[:, j])
+    return bits.reshape(-1)
+
+
+def leer_bytes(muestras, k=1):
+    """Bytes empaquetados de los bits de `muestras` (los bits sobrantes se descartan)."""
+    bits = leer(muestras, k)
+    return np.packbits(bits[:bits.size - bits.size % 8]).tobytes()
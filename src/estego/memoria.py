@@ -0,0 +1,143 @@
+"""
+Entradas en memoria para la API sin archivos (embed_data, extract_data,
+extraer_datos_de_video).
+
+`abrir_datos` convierte lo que llega de un pipeline en un archivo de
+lectura con seek, propiedad del llamador, sin copiar nada cuando se puede:
+
+- bytes, bytearray, memoryview o cualquier objeto con el protocolo de
+  buffer: se leen en su lugar (LectorMemoria).
+- un archivo binario con seek (BytesIO, un archivo abierto...): se lee
+  desde su posición actual; cerrar lo devuelto no lo cierra.
+- un flujo sin seek (una tubería, un socket con makefile("rb")): se copia a
+  un SpooledTemporaryFile, que queda en memoria hasta TAM_EN_MEMORIA bytes.
+- una ruta: se abre el archivo.
+"""
+import io
+import os
+import shutil
+import tempfile
+
+TAM_EN_MEMORIA = 64 * 1024 * 1024
+# Nombre guardado en la cabecera de un secreto en memoria si no se indica otro
+NOMBRE_SECRETO = "secreto.bin"
+
+
+def es_ruta(valor):
+    return isinstance(valor, (str, os.PathLike))
+
+
+class LectorMemoria(io.BufferedIOBase):
+    """Archivo de solo lectura sobre un buffer, sin copiarlo."""
+
+    def __init__(self, datos):
+        super().__init__()
+        self._vista = memoryview(datos).cast("B")
+        self._pos = 0
+
+    def __len__(self):
+        return len(self._vista)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, desplazamiento, desde=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: len(self._vista)}[desde]
+        self._pos = max(0, base + desplazamiento)
+        return self._pos
+
+    def readinto(self, destino):
+        datos = self._vista[self._pos:self._pos + len(destino)]
+        destino[:len(datos)] = datos
+        self._pos += len(datos)
+        return len(datos)
+
+    def read(self, n=-1):
+        fin = len(self._vista) if n is None or n < 0 else self._pos + n
+        datos = self._vista[self._pos:fin].tobytes()
+        self._pos += len(datos)
+        return datos
+
+    def close(self):
+        self._vista.release()
+        super().close()
+
+
+class _Vista(io.BufferedIOBase):
+    """
+    Archivo de lectura sobre otro desde `inicio`: las posiciones son
+    relativas a `inicio` y close() solo cierra el otro si es `propio`.
+    """
+
+    def __init__(self, archivo, inicio, tam, propio=False):
+        super().__init__()
+        self._archivo = archivo
+        self._inicio = inicio
+        self._tam = tam
+        self._propio = propio
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._archivo.tell() - self._inicio
+
+    def seek(self, desplazamiento, desde=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.tell(), os.SEEK_END: self._tam}[desde]
+        return self._archivo.seek(self._inicio + max(0, base + desplazamiento)) - self._inicio
+
+    def readinto(self, destino):
+        datos = self._archivo.read(len(destino))
+        destino[:len(datos)] = datos
+        return len(datos)
+
+    def read(self, n=-1):
+        return self._archivo.read(-1 if n is None else n)
+
+    def close(self):
+        if self._propio:
+            self._archivo.close()
+        super().close()
+
+
+def abrir_datos(datos):
+    """
+    Devuelve (archivo de lectura con seek, tamaño); el llamador cierra el
+    archivo. Salvo con una ruta, es un io.BufferedIOBase, como pide OpenCV
+    para leer video desde memoria.
+    """
+    if es_ruta(datos):
+        return open(datos, "rb"), os.path.getsize(datos)
+    if hasattr(datos, "read"):
+        try:
+            seek = datos.seekable()
+        except (AttributeError, OSError):
+            seek = False
+        if seek:
+            inicio = datos.tell()
+            tam = datos.seek(0, os.SEEK_END) - inicio
+            datos.seek(inicio)
+            return _Vista(datos, inicio, tam), tam
+        temporal = tempfile.SpooledTemporaryFile(max_size=TAM_EN_MEMORIA)
+        try:
+            shutil.copyfileobj(datos, temporal)
+            tam = temporal.tell()
+            temporal.seek(0)
+        except BaseException:
+            temporal.close()
+            raise
+        return _Vista(temporal, 0, tam, propio=True), tam
+    try:
+        lector = LectorMemoria(datos)
+    except TypeError:
+        raise TypeError("Se esperaba una ruta, bytes, un buffer o un archivo abierto en modo binario.")
+    return lector, len(lector)
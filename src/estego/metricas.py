@@ -0,0 +1,191 @@
+"""
+Métricas por etapa y perfilado opcional.
+
+Las funciones de ocultar/extraer aceptan `metricas` (o `metrics` en
+estego.imagen): un objeto `Metricas` o un callable. El callable recibe cada
+cierto tiempo, y siempre al terminar, un resumen con:
+
+    {"segundos": ..., "etapas": {"decodificacion": s, "lsb": s, ...},
+     "contadores": {"cuadros": n, "bits": n, ...},
+     "colas": {"decodificados": {"actual": n, "max": n}, ...}}
+
+Los tiempos de etapa son acumulados; en la tubería de video varias etapas
+corren a la vez, así que pueden sumar más que `segundos`.
+
+Con la variable de entorno ESTEGO_PERFIL=<carpeta>, cada operación se ejecuta
+bajo cProfile y deja un .prof en esa carpeta, sin tocar el código. Se lee con
+`python -m pstats archivo.prof`. Hay un solo perfil activo por proceso: desde
+Python 3.12 cProfile no admite dos a la vez, así que un `perfilado` anidado o
+en otro hilo mientras hay uno activo no hace nada.
+"""
+import bisect
+import cProfile
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+VARIABLE_PERFIL = "ESTEGO_PERFIL"
+
+
+class Metricas:
+    """Acumula tiempos por etapa, contadores y profundidad de colas. Seguro entre hilos."""
+
+    def __init__(self, callback=None, intervalo=0.5):
+        self.callback = callback
+        self.intervalo = intervalo
+        self.etapas = {}
+        self.contadores = {}
+        self.colas = {}
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._ultimo = self._inicio
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            transcurrido = time.perf_counter() - inicio
+            with self._lock:
+                self.etapas[nombre] = self.etapas.get(nombre, 0.0) + transcurrido
+
+    def sumar(self, nombre, cantidad=1):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def cola(self, nombre, profundidad):
+        with self._lock:
+            cola = self.colas.setdefault(nombre, {"actual": 0, "max": 0})
+            cola["actual"] = profundidad
+            cola["max"] = max(cola["max"], profundidad)
+
+    def resumen(self):
+        with self._lock:
+            return {
+                "segundos": round(time.perf_counter() - self._inicio, 6),
+                "etapas": {nombre: round(s, 6) for nombre, s in self.etapas.items()},
+                "contadores": dict(self.contadores),
+                "colas": {nombre: dict(cola) for nombre, cola in self.colas.items()},
+            }
+
+    def publicar(self, forzar=False):
+        """Envía el resumen al callback si pasó `intervalo` desde el anterior (o si `forzar`)."""
+        if self.callback is None:
+            return
+        ahora = time.perf_counter()
+        if forzar or ahora - self._ultimo >= self.intervalo:
+            self._ultimo = ahora
+            self.callback(self.resumen())
+
+
+# Límites (segundos) de las cubetas de los histogramas de latencia
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histograma:
+    """
+    Cuenta observaciones por cubetas acumuladas, como los histogramas de
+    Prometheus: la cubeta `le` cuenta las observaciones <= le. Seguro entre hilos.
+    """
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        self._cuentas = [0] * (len(self.limites) + 1)  # la última es +Inf
+        self._suma = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        cubeta = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            self._cuentas[cubeta] += 1
+            self._suma += valor
+
+    def resumen(self):
+        with self._lock:
+            cuentas, suma = list(self._cuentas), self._suma
+        acumulado, cubetas = 0, {}
+        for limite, cuenta in zip(self.limites + ("+Inf",), cuentas):
+            acumulado += cuenta
+            cubetas[str(limite)] = acumulado
+        return {"cubetas": cubetas, "cuenta": acumulado, "suma": round(suma, 6)}
+
+
+class _SinMetricas:
+    """Mismo interfaz que Metricas sin hacer nada, para no comprobar None en cada cuadro."""
+
+    def etapa(self, nombre):
+        return nullcontext()
+
+    def sumar(self, nombre, cantidad=1):
+        pass
+
+    def cola(self, nombre, profundidad):
+        pass
+
+    def publicar(self, forzar=False):
+        pass
+
+
+SIN_METRICAS = _SinMetricas()
+
+
+def como_metricas(metricas):
+    """Acepta None, un objeto Metricas o un callable, y devuelve algo con el interfaz de Metricas."""
+    if metricas is None:
+        return SIN_METRICAS
+    if callable(metricas) and not isinstance(metricas, Metricas):
+        return Metricas(callback=metricas)
+    return metricas
+
+
+def perfilado(nombre):
+    """
+    Contexto que perfila con cProfile si ESTEGO_PERFIL está definida y no hay
+    ya un perfil activo en el proceso.
+    """
+    carpeta = os.environ.get(VARIABLE_PERFIL)
+    if not carpeta:
+        return nullcontext()
+    return _perfilar_en(carpeta, nombre)
+
+
+_lock_perfil = threading.Lock()
+_perfil_activo = False
+
+
+@contextmanager
+def _perfilar_en(carpeta, nombre):
+    global _perfil_activo
+    os.makedirs(carpeta, exist_ok=True)
+    with _lock_perfil:
+        if _perfil_activo:
+            perfil = None
+        else:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+                _perfil_activo = True
+            except ValueError:
+                # Otra herramienta (p. ej. python -m cProfile) ya está perfilando
+                perfil = None
+    try:
+        yield
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            with _lock_perfil:
+                _perfil_activo = False
+            archivo = f"{nombre}-{os.getpid()}-{threading.get_ident()}-{time.time_ns()}.prof"
+            perfil.dump_stats(os.path.join(carpeta, archivo))
+
+
+def perfilar(funcion):
+    """Decorador: ejecuta `funcion` bajo `perfilado` con su propio nombre."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with perfilado(funcion.__name__):
+            return funcion(*args, **kwargs)
+    return envoltura
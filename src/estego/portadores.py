@@ -0,0 +1,175 @@
+"""
+Portadores: la interfaz común de imagen y video.
+
+Cada portador dice si admite una ruta y expone las mismas operaciones
+(ocultar, extraer, extraer_entrada, capacidad, detectar, salida_por_defecto).
+Las opciones llegan con las claves de los trabajos de estego.cli (bits,
+channels, codec, image_format, preset...) y cada portador usa las suyas e
+ignora el resto. Los resultados son diccionarios con las claves del
+resultado de un trabajo (output, bytes, message).
+
+Pillow y OpenCV se importan solo al usar un portador: un proceso que solo
+trabaja con imágenes no carga OpenCV. `para(ruta)` elige el portador y
+`registrar` añade otros (se prueban antes que los de fábrica).
+"""
+import os
+
+from .deteccion import es_imagen
+
+MIB = 1024 * 1024
+
+
+class Portador:
+    """Interfaz de un portador; las subclases implementan las operaciones."""
+
+    nombre = ""
+
+    def admite(self, ruta):
+        raise NotImplementedError
+
+    def salida_por_defecto(self, portada, **opciones):
+        return os.path.splitext(portada)[0] + "_SECRETO" + self._extension(opciones)
+
+    def _extension(self, opciones):
+        raise NotImplementedError
+
+    def ocultar(self, portada, secreto, salida, compresion="none", metricas=None, **opciones):
+        """Oculta `secreto` (archivo o carpeta). Devuelve {"output", "message"?}."""
+        raise NotImplementedError
+
+    def extraer(self, estego, carpeta=None, metricas=None, **opciones):
+        """Recupera el secreto. Devuelve {"output"?, "bytes"?, "message"?}."""
+        raise NotImplementedError
+
+    def extraer_entrada(self, estego, entrada, carpeta=None, metricas=None):
+        """Recupera una entrada de una carpeta oculta."""
+        raise NotImplementedError
+
+    def capacidad(self, portada, **opciones):
+        """Bytes que caben en `portada`."""
+        raise NotImplementedError
+
+    def detectar(self, ruta):
+        """None si está limpio o el diccionario de estego.deteccion.detect."""
+        raise NotImplementedError
+
+
+class PortadorImagen(Portador):
+    """Imágenes sin pérdida (estego.imagen, Pillow)."""
+
+    nombre = "imagen"
+
+    def admite(self, ruta):
+        return es_imagen(ruta)
+
+    def _extension(self, opciones):
+        return "." + (opciones.get("image_format") or "png")
+
+    @staticmethod
+    def _resultado(ok, msg):
+        if not ok:
+            # Los mensajes de estego.imagen traen "Error: " para la GUI; quien
+            # reciba la excepción ya lo presenta como error
+            raise ValueError(msg.removeprefix("Error: "))
+        return {"message": msg} if msg else {}
+
+    def ocultar(self, portada, secreto, salida, compresion="none", metricas=None, **opciones):
+        from . import imagen
+
+        formato, salida = imagen.output_path_for(salida, opciones.get("image_format"))
+        ok, msg = imagen.embed_logic(portada, secreto, salida, compression=compresion, metrics=metricas,
+                                     output_format=formato, preset=opciones.get("preset") or "default",
+                                     compress_level=opciones.get("png_level"),
+                                     png_filter=opciones.get("png_filter"),
+                                     png_strategy=opciones.get("png_strategy"))
+        return {"output": salida, **self._resultado(ok, msg)}
+
+    def extraer(self, estego, carpeta=None, metricas=None, **opciones):
+        from . import imagen
+
+        return self._resultado(*imagen.extract_logic(estego, carpeta, metrics=metricas))
+
+    def extraer_entrada(self, estego, entrada, carpeta=None, metricas=None):
+        from . import imagen
+
+        return self._resultado(*imagen.extract_entry(estego, entrada, carpeta, metrics=metricas))
+
+    def capacidad(self, portada, **opciones):
+        from . import imagen
+
+        return imagen.get_capacity(portada)
+
+    def detectar(self, ruta):
+        from . import imagen
+
+        return imagen.detect(ruta)
+
+
+class PortadorVideo(Portador):
+    """Video sin pérdida (estego.video, OpenCV). Admite cualquier ruta: OpenCV decide al abrirla."""
+
+    nombre = "video"
+
+    def admite(self, ruta):
+        return True
+
+    def _extension(self, opciones):
+        return ".avi"
+
+    def ocultar(self, portada, secreto, salida, compresion="none", metricas=None, **opciones):
+        from . import video
+        from .salidas import obtener
+
+        codec = opciones.get("codec") or "ffv1"
+        if codec != "auto":
+            codec = obtener(codec, opciones.get("threads"), opciones.get("slices"))
+        presupuesto = opciones.get("disk_budget_mb")
+        salida = video.ocultar_archivo_en_video(portada, secreto, salida,
+                                                bits_por_canal=int(opciones.get("bits", 1)),
+                                                canales=opciones.get("channels", "B"),
+                                                compresion=compresion, metricas=metricas,
+                                                indice=opciones.get("index", False), salida=codec,
+                                                presupuesto_disco=presupuesto and presupuesto * MIB,
+                                                cuadros_por_segmento=opciones.get("segment_frames"))
+        return {"output": salida}
+
+    def extraer(self, estego, carpeta=None, metricas=None, **opciones):
+        from . import video
+
+        ruta, tam = video.extraer_archivo_de_video(estego, carpeta or "recuperado",
+                                                   procesos=opciones.get("procesos", 1), metricas=metricas,
+                                                   usar_indice=opciones.get("index", False))
+        return {"output": ruta, "bytes": tam}
+
+    def extraer_entrada(self, estego, entrada, carpeta=None, metricas=None):
+        from . import video
+
+        ruta, tam = video.extraer_entrada_de_video(estego, entrada, carpeta or "recuperado", metricas=metricas)
+        return {"output": ruta, "bytes": tam}
+
+    def capacidad(self, portada, **opciones):
+        from . import video
+
+        return video.calcular_capacidad_video(portada, int(opciones.get("bits", 1)),
+                                              opciones.get("channels", "B"), exacto=opciones.get("exact", False))
+
+    def detectar(self, ruta):
+        from . import video
+
+        return video.detectar(ruta)
+
+
+PORTADORES = [PortadorImagen(), PortadorVideo()]
+
+
+def registrar(portador):
+    """Añade `portador`; se prueba antes que los ya registrados."""
+    PORTADORES.insert(0, portador)
+
+
+def para(ruta):
+    """Primer portador que admite `ruta`."""
+    for portador in PORTADORES:
+        if portador.admite(ruta):
+            return portador
+    raise ValueError(f"Ningún portador admite {ruta}.")
@@ -0,0 +1,130 @@
+"""
+Progreso y cancelación de trabajos largos.
+
+Las funciones de incrustar/extraer reciben un callback de progreso y un
+threading.Event de cancelación. `Tarea` las ejecuta en un hilo aparte y deja
+los eventos en una cola, para que una interfaz los consuma con after() sin
+tocar Tk desde otro hilo.
+"""
+import queue
+import threading
+import time
+
+
+class Cancelado(Exception):
+    """La operación se canceló antes de terminar."""
+
+    def __init__(self, mensaje="Operación cancelada."):
+        super().__init__(mensaje)
+
+
+class Progreso:
+    """
+    Lleva la cuenta de unidades hechas (cuadros, filas) y bytes de portada
+    procesados. Cada `intervalo` segundos envía al callback un evento:
+    {"hecho", "total", "unidad", "mb_s", "eta"}. Si `cancelar` está activo,
+    `avanzar` lanza Cancelado.
+    """
+
+    def __init__(self, callback, total, unidad, cancelar=None, intervalo=0.5):
+        self.callback = callback
+        self.total = total
+        self.unidad = unidad
+        self.cancelar = cancelar
+        self.intervalo = intervalo
+        self.hecho = 0
+        self.bytes = 0
+        self._inicio = time.perf_counter()
+        self._ultimo = self._inicio
+
+    def comprobar(self):
+        if self.cancelar is not None and self.cancelar.is_set():
+            raise Cancelado()
+
+    def avanzar(self, unidades=1, bytes_procesados=0):
+        self.comprobar()
+        self.hecho += unidades
+        self.bytes += bytes_procesados
+        if self.callback is not None:
+            ahora = time.perf_counter()
+            if ahora - self._ultimo >= self.intervalo:
+                self._ultimo = ahora
+                self.callback(self.evento(ahora))
+
+    def terminar(self):
+        if self.callback is not None:
+            self.callback(self.evento(time.perf_counter()))
+
+    def evento(self, ahora):
+        transcurrido = max(ahora - self._inicio, 1e-9)
+        eta = None
+        if self.total and self.hecho:
+            eta = transcurrido * (self.total - self.hecho) / self.hecho
+        return {
+            "hecho": self.hecho,
+            "total": self.total,
+            "unidad": self.unidad,
+            "mb_s": self.bytes / transcurrido / 1e6,
+            "eta": eta,
+        }
+
+
+def formatear(evento):
+    """Texto de una línea para el registro de la interfaz."""
+    texto = f"{evento['hecho']}"
+    if evento["total"]:
+        texto += f"/{evento['total']} {evento['unidad']} ({100 * evento['hecho'] // evento['total']}%)"
+    else:
+        texto += f" {evento['unidad']}"
+    texto += f" · {evento['mb_s']:.1f} MB/s"
+    if evento["eta"] is not None:
+        minutos, segundos = divmod(int(evento["eta"]), 60)
+        texto += f" · ETA {minutos}m{segundos:02d}s"
+    return texto
+
+
+class Tarea:
+    """
+    Ejecuta `funcion(*args, **kwargs)` en un hilo. La función recibe además
+    `nombre_callback` y `nombre_cancelar` para el progreso y la cancelación.
+    Con `nombre_log`, los mensajes de registro (texto) llegan por la misma
+    cola que los eventos de progreso (diccionarios).
+    """
+
+    def __init__(self, funcion, *args, nombre_callback="progreso_callback",
+                 nombre_cancelar="cancelar", nombre_log=None, **kwargs):
+        self.cancelar = threading.Event()
+        self.resultado = None
+        self.error = None
+        self._eventos = queue.Queue()
+        kwargs[nombre_callback] = self._eventos.put
+        kwargs[nombre_cancelar] = self.cancelar
+        if nombre_log:
+            kwargs[nombre_log] = self._eventos.put
+        self._hilo = threading.Thread(target=self._ejecutar, args=(funcion, args, kwargs), daemon=True)
+
+    def _ejecutar(self, funcion, args, kwargs):
+        try:
+            self.resultado = funcion(*args, **kwargs)
+        except BaseException as e:
+            self.error = e
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    @property
+    def terminada(self):
+        return not self._hilo.is_alive()
+
+    @property
+    def cancelada(self):
+        return isinstance(self.error, Cancelado)
+
+    def eventos(self):
+        """Eventos de progreso y mensajes pendientes, sin bloquear."""
+        while True:
+            try:
+                yield self._eventos.get_nowait()
+            except queue.Empty:
+                return
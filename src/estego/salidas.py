@@ -0,0 +1,227 @@
+"""
+Formatos de salida sin pérdida para el video con el secreto.
+
+    ffv1     AVI FFV1 (por defecto). `hilos` y `slices` se pasan a FFmpeg con
+             OPENCV_FFMPEG_WRITER_OPTIONS (nivel 3); OpenCV lee la variable
+             al abrir el escritor y algunas compilaciones la ignoran.
+    huffyuv  AVI HuffYUV: archivos más grandes, codifica mucho más rápido.
+    raw      AVI sin compresión (BGRA de 32 bits).
+    png      Carpeta con un PNG por cuadro (%06d.png).
+
+Todas se leen de vuelta idénticas con `abrir_video`. `elegir` mide cada una
+con unos cuadros de muestra y se queda con la más rápida que quepa en el
+presupuesto de disco.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+PATRON_SECUENCIA = "%06d.png"
+VARIABLE_OPCIONES = "OPENCV_FFMPEG_WRITER_OPTIONS"
+# Número de slices admitidos por FFV1 versión 3
+SLICES_FFV1 = (4, 6, 9, 12, 16, 24, 30)
+# Margen sobre el tamaño estimado: contenedor, cuadros más difíciles que la muestra
+MARGEN_DISCO = 1.05
+# OpenCV no tiene parámetro de VideoWriter para las opciones del códec (hilos,
+# slices): solo las lee de la variable de entorno al abrir el escritor. Cada
+# apertura AVI la hace bajo este lock para que otro hilo no abra su escritor
+# con las opciones de otra salida ni vea la variable a medio restaurar.
+_lock_opciones = threading.Lock()
+
+
+def abrir_video(ruta):
+    """
+    VideoCapture de un archivo de video, de una carpeta de la salida png o de
+    un archivo binario abierto con seek (se lee con el backend FFmpeg).
+    """
+    if hasattr(ruta, "read"):
+        return cv2.VideoCapture(ruta, cv2.CAP_FFMPEG, [])
+    if os.path.isdir(ruta):
+        return cv2.VideoCapture(os.path.join(ruta, PATRON_SECUENCIA), cv2.CAP_IMAGES)
+    return cv2.VideoCapture(ruta)
+
+
+def borrar_salida(ruta):
+    if os.path.isdir(ruta):
+        shutil.rmtree(ruta, ignore_errors=True)
+    elif os.path.exists(ruta):
+        os.remove(ruta)
+
+
+class SalidaAVI:
+    """Video AVI con el códec `fourcc`."""
+
+    extension = ".avi"
+
+    def __init__(self, nombre, fourcc, descripcion):
+        self.nombre = nombre
+        self.fourcc = fourcc
+        self.descripcion = descripcion
+
+    def ruta(self, ruta_pedida):
+        """Ruta real de la salida a partir de la pedida (cambia la extensión si hace falta)."""
+        if not ruta_pedida.endswith(self.extension):
+            ruta_pedida = os.path.splitext(ruta_pedida)[0] + self.extension
+        return ruta_pedida
+
+    def _opciones(self):
+        return None
+
+    def abrir(self, ruta, fps, ancho, alto):
+        opciones = self._opciones()
+        with _lock_opciones:
+            anterior = os.environ.get(VARIABLE_OPCIONES)
+            if opciones:
+                os.environ[VARIABLE_OPCIONES] = opciones
+            try:
+                out = cv2.VideoWriter(ruta, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*self.fourcc), fps,
+                                      (ancho, alto))
+            finally:
+                if opciones:
+                    if anterior is None:
+                        os.environ.pop(VARIABLE_OPCIONES, None)
+                    else:
+                        os.environ[VARIABLE_OPCIONES] = anterior
+        if not out.isOpened():
+            raise RuntimeError(f"No se pudo crear la salida {self.nombre}.")
+        return out
+
+
+class SalidaFFV1(SalidaAVI):
+    def __init__(self, hilos=None, slices=None):
+        super().__init__("ffv1", "FFV1", "AVI FFV1")
+        self.hilos = hilos
+        self.slices = slices
+
+    def _opciones(self):
+        if not self.hilos and not self.slices:
+            return None
+        # Los hilos de FFV1 reparten slices: al menos uno por hilo
+        slices = self.slices or next((s for s in SLICES_FFV1 if s >= (self.hilos or 1)), SLICES_FFV1[-1])
+        opciones = f"level;3|slices;{slices}"
+        if self.hilos:
+            opciones += f"|threads;{self.hilos}"
+        return opciones
+
+
+class SalidaSecuenciaPNG:
+    """Carpeta con un PNG por cuadro."""
+
+    nombre = "png"
+    descripcion = "secuencia PNG"
+
+    def ruta(self, ruta_pedida):
+        return os.path.splitext(ruta_pedida)[0]
+
+    def preparar(self, ruta):
+        """Crea la carpeta o vacía la secuencia que ya tenía."""
+        os.makedirs(ruta, exist_ok=True)
+        # Una secuencia anterior se reemplaza; cualquier otra carpeta no se toca
+        existentes = os.listdir(ruta)
+        if any(not (n.endswith(".png") and n[:-4].isdigit()) for n in existentes):
+            raise RuntimeError(f"La carpeta {ruta} ya existe y no es una secuencia PNG.")
+        for n in existentes:
+            os.remove(os.path.join(ruta, n))
+
+    def abrir(self, ruta, fps, ancho, alto):
+        self.preparar(ruta)
+        out = cv2.VideoWriter(os.path.join(ruta, PATRON_SECUENCIA), cv2.CAP_IMAGES, 0, fps, (ancho, alto))
+        if not out.isOpened():
+            raise RuntimeError("No se pudo crear la secuencia PNG.")
+        return out
+
+
+SALIDAS = ("ffv1", "huffyuv", "raw", "png")
+
+
+def obtener(nombre="ffv1", hilos=None, slices=None):
+    """Salida por nombre (ver SALIDAS). Si ya es una salida, la devuelve tal cual."""
+    if not isinstance(nombre, str):
+        return nombre
+    if nombre == "ffv1":
+        return SalidaFFV1(hilos, slices)
+    if nombre == "huffyuv":
+        return SalidaAVI("huffyuv", "HFYU", "AVI HuffYUV")
+    if nombre == "raw":
+        return SalidaAVI("raw", "RGBA", "AVI sin compresión")
+    if nombre == "png":
+        return SalidaSecuenciaPNG()
+    raise ValueError(f"Salida de video desconocida: {nombre}")
+
+
+def medir(salida, cuadros, fps=30):
+    """
+    Codifica `cuadros` con `salida` en una carpeta temporal, los lee de
+    vuelta y devuelve {"segundos_cuadro", "bytes_cuadro", "exacto"}.
+    """
+    alto, ancho = cuadros[0].shape[:2]
+    carpeta = tempfile.mkdtemp(prefix="estego_salida_")
+    try:
+        ruta = salida.ruta(os.path.join(carpeta, "muestra.avi"))
+        inicio = time.perf_counter()
+        out = salida.abrir(ruta, fps, ancho, alto)
+        try:
+            for cuadro in cuadros:
+                out.write(cuadro)
+        finally:
+            out.release()
+        segundos = time.perf_counter() - inicio
+
+        if os.path.isdir(ruta):
+            tam = sum(os.path.getsize(os.path.join(ruta, n)) for n in os.listdir(ruta))
+        else:
+            tam = os.path.getsize(ruta)
+
+        cap = abrir_video(ruta)
+        exacto = True
+        try:
+            for cuadro in cuadros:
+                ret, leido = cap.read()
+                if not ret or leido.shape != cuadro.shape or not np.array_equal(leido, cuadro):
+                    exacto = False
+                    break
+        finally:
+            cap.release()
+        return {"segundos_cuadro": segundos / len(cuadros), "bytes_cuadro": tam / len(cuadros), "exacto": exacto}
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def elegir(cuadros, total_cuadros, carpeta_destino, presupuesto=None, candidatas=SALIDAS, fps=30,
+           log_callback=None):
+    """
+    Mide cada salida de `candidatas` con los cuadros de muestra (ya con bits
+    ocultos, para que compriman como la salida real) y devuelve
+    (salida más rápida cuyo tamaño estimado para `total_cuadros` cabe en
+    `presupuesto` bytes, mediciones por nombre). Sin presupuesto se usa el
+    espacio libre de `carpeta_destino`. Se descartan las que no leen de
+    vuelta los cuadros idénticos.
+    """
+    if presupuesto is None:
+        presupuesto = shutil.disk_usage(carpeta_destino or ".").free
+    mediciones = {}
+    elegida = None
+    for nombre in candidatas:
+        salida = obtener(nombre)
+        try:
+            medida = medir(salida, cuadros, fps)
+        except RuntimeError:
+            continue  # Códec no disponible en esta compilación de OpenCV
+        medida["bytes_estimados"] = int(medida["bytes_cuadro"] * total_cuadros * MARGEN_DISCO)
+        mediciones[nombre] = medida
+        if log_callback:
+            log_callback(f"> Salida {nombre}: {medida['segundos_cuadro'] * 1000:.1f} ms/cuadro, "
+                         f"~{medida['bytes_estimados'] / 2 ** 20:.0f} MiB"
+                         f"{'' if medida['exacto'] else ' (no es exacta, descartada)'}\n")
+        if not medida["exacto"] or medida["bytes_estimados"] > presupuesto:
+            continue
+        if elegida is None or medida["segundos_cuadro"] < mediciones[elegida.nombre]["segundos_cuadro"]:
+            elegida = salida
+    if elegida is None:
+        raise ValueError("Ninguna salida sin pérdida cabe en el presupuesto de disco.")
+    return elegida, mediciones
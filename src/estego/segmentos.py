@@ -0,0 +1,107 @@
+"""
+Incrustación de video por segmentos con punto de control, para reanudar.
+
+El video de salida se escribe en `<salida>.partes/`, un segmento de
+`cuadros_por_segmento` cuadros tras otro. Al cerrar cada segmento se
+actualiza `punto_control.json`:
+
+    {"version", "trabajo": {huella de la portada, SHA-256 de la cabecera y el
+     secreto guardado, disposición, salida, cuadros por segmento},
+     "segmentos": [{"archivo", "cuadros", "bits", "tam"}, ...]}
+
+donde `bits` es el total de bits del flujo oculto escritos hasta el final de
+ese segmento. Si el trabajo se interrumpe, al repetirlo con los mismos
+parámetros se conservan los segmentos terminados y solo se rehace el que
+estaba a medias. Al final los segmentos se unen sin recodificar (ver
+estego.avi; la salida png solo renombra los cuadros) y se borra la carpeta.
+"""
+import json
+import os
+import shutil
+
+from .avi import unir_avi
+from .salidas import PATRON_SECUENCIA, SalidaSecuenciaPNG, borrar_salida
+
+VERSION_PUNTO_CONTROL = 1
+SUFIJO_PARTES = ".partes"
+PUNTO_CONTROL = "punto_control.json"
+
+
+def carpeta_partes(ruta_salida):
+    return os.path.normpath(ruta_salida) + SUFIJO_PARTES
+
+
+def ruta_segmento(carpeta, numero, salida):
+    return salida.ruta(os.path.join(carpeta, f"{numero:06d}.avi"))
+
+
+def _tam(ruta):
+    if os.path.isdir(ruta):
+        return sum(os.path.getsize(os.path.join(ruta, n)) for n in os.listdir(ruta))
+    return os.path.getsize(ruta)
+
+
+def cargar(carpeta, trabajo):
+    """
+    Segmentos terminados de un trabajo anterior igual a `trabajo`. Si no hay
+    punto de control o es de otro trabajo, vacía la carpeta y devuelve [].
+    Se descartan desde el primer segmento que falte o cambió de tamaño.
+    """
+    try:
+        with open(os.path.join(carpeta, PUNTO_CONTROL), encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        datos = None
+    if not datos or datos.get("version") != VERSION_PUNTO_CONTROL or datos.get("trabajo") != trabajo:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        os.makedirs(carpeta, exist_ok=True)
+        return []
+
+    segmentos = []
+    for segmento in datos.get("segmentos", []):
+        ruta = os.path.join(carpeta, segmento["archivo"])
+        if not os.path.exists(ruta) or _tam(ruta) != segmento["tam"]:
+            break
+        segmentos.append(segmento)
+    # Restos del segmento que estaba a medias o de los descartados
+    validos = {s["archivo"] for s in segmentos} | {PUNTO_CONTROL}
+    for nombre in os.listdir(carpeta):
+        if nombre not in validos:
+            borrar_salida(os.path.join(carpeta, nombre))
+    return segmentos
+
+
+def guardar(carpeta, trabajo, segmentos):
+    """Escribe el punto de control de forma atómica (temporal + os.replace)."""
+    ruta = os.path.join(carpeta, PUNTO_CONTROL)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION_PUNTO_CONTROL, "trabajo": trabajo, "segmentos": segmentos}, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def nuevo_segmento(ruta, cuadros, bits):
+    return {"archivo": os.path.basename(ruta), "cuadros": cuadros, "bits": bits, "tam": _tam(ruta)}
+
+
+def unir(salida, carpeta, segmentos, destino):
+    """Une los segmentos en `destino` y borra `carpeta`."""
+    rutas = [os.path.join(carpeta, s["archivo"]) for s in segmentos]
+    if isinstance(salida, SalidaSecuenciaPNG):
+        salida.preparar(destino)
+        numero = 0
+        for ruta in rutas:
+            for nombre in sorted(os.listdir(ruta)):
+                os.replace(os.path.join(ruta, nombre), os.path.join(destino, PATRON_SECUENCIA % numero))
+                numero += 1
+    else:
+        temporal = destino + ".tmp"
+        try:
+            unir_avi(rutas, temporal)
+            os.replace(temporal, destino)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+    shutil.rmtree(carpeta, ignore_errors=True)
@@ -0,0 +1,374 @@
+"""
+Servicio local de ocultar/extraer sobre asyncio (python -m estego serve).
+
+Escucha solo en localhost (TCP en 127.0.0.1/::1 o un socket Unix) con un
+HTTP/1.1 mínimo: una petición por conexión y cuerpo con Content-Length.
+
+    POST /embed?carrier=image|video&cover_size=N&name=secreto.txt
+        Cuerpo: la portada (N bytes) seguida del secreto. Responde la imagen,
+        o el video AVI, con el secreto. Opciones con las claves de los
+        trabajos de estego.cli: compress, image_format, preset, png_level,
+        png_filter, png_strategy, bits, channels y codec.
+    POST /extract?carrier=image|video
+        Cuerpo: la imagen o el video. Responde el contenido recuperado, con
+        su nombre (codificado como en una URL) en la cabecera X-Estego-Name;
+        la imagen solo guarda la extensión, así que ahí es secreto<ext>.
+    GET /metrics
+        Peticiones en cola y en curso, rechazadas, y un histograma de
+        latencia por endpoint (ver estego.metricas.Histograma).
+    GET /health
+
+El trabajo pesado corre en un ProcessPoolExecutor de `procesos` procesos.
+Se admiten a la vez hasta `procesos` peticiones en curso y `cola` en espera;
+las demás reciben 503 con Retry-After antes de leer su cuerpo, así un pico
+de clientes no llena la memoria. Los cuerpos se leen por bloques: hasta
+TAM_EN_MEMORIA bytes van en memoria a los procesos (embed_data,
+extract_data, extraer_datos_de_video) y los mayores, o las portadas de
+video, pasan por un archivo temporal, porque OpenCV solo escribe video en
+archivos.
+
+No hay un endpoint de trabajos con rutas locales: cualquier proceso del
+equipo puede conectarse, así que el servicio solo ve los bytes que recibe y
+solo escribe en sus carpetas temporales.
+"""
+import asyncio
+import http
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qsl, quote, urlsplit
+
+from .memoria import NOMBRE_SECRETO, TAM_EN_MEMORIA
+from .metricas import Histograma
+
+HOSTS_LOCALES = ("127.0.0.1", "::1", "localhost")
+PUERTO = 8750
+TAM_BLOQUE = 1024 * 1024
+MAX_CUERPO = 2 * 1024 * 1024 * 1024
+# Segundos de espera por cada bloque del cliente antes de cortar la conexión
+TIEMPO_LECTURA = 30
+# Tras responder un error, segundos de espera por el resto del cuerpo que se descarta
+TIEMPO_DESCARTE = 1
+PORTADORES = ("image", "video")
+ENDPOINTS = {"/embed": "POST", "/extract": "POST", "/metrics": "GET", "/health": "GET"}
+# Opciones de /embed con valor entero
+OPCIONES_ENTERAS = ("bits", "png_level")
+
+
+class _ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _ocultar(portador, portada, secreto, nombre, opciones, carpeta):
+    """En un proceso del pool. Devuelve ("datos", bytes) o ("ruta", archivo en `carpeta`)."""
+    if portador == "image":
+        from .imagen import embed_data
+
+        return "datos", embed_data(portada, secreto, nombre, output_format=opciones.get("image_format") or "png",
+                                   compression=opciones.get("compress", "none"),
+                                   preset=opciones.get("preset") or "default",
+                                   compress_level=opciones.get("png_level"),
+                                   png_filter=opciones.get("png_filter"),
+                                   png_strategy=opciones.get("png_strategy"))
+    from .salidas import obtener
+    from .video import ocultar_archivo_en_video
+
+    codec = opciones.get("codec") or "ffv1"
+    if codec not in ("ffv1", "huffyuv", "raw"):
+        raise ValueError(f"Códec no admitido por el servicio: {codec}")
+    ruta = ocultar_archivo_en_video(portada, secreto, os.path.join(carpeta, "salida.avi"),
+                                    bits_por_canal=opciones.get("bits", 1), canales=opciones.get("channels", "B"),
+                                    compresion=opciones.get("compress", "none"), salida=obtener(codec),
+                                    nombre_secreto=nombre)
+    return "ruta", ruta
+
+
+def _extraer(portador, estego):
+    """En un proceso del pool. Devuelve (nombre, contenido)."""
+    if portador == "image":
+        from .imagen import extract_data
+
+        ext, datos = extract_data(estego)
+        return "secreto" + ext, bytes(datos)
+    from .video import extraer_datos_de_video
+
+    nombre, datos = extraer_datos_de_video(estego)
+    return nombre, bytes(datos)
+
+
+class Servicio:
+    """Estado del servicio: pool de procesos, admisión y métricas."""
+
+    def __init__(self, procesos=None, cola=None, max_cuerpo=MAX_CUERPO, carpeta=None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.cola = 2 * self.procesos if cola is None else cola
+        self.max_cuerpo = max_cuerpo
+        self.carpeta = carpeta
+        self.admitidas = 0  # en cola + en curso
+        self.en_curso = 0
+        self.rechazadas = 0
+        self.latencias = {}
+        self._inicio = time.monotonic()
+        self._pool = ProcessPoolExecutor(self.procesos)
+        self._libres = asyncio.Semaphore(self.procesos)
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def metricas(self):
+        return {
+            "segundos": round(time.monotonic() - self._inicio, 3),
+            "procesos": self.procesos,
+            "cola_max": self.cola,
+            "cola": self.admitidas - self.en_curso,
+            "en_curso": self.en_curso,
+            "rechazadas": self.rechazadas,
+            "latencia": {endpoint: h.resumen() for endpoint, h in sorted(self.latencias.items())},
+        }
+
+    async def _ejecutar(self, funcion, *args):
+        """Ejecuta `funcion` en el pool cuando hay un proceso libre."""
+        async with self._libres:
+            self.en_curso += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._pool, funcion, *args)
+            except ValueError as e:
+                raise _ErrorHTTP(400, str(e))
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. sin memoria): las siguientes peticiones usan un pool nuevo
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = ProcessPoolExecutor(self.procesos)
+                raise _ErrorHTTP(500, "El proceso de trabajo terminó inesperadamente.")
+            finally:
+                self.en_curso -= 1
+
+    async def atender(self, reader, writer):
+        inicio = time.perf_counter()
+        endpoint = "otros"
+        try:
+            try:
+                metodo, ruta, parametros, cabeceras = await _leer_peticion(reader)
+                if ruta in ENDPOINTS:
+                    endpoint = ruta
+                await self._despachar(metodo, ruta, parametros, cabeceras, reader, writer)
+            except _ErrorHTTP as e:
+                await self._responder_error(reader, writer, e.estado, str(e), endpoint, inicio)
+            except (ConnectionError, asyncio.TimeoutError):
+                raise
+            except Exception as e:
+                await self._responder_error(reader, writer, 500, str(e), endpoint, inicio)
+            else:
+                self._observar(endpoint, inicio)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass  # El cliente se fue o dejó de enviar: no hay a quién responder
+        finally:
+            writer.close()
+
+    def _observar(self, endpoint, inicio):
+        self.latencias.setdefault(endpoint, Histograma()).observar(time.perf_counter() - inicio)
+
+    async def _responder_error(self, reader, writer, estado, mensaje, endpoint, inicio):
+        await _responder_json(writer, estado, {"error": mensaje})
+        self._observar(endpoint, inicio)
+        # El cliente puede seguir enviando el cuerpo (si no usó Expect: 100-continue); se descarta
+        # sin guardarlo para que lea la respuesta en lugar de encontrarse la conexión cerrada
+        while await asyncio.wait_for(reader.read(TAM_BLOQUE), TIEMPO_DESCARTE):
+            pass
+
+    async def _despachar(self, metodo, ruta, parametros, cabeceras, reader, writer):
+        if ruta not in ENDPOINTS:
+            raise _ErrorHTTP(404, f"Ruta desconocida: {ruta}")
+        if metodo != ENDPOINTS[ruta]:
+            raise _ErrorHTTP(405, f"{ruta} solo admite {ENDPOINTS[ruta]}.")
+        if ruta == "/health":
+            return await _responder_json(writer, 200, {"ok": True})
+        if ruta == "/metrics":
+            return await _responder_json(writer, 200, self.metricas())
+
+        # Admisión antes de leer el cuerpo: con la cola llena se rechaza sin más
+        if self.admitidas >= self.procesos + self.cola:
+            self.rechazadas += 1
+            raise _ErrorHTTP(503, "Servicio ocupado: la cola está llena.")
+        self.admitidas += 1
+        try:
+            largo = _largo_cuerpo(cabeceras, self.max_cuerpo)
+            if cabeceras.get("expect", "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            if ruta == "/embed":
+                await self._embed(reader, writer, largo, parametros)
+            else:
+                await self._extract(reader, writer, largo, parametros)
+        finally:
+            self.admitidas -= 1
+
+    async def _embed(self, reader, writer, largo, parametros):
+        portador = _portador(parametros)
+        try:
+            tam_portada = int(parametros["cover_size"])
+            opciones = {clave: int(valor) if clave in OPCIONES_ENTERAS else valor
+                        for clave, valor in parametros.items()}
+        except KeyError:
+            raise _ErrorHTTP(400, "Falta el parámetro cover_size.")
+        except ValueError:
+            raise _ErrorHTTP(400, "Parámetro numérico no válido.")
+        if not 0 < tam_portada < largo:
+            raise _ErrorHTTP(400, "cover_size debe estar entre 1 y el tamaño del cuerpo menos 1.")
+
+        carpeta = tempfile.mkdtemp(prefix="estego-", dir=self.carpeta)
+        try:
+            portada = await _leer_parte(reader, tam_portada, carpeta, "portada", a_disco=portador == "video")
+            secreto = await _leer_parte(reader, largo - tam_portada, carpeta, "secreto")
+            tipo, resultado = await self._ejecutar(_ocultar, portador, portada, secreto,
+                                                   parametros.get("name") or NOMBRE_SECRETO, opciones, carpeta)
+            if tipo == "datos":
+                await _responder(writer, 200, resultado)
+            else:
+                await _responder_archivo(writer, resultado)
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    async def _extract(self, reader, writer, largo, parametros):
+        portador = _portador(parametros)
+        carpeta = tempfile.mkdtemp(prefix="estego-", dir=self.carpeta)
+        try:
+            estego = await _leer_parte(reader, largo, carpeta, "estego")
+            nombre, datos = await self._ejecutar(_extraer, portador, estego)
+            await _responder(writer, 200, datos, cabeceras=[("X-Estego-Name", quote(nombre))])
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def _portador(parametros):
+    portador = parametros.get("carrier", "image")
+    if portador not in PORTADORES:
+        raise _ErrorHTTP(400, f"Portador desconocido: {portador} (image o video).")
+    return portador
+
+
+async def _leer_peticion(reader):
+    """Lee la línea de petición y las cabeceras. Devuelve (método, ruta, parámetros, cabeceras)."""
+    linea = await asyncio.wait_for(reader.readline(), TIEMPO_LECTURA)
+    if not linea:
+        raise ConnectionError()
+    try:
+        metodo, destino, _ = linea.decode("latin-1").split()
+    except ValueError:
+        raise _ErrorHTTP(400, "Petición HTTP mal formada.")
+    cabeceras = {}
+    while True:
+        linea = await asyncio.wait_for(reader.readline(), TIEMPO_LECTURA)
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    url = urlsplit(destino)
+    return metodo.upper(), url.path, dict(parse_qsl(url.query)), cabeceras
+
+
+def _largo_cuerpo(cabeceras, maximo):
+    if "transfer-encoding" in cabeceras:
+        raise _ErrorHTTP(411, "Se requiere Content-Length (sin transfer-encoding).")
+    try:
+        largo = int(cabeceras["content-length"])
+    except (KeyError, ValueError):
+        raise _ErrorHTTP(411, "Se requiere Content-Length.")
+    if largo > maximo:
+        raise _ErrorHTTP(413, f"El cuerpo supera el máximo de {maximo} bytes.")
+    return largo
+
+
+async def _leer_parte(reader, n, carpeta=None, nombre=None, a_disco=False):
+    """
+    Lee los siguientes `n` bytes del cuerpo por bloques. Devuelve bytes o,
+    con `a_disco` o si superan TAM_EN_MEMORIA, la ruta de un archivo `nombre` en `carpeta`.
+    """
+    en_memoria = carpeta is None or (not a_disco and n <= TAM_EN_MEMORIA)
+    ruta = None if en_memoria else os.path.join(carpeta, nombre)
+    with io.BytesIO() if en_memoria else open(ruta, "wb") as destino:
+        while n:
+            bloque = await asyncio.wait_for(reader.read(min(n, TAM_BLOQUE)), TIEMPO_LECTURA)
+            if not bloque:
+                raise _ErrorHTTP(400, "Cuerpo incompleto.")
+            destino.write(bloque)
+            n -= len(bloque)
+        return destino.getvalue() if en_memoria else ruta
+
+
+def _cabecera_respuesta(estado, largo, tipo, cabeceras=()):
+    lineas = [f"HTTP/1.1 {estado} {http.HTTPStatus(estado).phrase}", f"Content-Type: {tipo}",
+              f"Content-Length: {largo}", "Connection: close"]
+    lineas += [f"{nombre}: {valor}" for nombre, valor in cabeceras]
+    return ("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1")
+
+
+async def _responder(writer, estado, cuerpo, tipo="application/octet-stream", cabeceras=()):
+    writer.write(_cabecera_respuesta(estado, len(cuerpo), tipo, cabeceras))
+    writer.write(cuerpo)
+    await writer.drain()
+
+
+async def _responder_json(writer, estado, datos):
+    cabeceras = [("Retry-After", "1")] if estado == 503 else []
+    await _responder(writer, estado, json.dumps(datos, ensure_ascii=False).encode("utf-8"),
+                     "application/json; charset=utf-8", cabeceras)
+
+
+async def _responder_archivo(writer, ruta):
+    """Envía el archivo por bloques, esperando al cliente entre uno y otro."""
+    writer.write(_cabecera_respuesta(200, os.path.getsize(ruta), "application/octet-stream"))
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAM_BLOQUE), b""):
+            writer.write(bloque)
+            await writer.drain()
+
+
+async def servir(host="127.0.0.1", puerto=PUERTO, unix=None, procesos=None, cola=None, max_cuerpo=MAX_CUERPO,
+                 al_iniciar=None):
+    """
+    Atiende hasta que se cancela. Con `unix` escucha en ese socket en lugar
+    de TCP. `al_iniciar` recibe la dirección real (útil con `puerto` 0).
+    """
+    if unix is None and host not in HOSTS_LOCALES:
+        raise ValueError(f"El servicio solo escucha en localhost, no en {host}.")
+    servicio = Servicio(procesos, cola, max_cuerpo)
+    try:
+        if unix is not None:
+            servidor = await asyncio.start_unix_server(servicio.atender, unix)
+            direccion = unix
+        else:
+            servidor = await asyncio.start_server(servicio.atender, host, puerto)
+            direccion = "http://%s:%d" % servidor.sockets[0].getsockname()[:2]
+        if al_iniciar is not None:
+            al_iniciar(direccion)
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        servicio.cerrar()
+        if unix is not None and os.path.exists(unix):
+            os.remove(unix)
+
+
+def main(args):
+    """Subcomando `serve` de estego.cli."""
+    def al_iniciar(direccion):
+        print(f"Escuchando en {direccion} ({args.jobs or os.cpu_count() or 1} procesos, "
+              f"Ctrl+C para terminar)", file=sys.stderr)
+
+    try:
+        asyncio.run(servir(args.host, PUERTO if args.port is None else args.port, args.unix, args.jobs, args.queue,
+                           int(args.max_body * 1024 * 1024), al_iniciar))
+    except KeyboardInterrupt:
+        pass
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
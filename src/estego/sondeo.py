@@ -0,0 +1,106 @@
+"""
+Sondeo de videos con caché.
+
+CAP_PROP_FRAME_COUNT es una estimación en muchos contenedores: la capacidad
+puede parecer suficiente y el trabajo fallar al final, tras recodificar todo.
+`sondear_video(ruta, exacto=True)` cuenta los paquetes sin decodificarlos y
+guarda el resultado por (ruta, tamaño, mtime), así que abrir el mismo video
+varias veces (capacidad, ocultar, extraer) no repite el trabajo.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import cv2
+
+from .salidas import abrir_video
+
+InfoVideo = namedtuple("InfoVideo", "cuadros ancho alto fps formato_pixel fourcc exacto")
+
+MAX_ENTRADAS_CACHE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _codigo_a_texto(codigo):
+    codigo = int(codigo)
+    if codigo <= 0:
+        return ""
+    return "".join(chr((codigo >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+
+
+def _clave(ruta):
+    ruta = os.path.abspath(ruta)
+    st = os.stat(ruta)
+    return ruta, st.st_size, st.st_mtime_ns
+
+
+def _contar_cuadros(ruta):
+    """
+    Cuenta exacta de cuadros. En modo crudo (CAP_PROP_FORMAT = -1) grab()
+    entrega los paquetes comprimidos sin decodificarlos; si el backend no lo
+    admite se cuenta con grab() normal, que sí decodifica.
+    """
+    cap = abrir_video(ruta)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video.")
+    try:
+        cap.set(cv2.CAP_PROP_FORMAT, -1)
+        cuadros = 0
+        while cap.grab():
+            cuadros += 1
+        return cuadros
+    finally:
+        cap.release()
+
+
+def sondear_video(ruta, exacto=False):
+    """
+    Devuelve un InfoVideo (cuadros, ancho, alto, fps, formato_pixel, fourcc,
+    exacto). Con `exacto` el número de cuadros se cuenta en lugar de tomar
+    la estimación del contenedor.
+    """
+    try:
+        clave = _clave(ruta)
+    except OSError:
+        raise ValueError("No se pudo abrir el video.")
+
+    with _cache_lock:
+        info = _cache.get(clave)
+        if info is not None:
+            _cache.move_to_end(clave)
+    if info is not None and (info.exacto or not exacto):
+        return info
+
+    if info is None:
+        cap = abrir_video(ruta)
+        if not cap.isOpened():
+            raise ValueError("No se pudo abrir el video.")
+        try:
+            info = InfoVideo(
+                cuadros=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                ancho=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                alto=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                fps=cap.get(cv2.CAP_PROP_FPS),
+                formato_pixel=_codigo_a_texto(cap.get(cv2.CAP_PROP_CODEC_PIXEL_FORMAT)),
+                fourcc=_codigo_a_texto(cap.get(cv2.CAP_PROP_FOURCC)).upper(),
+                exacto=False,
+            )
+        finally:
+            cap.release()
+
+    if exacto:
+        info = info._replace(cuadros=_contar_cuadros(ruta), exacto=True)
+
+    with _cache_lock:
+        _cache[clave] = info
+        _cache.move_to_end(clave)
+        while len(_cache) > MAX_ENTRADAS_CACHE:
+            _cache.popitem(last=False)
+    return info
+
+
+def limpiar_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,1290 @@
+"""Lógica de esteganografía LSB en video (sin interfaz gráfica)."""
+import hashlib
+import io
+import math
+import os
+import queue
+import struct
+import threading
+import zlib
+from collections import namedtuple
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from .archivo import EXTENSION, buscar, desempaquetar_recuperado, extraer_entrada, leer_tabla, preparar_carga
+from .compresion import METODOS, NOMBRES, SalidaDescomprimida
+from .flujo import FuenteBits
+from . import lsb, segmentos
+from .indice import (ArchivoConHash, coincide, escribir_indice, huella_video, leer_indice, sha256_abierto,
+                     sha256_archivo)
+from .memoria import abrir_datos, es_ruta
+from .metricas import SIN_METRICAS, como_metricas, perfilado, perfilar
+from .progreso import Progreso
+from .salidas import abrir_video, borrar_salida, elegir, obtener
+from .sondeo import sondear_video
+
+
+# Prefijo de disposición: siempre en 1 bit del canal B de los primeros píxeles
+# del cuadro 0. [4 bytes: "VSTG"] [1 byte: versión] [1 byte: disposición]
+# Después, con la disposición elegida:
+#   v1: [len_nombre][nombre][4 bytes: len_datos][datos]
+#   v2: [len_nombre][nombre][4 bytes: len_datos][1 byte: compresión][8 bytes: tamaño original][datos]
+#   v3: como v2 y, antes de los datos, [4 bytes: CRC32 del prefijo y la cabecera]
+MAGIA = b"VSTG"
+VERSION_FORMATO = 3
+TAM_PREFIJO = len(MAGIA) + 2
+PIXELES_PREFIJO = TAM_PREFIJO * 8
+
+# Orden de canales de OpenCV
+CANALES = "BGR"
+
+
+def _indices_canales(canales):
+    canales = canales.upper()
+    if not canales or any(c not in CANALES for c in canales):
+        raise ValueError("Los canales deben ser una combinación de B, G y R.")
+    return [i for i, c in enumerate(CANALES) if c in canales]
+
+
+def _validar_disposicion(bits_por_canal, canales):
+    if not 1 <= bits_por_canal <= 4:
+        raise ValueError("Los bits por canal deben estar entre 1 y 4.")
+    return _indices_canales(canales)
+
+
+def _codificar_disposicion(bits_por_canal, indices):
+    """Byte de disposición: bits 0-2 máscara de canales (B=1, G=2, R=4), bits 4-5 k-1."""
+    mascara = sum(1 << i for i in indices)
+    return ((bits_por_canal - 1) << 4) | mascara
+
+
+def _decodificar_disposicion(byte):
+    mascara = byte & 0x07
+    bits_por_canal = ((byte >> 4) & 0x03) + 1
+    if not mascara or byte & 0xC8:
+        raise ValueError("Disposición de bits inválida en la cabecera.")
+    return bits_por_canal, [i for i in range(3) if mascara & (1 << i)]
+
+
+def calcular_capacidad_video(ruta_video, bits_por_canal=1, canales="B", exacto=False):
+    """
+    Bytes disponibles para el flujo con la disposición dada. Con `exacto` se
+    cuentan los cuadros reales en lugar de usar la estimación del contenedor.
+    """
+    indices = _validar_disposicion(bits_por_canal, canales)
+
+    try:
+        info = sondear_video(ruta_video, exacto)
+    except ValueError:
+        raise ValueError("No se pudo abrir el video de portada.")
+
+    return _capacidad(info, bits_por_canal, indices)
+
+
+def _capacidad(info, bits_por_canal, indices):
+    # k bits en cada canal elegido, descontando los píxeles del prefijo
+    pixeles = max(info.cuadros * info.ancho * info.alto - PIXELES_PREFIJO, 0)
+    bits_totales = pixeles * len(indices) * bits_por_canal
+    bytes_totales = bits_totales // 8
+    return bytes_totales
+
+
+def _muestras(frame, indices, pixel_inicial, num_pixeles):
+    """Vista (o copia, si los canales no son contiguos) de las muestras a usar."""
+    pixeles = frame.reshape(-1, 3)[pixel_inicial:pixel_inicial + num_pixeles]
+    if len(indices) == 1:
+        return pixeles[:, indices[0]], True
+    if len(indices) == 3:
+        return pixeles.reshape(-1), True
+    return pixeles[:, indices].reshape(-1), False
+
+
+def _escribir_bits(frame, bits, bits_por_canal, indices, pixel_inicial=0):
+    """
+    Escribe `bits` en los k LSB de los canales elegidos, píxel por píxel y
+    en orden B, G, R dentro de cada píxel. Devuelve cuántos bits cupieron.
+    """
+    k = bits_por_canal
+    pixeles_libres = frame.shape[0] * frame.shape[1] - pixel_inicial
+    capacidad = pixeles_libres * len(indices) * k
+    n = min(capacidad, bits.size)
+    if n <= 0:
+        return 0
+
+    num_muestras = -(-n // k)
+    num_pixeles = -(-num_muestras // len(indices))
+    muestras, es_vista = _muestras(frame, indices, pixel_inicial, num_pixeles)
+    lsb.escribir(muestras, bits[:n], k)
+
+    if not es_vista:
+        pixeles = frame.reshape(-1, 3)[pixel_inicial:pixel_inicial + num_pixeles]
+        pixeles[:, indices] = muestras.reshape(num_pixeles, len(indices))
+    return n
+
+
+def _leer_bits(frame, bits_por_canal, indices, pixel_inicial=0):
+    """Inverso de _escribir_bits: devuelve los bits (0/1) de todo el cuadro."""
+    num_pixeles = frame.shape[0] * frame.shape[1] - pixel_inicial
+    muestras, _ = _muestras(frame, indices, pixel_inicial, num_pixeles)
+    return lsb.leer(muestras, bits_por_canal)
+
+
+def _cabecera_archivo(ruta_archivo, len_datos=None, codigo_compresion=None, tam_original=0):
+    """
+    Devuelve ([len_nombre][nombre][len_datos], len_datos) sin leer el contenido.
+    Con `codigo_compresion` (formato v2) se añade [método][tamaño original].
+    """
+    nombre = os.path.basename(ruta_archivo).encode("utf-8")
+    if len(nombre) > 255:
+        nombre = nombre[:255]
+    len_nombre = len(nombre)
+    if len_datos is None:
+        len_datos = os.path.getsize(ruta_archivo)
+    if len_datos > 0xFFFFFFFF:
+        raise ValueError("El archivo secreto supera el máximo de 4 GiB del formato.")
+
+    cabecera = bytes([len_nombre]) + nombre + struct.pack("<I", len_datos)
+    if codigo_compresion is not None:
+        cabecera += struct.pack("<BQ", codigo_compresion, tam_original)
+    return cabecera, len_datos
+
+
+def archivo_a_bits(ruta_archivo):
+    """
+    Empaqueta:
+    [1 byte: len_nombre] [nombre utf-8] [4 bytes: len_datos] [datos]
+    y devuelve un arreglo de bits (0/1).
+    """
+    cabecera, _ = _cabecera_archivo(ruta_archivo)
+    with open(ruta_archivo, "rb") as f:
+        datos = f.read()
+
+    payload = cabecera + datos
+
+    arr = np.frombuffer(payload, dtype=np.uint8)
+    bits = np.unpackbits(arr)
+    return bits
+
+
+def _nombre_seguro(nombre_bytes):
+    try:
+        nombre_archivo = nombre_bytes.decode("utf-8", errors="ignore")
+    except UnicodeDecodeError:
+        nombre_archivo = "archivo_recuperado.bin"
+    
+    if not nombre_archivo or not nombre_archivo.strip():
+        nombre_archivo = "recuperado_sin_nombre.bin"
+    
+    return "".join([c for c in nombre_archivo if c.isalnum() or c in "._- "])
+
+
+def _guardar_archivo(nombre_archivo, contenido, carpeta_salida):
+    if not os.path.isdir(carpeta_salida):
+        os.makedirs(carpeta_salida, exist_ok=True)
+
+    ruta_salida = os.path.join(carpeta_salida, nombre_archivo)
+    with open(ruta_salida, "wb") as f:
+        f.write(contenido)
+
+    return ruta_salida
+
+
+def bits_a_archivo(bits, carpeta_salida):
+    """
+    Reconstruye el archivo a partir de los bits extraídos del video.
+    """
+    bits = np.array(bits, dtype=np.uint8)
+    if bits.size == 0:
+        raise ValueError("No se encontraron datos en el video.")
+
+    # A múltiplo de 8
+    if bits.size % 8 != 0:
+        padding = 8 - (bits.size % 8)
+        bits = np.concatenate([bits, np.zeros(padding, dtype=np.uint8)])
+
+    data = np.packbits(bits).tobytes()
+
+    if len(data) < 1:
+        raise ValueError("Datos insuficientes para leer el nombre del archivo.")
+
+    len_nombre = data[0]
+    indice = 1
+
+    if len(data) < 1 + len_nombre + 4:
+        raise ValueError("Cabecera incompleta o corrupta.")
+
+    nombre_archivo = _nombre_seguro(data[indice:indice + len_nombre])
+    indice += len_nombre
+
+    len_datos = struct.unpack("<I", data[indice:indice + 4])[0]
+    indice += 4
+
+    if len(data) < indice + len_datos:
+        raise ValueError("Contenido incompleto o corrupto.")
+
+    contenido = data[indice:indice + len_datos]
+    ruta_salida = _guardar_archivo(nombre_archivo, contenido, carpeta_salida)
+    return ruta_salida, len_datos
+
+
+class _LectorLSB:
+    """
+    Lee bytes del plano LSB cuadro a cuadro con la disposición indicada.
+    Solo decodifica los cuadros necesarios para entregar los bytes pedidos.
+    """
+
+    def __init__(self, cap, bits_por_canal=1, indices=(0,), primer_cuadro=None, pixel_inicial=0,
+                 metricas=SIN_METRICAS, bits_saltados=0):
+        self.cap = cap
+        self.metricas = metricas
+        self.bits_por_canal = bits_por_canal
+        self.indices = list(indices)
+        self.cuadros_leidos = 0
+        self._frame = None
+        self._primer_cuadro = primer_cuadro
+        self._pixel_inicial = pixel_inicial
+        self._bits_saltados = bits_saltados  # bits del primer cuadro anteriores a lo pedido
+        self._resto = np.empty(0, dtype=np.uint8)  # bits (< 8) que sobraron del cuadro anterior
+        self._pendiente = np.empty(0, dtype=np.uint8)  # bytes empaquetados aún sin entregar
+        self._pos = 0
+
+    def _siguiente_cuadro(self):
+        if self._primer_cuadro is not None:
+            frame, self._primer_cuadro = self._primer_cuadro, None
+            pixel_inicial = self._pixel_inicial
+        else:
+            with self.metricas.etapa("decodificacion"):
+                ret, self._frame = self.cap.read(self._frame)
+            if not ret:
+                return False
+            self.cuadros_leidos += 1
+            frame, pixel_inicial = self._frame, 0
+
+        with self.metricas.etapa("lsb"):
+            bits = _leer_bits(frame, self.bits_por_canal, self.indices, pixel_inicial)
+            if self._bits_saltados:
+                bits, self._bits_saltados = bits[self._bits_saltados:], 0
+            if self._resto.size:
+                bits = np.concatenate([self._resto, bits])
+            completos = bits.size - bits.size % 8
+            self._resto = bits[completos:].copy()
+            self._pendiente = np.packbits(bits[:completos])
+        self._pos = 0
+        self.metricas.sumar("cuadros")
+        self.metricas.sumar("bits", bits.size)
+        self.metricas.publicar()
+        return True
+
+    def leer_en(self, destino):
+        """Llena el buffer `destino` y devuelve cuántos bytes se pudieron leer."""
+        destino = memoryview(destino).cast("B")
+        escritos = 0
+        while escritos < len(destino):
+            disponibles = self._pendiente.size - self._pos
+            if disponibles == 0:
+                if not self._siguiente_cuadro():
+                    break
+                continue
+            n = min(disponibles, len(destino) - escritos)
+            destino[escritos:escritos + n] = self._pendiente[self._pos:self._pos + n]
+            self._pos += n
+            escritos += n
+        return escritos
+
+    def leer(self, n):
+        buffer = bytearray(n)
+        leidos = self.leer_en(buffer)
+        return bytes(buffer[:leidos])
+
+    def saltar(self, n):
+        """Descarta `n` bytes del flujo; devuelve cuántos se pudieron saltar."""
+        saltados = 0
+        while saltados < n:
+            disponibles = self._pendiente.size - self._pos
+            if disponibles == 0:
+                if not self._siguiente_cuadro():
+                    break
+                continue
+            m = min(disponibles, n - saltados)
+            self._pos += m
+            saltados += m
+        return saltados
+
+
+def _leer_prefijo(frame):
+    """
+    Devuelve (version, bits_por_canal, indices, pixel_inicial) según el prefijo
+    del cuadro 0. Los videos sin prefijo (versión 0) usan el formato original:
+    1 bit en B.
+    """
+    if frame.shape[0] * frame.shape[1] >= PIXELES_PREFIJO:
+        prefijo = np.packbits(_leer_bits(frame, 1, [0])[:PIXELES_PREFIJO]).tobytes()
+        if prefijo[:len(MAGIA)] == MAGIA:
+            version = prefijo[len(MAGIA)]
+            if version > VERSION_FORMATO:
+                raise ValueError(f"Versión de formato no soportada: {version}")
+            bits_por_canal, indices = _decodificar_disposicion(prefijo[len(MAGIA) + 1])
+            return version, bits_por_canal, indices, PIXELES_PREFIJO
+    return 0, 1, [0], 0
+
+
+def _prefijo(bits_por_canal, indices, version=VERSION_FORMATO):
+    return MAGIA + bytes([version, _codificar_disposicion(bits_por_canal, indices)])
+
+
+def _con_crc(cabecera, bits_por_canal, indices):
+    """Añade a la cabecera (formato v3) el CRC32 del prefijo y la cabecera."""
+    crc = zlib.crc32(_prefijo(bits_por_canal, indices) + cabecera)
+    return cabecera + struct.pack("<I", crc)
+
+
+CabeceraVideo = namedtuple("CabeceraVideo", "nombre len_datos codigo_compresion tam_original tam_cabecera")
+
+
+def _leer_cabecera(lector, version, bits_por_canal, indices):
+    """
+    Lee la cabecera del flujo con `lector` (justo después del prefijo) y la
+    valida. Devuelve un CabeceraVideo; lanza ValueError si está incompleta o
+    el CRC (v3) no coincide.
+    """
+    cabecera = lector.leer(1)
+    if not cabecera:
+        raise ValueError("No se encontraron datos en el video.")
+    len_nombre = cabecera[0]
+
+    resto = lector.leer(len_nombre + 4)
+    if len(resto) < len_nombre + 4:
+        raise ValueError("Cabecera incompleta o corrupta.")
+    cabecera += resto
+    len_datos = struct.unpack("<I", resto[len_nombre:])[0]
+
+    codigo_compresion, tam_original = 0, len_datos
+    if version >= 2:
+        extra = lector.leer(9)
+        if len(extra) < 9:
+            raise ValueError("Cabecera incompleta o corrupta.")
+        cabecera += extra
+        codigo_compresion, tam_original = struct.unpack("<BQ", extra)
+
+    tam_cabecera = len(cabecera)
+    if version >= 3:
+        crc = lector.leer(4)
+        tam_cabecera += 4
+        if len(crc) < 4 or struct.unpack("<I", crc)[0] != zlib.crc32(_prefijo(bits_por_canal, indices, version)
+                                                                     + cabecera):
+            raise ValueError("Cabecera corrupta: el CRC no coincide.")
+
+    return CabeceraVideo(_nombre_seguro(resto[:len_nombre]), len_datos, codigo_compresion, tam_original,
+                         tam_cabecera)
+
+
+def _drenar(cola):
+    """Consume `cola` hasta el centinela None para desbloquear a quien produce."""
+    while cola.get() is not None:
+        pass
+
+
+def _procesar_en_tuberia(cap, out, procesar_cuadro, profundidad_cola=4, metricas=SIN_METRICAS):
+    """
+    Decodifica, procesa y codifica cuadros en tres etapas concurrentes:
+    un hilo lector (cap.read), la etapa de procesamiento en el hilo actual y
+    un hilo escritor (out.write), unidas por colas acotadas. cv2 libera el GIL
+    al decodificar y codificar, así que el tiempo total se acerca al de la
+    etapa más lenta. Los buffers de cuadro se reciclan entre etapas.
+
+    `procesar_cuadro(frame, indice)` modifica el cuadro en su lugar.
+    `metricas` recibe el tiempo de decodificación y codificación y la
+    profundidad de las colas. Devuelve el número de cuadros procesados.
+    """
+    profundidad_cola = max(1, int(profundidad_cola))
+    decodificados = queue.Queue(maxsize=profundidad_cola)
+    por_codificar = queue.Queue(maxsize=profundidad_cola)
+    # Cuadros en vuelo: ambas colas llenas + uno por etapa
+    libres = queue.Queue()
+    for _ in range(2 * profundidad_cola + 3):
+        libres.put(None)  # cap.read reserva el buffer la primera vez y luego lo reutiliza
+
+    detener = threading.Event()
+    errores = []
+
+    def lector():
+        try:
+            with perfilado("estego-lector"):
+                while not detener.is_set():
+                    frame = libres.get()
+                    with metricas.etapa("decodificacion"):
+                        ret, frame = cap.read(frame)
+                    if not ret:
+                        break
+                    decodificados.put(frame)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            decodificados.put(None)
+
+    def escritor():
+        try:
+            with perfilado("estego-escritor"):
+                while True:
+                    frame = por_codificar.get()
+                    if frame is None:
+                        break
+                    if not detener.is_set():
+                        with metricas.etapa("codificacion"):
+                            out.write(frame)
+                    libres.put(frame)
+        except Exception as e:
+            errores.append(e)
+            detener.set()
+            _drenar(por_codificar)
+
+    hilo_lector = threading.Thread(target=lector, name="estego-lector", daemon=True)
+    hilo_escritor = threading.Thread(target=escritor, name="estego-escritor", daemon=True)
+    hilo_lector.start()
+    hilo_escritor.start()
+
+    indice = 0
+    fin_lectura = False
+    try:
+        while True:
+            frame = decodificados.get()
+            if frame is None:
+                fin_lectura = True
+                break
+            metricas.cola("decodificados", decodificados.qsize())
+            metricas.cola("por_codificar", por_codificar.qsize())
+            if not detener.is_set():
+                procesar_cuadro(frame, indice)
+            indice += 1
+            metricas.sumar("cuadros")
+            metricas.publicar()
+            por_codificar.put(frame)
+    except BaseException:
+        detener.set()
+        raise
+    finally:
+        por_codificar.put(None)
+        if not fin_lectura:
+            _drenar(decodificados)
+        hilo_lector.join()
+        hilo_escritor.join()
+
+    if errores:
+        raise errores[0]
+    return indice
+
+
+@perfilar
+def ocultar_archivo_en_video(ruta_video, ruta_archivo_secreto, ruta_video_salida, log_callback=None,
+                             bits_por_canal=1, canales="B", profundidad_cola=4,
+                             progreso_callback=None, cancelar=None, compresion="none", metricas=None,
+                             indice=False, salida="ffv1", presupuesto_disco=None, cuadros_por_segmento=None,
+                             nombre_secreto=None):
+    """
+    Oculta el archivo usando `bits_por_canal` LSB (1-4) de cada canal en
+    `canales` (subconjunto de "BGR"). La disposición queda en el prefijo del
+    cuadro 0, así que la extracción la detecta sola.
+
+    Lectura, incrustación y escritura corren en tubería; `profundidad_cola`
+    acota los cuadros en espera entre etapas.
+
+    `progreso_callback` recibe eventos de progreso (ver estego.progreso) y
+    `cancelar` (threading.Event) detiene el trabajo; si se cancela o falla,
+    se borra el video de salida incompleto.
+
+    `compresion` (none/zlib/lzma/zstd) comprime el secreto antes de ocultarlo,
+    salvo que una muestra indique que no se reduce.
+
+    `metricas` (objeto Metricas o callable, ver estego.metricas) recibe los
+    tiempos por etapa, los contadores y la profundidad de las colas.
+
+    Con `indice` se escribe junto al video un índice lateral (ver
+    estego.indice) con el rango de cuadros, la disposición y el SHA-256 del
+    secreto, que acelera y verifica las extracciones siguientes.
+
+    Si `ruta_archivo_secreto` es una carpeta se oculta como un contenido de
+    varias entradas (ver estego.archivo), comprimidas una a una. También
+    puede ser un dato en memoria (bytes, buffer o archivo binario abierto,
+    ver estego.memoria) con el nombre `nombre_secreto`, que también
+    reemplaza al de un archivo secreto; la portada y la
+    salida siguen siendo rutas porque OpenCV solo escribe video en archivos.
+
+    `salida` es el formato sin pérdida (ver estego.salidas: ffv1, huffyuv,
+    raw, png o un objeto de salida). Con "auto" se miden todos con los
+    primeros cuadros y se usa el más rápido cuyo tamaño estimado quepa en
+    `presupuesto_disco` bytes (por defecto, el espacio libre del destino).
+
+    Con `cuadros_por_segmento` la salida se escribe en segmentos de ese
+    número de cuadros con un punto de control (ver estego.segmentos): si el
+    trabajo se interrumpe, repetirlo con los mismos argumentos reanuda desde
+    el último segmento terminado.
+
+    Devuelve la ruta final del video (.avi, o una carpeta con la salida png).
+    """
+    if cuadros_por_segmento is not None and cuadros_por_segmento < 1:
+        raise ValueError("cuadros_por_segmento debe ser al menos 1.")
+    indices = _validar_disposicion(bits_por_canal, canales)
+    metricas = como_metricas(metricas)
+    # Capacidad con el número real de cuadros, antes de codificar nada
+    try:
+        with metricas.etapa("sondeo"):
+            info = sondear_video(ruta_video, exacto=True)
+    except ValueError:
+        raise ValueError("No se pudo abrir el video de portada.")
+    capacidad = _capacidad(info, bits_por_canal, indices)
+
+    sha256 = None
+    secreto = ruta_archivo_secreto
+    if not es_ruta(secreto):
+        # Se abre una sola vez: un flujo sin seek no se podría leer para el SHA-256 y otra vez al ocultarlo
+        secreto, _ = abrir_datos(secreto)
+        if indice:
+            with metricas.etapa("hash"):
+                sha256 = sha256_abierto(secreto)
+    elif indice and not os.path.isdir(secreto):
+        with metricas.etapa("hash"):
+            sha256 = sha256_archivo(secreto)
+
+    try:
+        with metricas.etapa("compresion"):
+            archivo, len_datos, metodo, tam_original, nombre = preparar_carga(secreto, compresion, cancelar,
+                                                                              nombre_secreto)
+    except BaseException:
+        if secreto is not ruta_archivo_secreto:
+            secreto.close()
+        raise
+    try:
+        if indice and sha256 is None:
+            with metricas.etapa("hash"):
+                sha256 = sha256_abierto(archivo)
+        cabecera, len_datos = _cabecera_archivo(nombre, len_datos, METODOS[metodo], tam_original)
+        cabecera = _con_crc(cabecera, bits_por_canal, indices)
+        num_bits = (len(cabecera) + len_datos) * 8
+
+        if num_bits > capacidad * 8:
+            raise ValueError(
+                f"El archivo es demasiado grande para este video.\n"
+                f"Capacidad: {capacidad} bytes\n"
+                f"Archivo: {num_bits // 8} bytes"
+            )
+        if log_callback and metodo != "none":
+            log_callback(f"> Comprimido con {metodo}: {tam_original} -> {len_datos} bytes\n")
+
+        if salida == "auto":
+            with metricas.etapa("eleccion_salida"):
+                salida = _elegir_salida(ruta_video, info, bits_por_canal, indices, ruta_video_salida,
+                                        presupuesto_disco, log_callback)
+        if cuadros_por_segmento:
+            ruta_final = _ocultar_por_segmentos(ruta_video, info, archivo, cabecera, len_datos,
+                                                ruta_video_salida, log_callback, bits_por_canal, indices,
+                                                profundidad_cola, progreso_callback, cancelar, metricas,
+                                                obtener(salida), cuadros_por_segmento)
+        else:
+            ruta_final = _ocultar_flujo(ruta_video, info, archivo, cabecera, len_datos, ruta_video_salida,
+                                        log_callback, bits_por_canal, indices, profundidad_cola,
+                                        progreso_callback, cancelar, metricas, obtener(salida))
+        if indice:
+            _guardar_indice(ruta_final, _nombre_seguro(cabecera[1:1 + cabecera[0]]), VERSION_FORMATO,
+                            bits_por_canal, indices, PIXELES_PREFIJO, info.ancho, info.alto,
+                            len(cabecera), len_datos, metodo, tam_original, sha256)
+        return ruta_final
+    finally:
+        archivo.close()
+        if secreto is not ruta_archivo_secreto:
+            secreto.close()
+        metricas.publicar(forzar=True)
+
+
+# Cuadros de la portada con los que se mide cada salida en modo "auto"
+CUADROS_MUESTRA = 8
+
+
+def _elegir_salida(ruta_video, info, bits_por_canal, indices, ruta_video_salida, presupuesto, log_callback):
+    """Mide las salidas con los primeros cuadros, ya con bits aleatorios ocultos, y elige una."""
+    cap = abrir_video(ruta_video)
+    cuadros = []
+    try:
+        rng = np.random.default_rng()
+        while len(cuadros) < CUADROS_MUESTRA:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            bits = rng.integers(0, 2, frame.shape[0] * frame.shape[1] * len(indices) * bits_por_canal,
+                                dtype=np.uint8)
+            _escribir_bits(frame, bits, bits_por_canal, indices)
+            cuadros.append(frame)
+    finally:
+        cap.release()
+    if not cuadros:
+        raise ValueError("No se pudo abrir el video de portada.")
+
+    salida, _ = elegir(cuadros, info.cuadros, os.path.dirname(os.path.abspath(ruta_video_salida)),
+                       presupuesto, fps=info.fps or 30, log_callback=log_callback)
+    if log_callback:
+        log_callback(f"> Salida elegida: {salida.descripcion}\n")
+    return salida
+
+
+def _incrustador(fuente, bits_por_canal, indices, progreso, metricas, primer_cuadro=0):
+    """
+    Función `incrustar(frame, indice)` para _procesar_en_tuberia: escribe el
+    prefijo en el cuadro 0 y los siguientes bits de `fuente` en cada cuadro.
+    `primer_cuadro` es el número en la portada del cuadro con `indice` 0.
+    """
+    bits_prefijo = np.unpackbits(np.frombuffer(_prefijo(bits_por_canal, indices), dtype=np.uint8))
+
+    def incrustar(frame, indice):
+        pixel_inicial = 0
+        if primer_cuadro + indice == 0:
+            _escribir_bits(frame, bits_prefijo, 1, [0])
+            pixel_inicial = PIXELES_PREFIJO
+
+        if fuente.pendientes:
+            capacidad_cuadro = (frame.shape[0] * frame.shape[1] - pixel_inicial) * len(indices) * bits_por_canal
+            with metricas.etapa("lectura_secreto"):
+                bits = fuente.siguientes(capacidad_cuadro)
+            with metricas.etapa("lsb"):
+                _escribir_bits(frame, bits, bits_por_canal, indices, pixel_inicial)
+            metricas.sumar("bits", bits.size)
+
+        metricas.sumar("bytes_portada", frame.nbytes)
+        progreso.avanzar(1, frame.nbytes)
+
+    return incrustar
+
+
+def _ocultar_flujo(ruta_video, info, archivo, cabecera, len_datos, ruta_video_salida, log_callback,
+                   bits_por_canal, indices, profundidad_cola, progreso_callback, cancelar,
+                   metricas=SIN_METRICAS, salida=None):
+    cap = abrir_video(ruta_video)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video de portada.")
+
+    fps = info.fps
+    width = info.ancho
+    height = info.alto
+
+    # Formato sin pérdida (FFV1 por defecto); fija la extensión de la salida
+    salida = obtener(salida or "ffv1")
+    ruta_video_salida = salida.ruta(ruta_video_salida)
+    try:
+        out = salida.abrir(ruta_video_salida, fps, width, height)
+    except BaseException:
+        cap.release()
+        raise
+
+    progreso = Progreso(progreso_callback, info.cuadros, "cuadros", cancelar)
+    completo = False
+    try:
+        # El secreto se lee por bloques: solo se expanden a bits los de cada cuadro
+        fuente = FuenteBits(cabecera, archivo, len_datos)
+        incrustar = _incrustador(fuente, bits_por_canal, indices, progreso, metricas)
+        _procesar_en_tuberia(cap, out, incrustar, profundidad_cola, metricas)
+
+        if fuente.pendientes:
+            raise RuntimeError("No se pudieron escribir todos los bits.")
+        completo = True
+    finally:
+        cap.release()
+        out.release()
+        if not completo:
+            # Cancelado o fallido: no dejar un video a medias
+            borrar_salida(ruta_video_salida)
+
+    progreso.terminar()
+    if log_callback:
+        log_callback(f"> Oculto en: {ruta_video_salida}\n")
+    return ruta_video_salida
+
+
+class _CapturaLimitada:
+    """Envuelve un VideoCapture y deja de entregar cuadros tras `limite`."""
+
+    def __init__(self, cap, limite):
+        self.cap = cap
+        self.restantes = limite
+
+    def read(self, frame=None):
+        if self.restantes <= 0:
+            return False, frame
+        self.restantes -= 1
+        return self.cap.read(frame)
+
+
+def _saltar_cuadros(cap, n):
+    """Avanza `n` cuadros de la portada: con búsqueda si el códec lo permite, si no con grab()."""
+    if n <= 0:
+        return
+    if _fourcc(cap) in CODECS_BUSQUEDA_FIABLE:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, n)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == n:
+            return
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(n):
+        if not cap.grab():
+            raise ValueError("La portada tiene menos cuadros que los ya procesados.")
+
+
+def _ocultar_por_segmentos(ruta_video, info, archivo, cabecera, len_datos, ruta_video_salida, log_callback,
+                           bits_por_canal, indices, profundidad_cola, progreso_callback, cancelar,
+                           metricas, salida, cuadros_por_segmento):
+    """
+    Como _ocultar_flujo, pero escribe la salida en segmentos con punto de
+    control (ver estego.segmentos) y reanuda un trabajo interrumpido.
+    """
+    salida = obtener(salida or "ffv1")
+    ruta_video_salida = salida.ruta(ruta_video_salida)
+    carpeta = segmentos.carpeta_partes(ruta_video_salida)
+
+    with metricas.etapa("hash"):
+        huella_secreto = hashlib.sha256(bytes(cabecera) + bytes.fromhex(sha256_abierto(archivo))).hexdigest()
+    trabajo = {
+        "portada": {**huella_video(ruta_video), "cuadros": info.cuadros},
+        "secreto": huella_secreto,
+        "disposicion": _codificar_disposicion(bits_por_canal, indices),
+        "salida": salida.nombre,
+        "cuadros_por_segmento": cuadros_por_segmento,
+    }
+    hechos_segmentos = segmentos.cargar(carpeta, trabajo)
+    hechos = sum(s["cuadros"] for s in hechos_segmentos)
+    if hechos_segmentos and log_callback:
+        log_callback(f"> Reanudando: {len(hechos_segmentos)} segmentos hechos ({hechos}/{info.cuadros} cuadros)\n")
+
+    cap = abrir_video(ruta_video)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video de portada.")
+    progreso = Progreso(progreso_callback, info.cuadros, "cuadros", cancelar)
+    progreso.hecho = hechos
+    try:
+        fuente = FuenteBits(cabecera, archivo, len_datos)
+        if hechos_segmentos:
+            fuente.saltar(hechos_segmentos[-1]["bits"])
+            with metricas.etapa("decodificacion"):
+                _saltar_cuadros(cap, hechos)
+
+        while hechos < info.cuadros:
+            ruta_segmento = segmentos.ruta_segmento(carpeta, len(hechos_segmentos), salida)
+            out = salida.abrir(ruta_segmento, info.fps, info.ancho, info.alto)
+            completo = False
+            try:
+                incrustar = _incrustador(fuente, bits_por_canal, indices, progreso, metricas, hechos)
+                cuadros = _procesar_en_tuberia(_CapturaLimitada(cap, cuadros_por_segmento), out, incrustar,
+                                               profundidad_cola, metricas)
+                completo = True
+            finally:
+                out.release()
+                if not completo:
+                    # Solo se pierde el segmento a medias
+                    borrar_salida(ruta_segmento)
+            if not cuadros:
+                borrar_salida(ruta_segmento)
+                break
+            hechos += cuadros
+            hechos_segmentos.append(segmentos.nuevo_segmento(ruta_segmento, cuadros, fuente.entregados))
+            segmentos.guardar(carpeta, trabajo, hechos_segmentos)
+            if cuadros < cuadros_por_segmento:
+                break
+    finally:
+        cap.release()
+
+    if fuente.pendientes:
+        raise RuntimeError("No se pudieron escribir todos los bits.")
+    with metricas.etapa("union"):
+        segmentos.unir(salida, carpeta, hechos_segmentos, ruta_video_salida)
+
+    progreso.terminar()
+    if log_callback:
+        log_callback(f"> Oculto en: {ruta_video_salida} ({len(hechos_segmentos)} segmentos)\n")
+    return ruta_video_salida
+
+
+# Códecs intra-cuadro sin pérdida: CAP_PROP_POS_FRAMES posiciona exacto
+CODECS_BUSQUEDA_FIABLE = {"FFV1", "FFVH", "HFYU", "PNG ", "MPNG", "DIB ", "RGBA", "\x00\x00\x00\x00"}
+
+
+class _BusquedaNoFiable(Exception):
+    pass
+
+
+def _fourcc(cap):
+    codigo = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return "".join(chr((codigo >> (8 * i)) & 0xFF) for i in range(4)).upper()
+
+
+@perfilar
+def _extraer_rango(ruta_video, inicio, num_bytes, bits_por_canal, indices, pixel_inicial):
+    """
+    Trabajo de un proceso: abre su propio VideoCapture, salta al cuadro
+    `inicio` y devuelve `num_bytes` bytes empaquetados del flujo desde ahí.
+    """
+    cap = abrir_video(ruta_video)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video con el secreto.")
+    try:
+        primer_cuadro = None
+        if inicio == 0:
+            ret, primer_cuadro = cap.read()
+            if not ret:
+                raise ValueError("Contenido incompleto o corrupto.")
+        else:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, inicio)
+            if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != inicio:
+                raise _BusquedaNoFiable()
+            pixel_inicial = 0
+
+        lector = _LectorLSB(cap, bits_por_canal, indices, primer_cuadro, pixel_inicial)
+        datos = lector.leer(num_bytes)
+        if len(datos) < num_bytes:
+            raise ValueError("Contenido incompleto o corrupto.")
+        return datos
+    finally:
+        cap.release()
+
+
+def _cuadros_del_flujo(total_bytes, bits_cuadro, bits_cuadro0):
+    """Cuadros que hay que decodificar para leer los primeros `total_bytes` del flujo."""
+    return 1 + max(0, math.ceil((total_bytes * 8 - bits_cuadro0) / bits_cuadro))
+
+
+def _extraer_en_paralelo(ruta_video, total_bytes, bits_por_canal, indices, pixel_inicial,
+                         width, height, procesos, progreso):
+    """
+    Reparte los cuadros que contienen los primeros `total_bytes` del flujo
+    entre `procesos` trabajadores y une sus resultados en orden.
+    """
+    bits_cuadro = width * height * len(indices) * bits_por_canal
+    bits_cuadro0 = bits_cuadro - pixel_inicial * len(indices) * bits_por_canal
+    total_bits = total_bytes * 8
+    cuadros = _cuadros_del_flujo(total_bytes, bits_cuadro, bits_cuadro0)
+
+    # Cada tramo empieza en un byte entero del flujo: su número de cuadros es
+    # múltiplo de 8 / mcd(bits_cuadro, 8). El prefijo ocupa múltiplos de 8 bits.
+    alineacion = 8 // math.gcd(bits_cuadro, 8)
+    por_tramo = math.ceil(math.ceil(cuadros / procesos) / alineacion) * alineacion
+
+    tramos = []
+    for inicio in range(0, cuadros, por_tramo):
+        fin = min(inicio + por_tramo, cuadros)
+        bit_inicio = 0 if inicio == 0 else bits_cuadro0 + (inicio - 1) * bits_cuadro
+        bit_fin = min(bits_cuadro0 + (fin - 1) * bits_cuadro, total_bits)
+        tramos.append((inicio, fin, bit_inicio // 8, (bit_fin - bit_inicio) // 8))
+
+    buffer = bytearray(total_bytes)
+    pool = ProcessPoolExecutor(max_workers=min(procesos, len(tramos)))
+    try:
+        futuros = [
+            pool.submit(_extraer_rango, ruta_video, inicio, num_bytes,
+                        bits_por_canal, indices, pixel_inicial)
+            for inicio, _, _, num_bytes in tramos
+        ]
+        for (inicio, fin, offset, num_bytes), futuro in zip(tramos, futuros):
+            while True:
+                try:
+                    datos = futuro.result(timeout=0.25)
+                    break
+                except futures.TimeoutError:
+                    progreso.comprobar()
+            buffer[offset:offset + num_bytes] = datos
+            progreso.avanzar(fin - inicio, (fin - inicio) * width * height * 3)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return buffer
+
+
+def _guardar_indice(ruta_video, nombre, version, bits_por_canal, indices, pixel_inicial,
+                    ancho, alto, tam_cabecera, len_datos, compresion, tam_original, sha256):
+    """Índice lateral: el contenido ocupa los cuadros [cuadro_inicio, cuadro_fin)."""
+    bits_cuadro = ancho * alto * len(indices) * bits_por_canal
+    bits_cuadro0 = bits_cuadro - pixel_inicial * len(indices) * bits_por_canal
+    return escribir_indice(
+        ruta_video,
+        nombre=nombre,
+        formato=version,
+        bits_por_canal=bits_por_canal,
+        canales="".join(CANALES[i] for i in indices),
+        pixel_inicial=pixel_inicial,
+        cuadro_inicio=0,
+        cuadro_fin=_cuadros_del_flujo(tam_cabecera + len_datos, bits_cuadro, bits_cuadro0),
+        tam_cabecera=tam_cabecera,
+        len_datos=len_datos,
+        compresion=compresion,
+        tam_original=tam_original,
+        sha256=sha256,
+    )
+
+
+def _cabecera_legado_plausible(lector, capacidad):
+    """
+    Los videos sin prefijo no tienen firma: se acepta la cabecera solo si el
+    nombre es texto imprimible y el contenido cabe en el video.
+    """
+    cabecera = lector.leer(1)
+    if not cabecera or cabecera[0] == 0:
+        return None
+    resto = lector.leer(cabecera[0] + 4)
+    if len(resto) < cabecera[0] + 4:
+        return None
+    try:
+        nombre = resto[:cabecera[0]].decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    len_datos = struct.unpack("<I", resto[cabecera[0]:])[0]
+    if not nombre.isprintable() or "/" in nombre or "\\" in nombre:
+        return None
+    if capacidad and 1 + cabecera[0] + 4 + len_datos > capacidad:
+        return None
+    return nombre, len_datos
+
+
+def detectar(ruta_video):
+    """
+    Indica si el video tiene un secreto decodificando solo los cuadros de la
+    cabecera (normalmente solo el primero). Devuelve None si está limpio o un
+    diccionario con format, version, name, size, original_size, compression,
+    bits, channels y verified (True si el CRC de la cabecera, formato v3,
+    coincide; los formatos anteriores solo se validan por plausibilidad).
+    """
+    cap = abrir_video(ruta_video)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video.")
+    try:
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        try:
+            version, bits_por_canal, indices, pixel_inicial = _leer_prefijo(frame)
+        except ValueError as e:
+            # Firma presente pero versión o disposición que no sabemos leer
+            return {"carrier": "video", "format": "VSTG", "verified": False, "error": str(e)}
+        lector = _LectorLSB(cap, bits_por_canal, indices, frame, pixel_inicial)
+
+        if version == 0:
+            pixeles = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) * frame.shape[0] * frame.shape[1]
+            encontrado = _cabecera_legado_plausible(lector, pixeles // 8)
+            if encontrado is None:
+                return None
+            nombre, len_datos = encontrado
+            return {"carrier": "video", "format": "legacy", "version": 0, "name": nombre,
+                    "size": len_datos, "original_size": len_datos, "compression": "none",
+                    "bits": 1, "channels": "B", "verified": False}
+
+        try:
+            cabecera = _leer_cabecera(lector, version, bits_por_canal, indices)
+        except ValueError as e:
+            return {"carrier": "video", "format": "VSTG", "version": version, "verified": False,
+                    "error": str(e)}
+        return {"carrier": "video", "format": "VSTG", "version": version, "name": cabecera.nombre,
+                "size": cabecera.len_datos, "original_size": cabecera.tam_original,
+                "compression": NOMBRES.get(cabecera.codigo_compresion, str(cabecera.codigo_compresion)),
+                "bits": bits_por_canal, "channels": "".join(CANALES[i] for i in indices),
+                "verified": version >= 3}
+    finally:
+        cap.release()
+
+
+FlujoVideo = namedtuple("FlujoVideo", "lector version bits_por_canal indices pixel_inicial ancho alto cuadros "
+                                       "cabecera")
+
+
+def _abrir_flujo(cap, metricas):
+    """
+    Lee el cuadro 0, el prefijo y la cabecera de `cap` y comprueba que el
+    contenido quepa en el video. Devuelve un FlujoVideo con el lector
+    situado al inicio de los datos.
+    """
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    with metricas.etapa("decodificacion"):
+        ret, frame = cap.read()
+    if not ret:
+        raise ValueError("No se encontraron datos en el video.")
+    version, bits_por_canal, indices, pixel_inicial = _leer_prefijo(frame)
+    lector = _LectorLSB(cap, bits_por_canal, indices, frame, pixel_inicial, metricas)
+    cabecera = _leer_cabecera(lector, version, bits_por_canal, indices)
+
+    # Con una cabecera basura no reservamos memoria que el video no puede contener
+    pixeles = total_frames * width * height - pixel_inicial
+    capacidad = pixeles * len(indices) * bits_por_canal // 8
+    if total_frames > 0 and cabecera.tam_cabecera + cabecera.len_datos > capacidad:
+        raise ValueError("Contenido incompleto o corrupto.")
+    return FlujoVideo(lector, version, bits_por_canal, indices, pixel_inicial, width, height, total_frames,
+                      cabecera)
+
+
+def _copiar_contenido(lector, salida, len_datos, bits_cuadro, valores_cuadro, progreso, metricas):
+    """Lee en secuencia los `len_datos` bytes del contenido y los pasa a `salida` (SalidaDescomprimida)."""
+    progreso.hecho = lector.cuadros_leidos + 1
+    bloque = bytearray(max(bits_cuadro // 8, 1))
+    vista = memoryview(bloque)
+    leidos = 0
+    while leidos < len_datos:
+        cuadros_antes = lector.cuadros_leidos
+        n = lector.leer_en(vista[:min(len(bloque), len_datos - leidos)])
+        if n == 0:
+            break
+        with metricas.etapa("escritura"):
+            salida.escribir(vista[:n])
+        metricas.sumar("bytes_secreto", n)
+        leidos += n
+        nuevos = lector.cuadros_leidos - cuadros_antes
+        progreso.avanzar(nuevos, nuevos * valores_cuadro)
+    if leidos < len_datos:
+        raise ValueError("Contenido incompleto o corrupto.")
+
+
+@perfilar
+def extraer_archivo_de_video(ruta_video_estego, carpeta_salida, log_callback=None, procesos=1,
+                             progreso_callback=None, cancelar=None, metricas=None, usar_indice=False):
+    """
+    Lee primero el prefijo de disposición y la cabecera [len_nombre][nombre][len_datos],
+    y después solo los cuadros necesarios para recuperar len_datos bytes, que se
+    escriben (y descomprimen) al archivo de salida a medida que se leen.
+
+    Con `procesos` > 1 (None = todos los núcleos) los cuadros del contenido se
+    reparten entre procesos que buscan su tramo con CAP_PROP_POS_FRAMES. Si el
+    contenedor no permite búsquedas exactas se lee en secuencia.
+
+    `progreso_callback`, `cancelar` y `metricas` funcionan como en
+    ocultar_archivo_en_video. Los procesos de la extracción en paralelo no
+    informan etapas: su tiempo total queda en "extraccion_paralela".
+
+    Con `usar_indice`, si el video tiene índice lateral y el archivo ya
+    extraído en `carpeta_salida` coincide con su SHA-256, no se decodifica
+    nada. Si no lo tiene, se crea al terminar (si la carpeta lo permite),
+    salvo para una carpeta oculta: el .earc se borra al desempaquetarlo y el
+    índice apuntaría a un archivo que ya no existe.
+
+    Una carpeta oculta (ver estego.archivo) se desempaqueta en una carpeta
+    con su nombre dentro de `carpeta_salida`.
+
+    Devuelve (ruta del archivo o carpeta recuperada, tamaño).
+    """
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    metricas = como_metricas(metricas)
+
+    indice = leer_indice(ruta_video_estego) if usar_indice else None
+    if indice is not None:
+        ruta_previa = os.path.join(carpeta_salida, _nombre_seguro(indice["nombre"].encode("utf-8")))
+        with metricas.etapa("hash"):
+            extraido = coincide(ruta_previa, indice["tam_original"], indice["sha256"])
+        if extraido:
+            metricas.publicar(forzar=True)
+            if log_callback:
+                log_callback(f"> Ya extraído (coincide el SHA-256): {ruta_previa}\n")
+            return ruta_previa, indice["tam_original"]
+
+    cap = abrir_video(ruta_video_estego)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video con el secreto.")
+
+    ruta_salida = None
+    completo = False
+    try:
+        (lector, version, bits_por_canal, indices, pixel_inicial, width, height, total_frames,
+         cabecera) = _abrir_flujo(cap, metricas)
+        nombre_archivo, len_datos, codigo_compresion, tam_original, tam_cabecera = cabecera
+
+        if indice is not None and (indice["len_datos"], indice["tam_cabecera"], indice["bits_por_canal"],
+                                   indice["canales"]) != (len_datos, tam_cabecera, bits_por_canal,
+                                                          "".join(CANALES[i] for i in indices)):
+            indice = None  # No describe este video: se ignora y se reescribe al terminar
+
+        bits_cuadro = width * height * len(indices) * bits_por_canal
+        bits_cuadro0 = bits_cuadro - pixel_inicial * len(indices) * bits_por_canal
+        progreso = Progreso(progreso_callback,
+                            _cuadros_del_flujo(tam_cabecera + len_datos, bits_cuadro, bits_cuadro0),
+                            "cuadros", cancelar)
+        paralelo = (
+            procesos > 1
+            and total_frames > 0
+            and (tam_cabecera + len_datos) * 8 > procesos * bits_cuadro
+            and _fourcc(cap) in CODECS_BUSQUEDA_FIABLE
+        )
+
+        if not os.path.isdir(carpeta_salida):
+            os.makedirs(carpeta_salida, exist_ok=True)
+        ruta_salida = os.path.join(carpeta_salida, nombre_archivo)
+
+        # Los datos se escriben (y descomprimen) a medida que se leen
+        with open(ruta_salida, "wb") as f:
+            destino = ArchivoConHash(f)
+            salida = SalidaDescomprimida(destino, codigo_compresion, tam_original)
+
+            leido_en_paralelo = False
+            if paralelo:
+                try:
+                    with metricas.etapa("extraccion_paralela"):
+                        flujo = _extraer_en_paralelo(ruta_video_estego, tam_cabecera + len_datos,
+                                                     bits_por_canal, indices, pixel_inicial,
+                                                     width, height, procesos, progreso)
+                    metricas.sumar("cuadros", progreso.hecho - 1)
+                    with metricas.etapa("escritura"):
+                        salida.escribir(memoryview(flujo)[tam_cabecera:])
+                    metricas.sumar("bytes_secreto", len_datos)
+                    leido_en_paralelo = True
+                except _BusquedaNoFiable:
+                    pass
+
+            if not leido_en_paralelo:
+                _copiar_contenido(lector, salida, len_datos, bits_cuadro, width * height * 3, progreso, metricas)
+
+            with metricas.etapa("escritura"):
+                salida.cerrar()
+        if indice is not None and destino.hexdigest() != indice["sha256"]:
+            raise ValueError("El contenido recuperado no coincide con el SHA-256 del índice.")
+        completo = True
+    finally:
+        cap.release()
+        if not completo and ruta_salida and os.path.exists(ruta_salida):
+            os.remove(ruta_salida)
+        metricas.publicar(forzar=True)
+
+    ruta_salida, entradas = desempaquetar_recuperado(ruta_salida)
+    if usar_indice and indice is None and entradas is None:
+        try:
+            _guardar_indice(ruta_video_estego, nombre_archivo, version, bits_por_canal, indices,
+                            pixel_inicial, width, height, tam_cabecera, len_datos,
+                            NOMBRES[codigo_compresion], tam_original, destino.hexdigest())
+        except OSError:
+            pass  # Carpeta de solo lectura: se extrae igual, sin índice
+
+    progreso.terminar()
+    if log_callback:
+        texto = f"> Carpeta recuperada: {ruta_salida} ({entradas} archivos)" if entradas is not None \
+            else f"> Archivo recuperado: {ruta_salida}"
+        log_callback(f"{texto}\n> Tamaño: {tam_original} bytes\n")
+    return ruta_salida, tam_original
+
+
+@perfilar
+def extraer_datos_de_video(fuente, log_callback=None, progreso_callback=None, cancelar=None, metricas=None):
+    """
+    Como extraer_archivo_de_video, pero sin archivos: `fuente` es una ruta,
+    bytes, un buffer o un archivo binario abierto con el video (ver
+    estego.memoria; OpenCV lo lee desde memoria con su backend FFmpeg). Se
+    lee en secuencia y sin índice lateral.
+
+    Devuelve (nombre, memoryview con el contenido original), sin copiarlo.
+    Una carpeta oculta se devuelve tal cual, como contenido de varias
+    entradas (ver estego.archivo).
+    """
+    metricas = como_metricas(metricas)
+    archivo = None
+    if es_ruta(fuente):
+        cap = abrir_video(fuente)
+    else:
+        archivo, _ = abrir_datos(fuente)
+        cap = abrir_video(archivo)
+    try:
+        if not cap.isOpened():
+            raise ValueError("No se pudo abrir el video con el secreto.")
+        flujo = _abrir_flujo(cap, metricas)
+        cabecera = flujo.cabecera
+        bits_cuadro = flujo.ancho * flujo.alto * len(flujo.indices) * flujo.bits_por_canal
+        bits_cuadro0 = bits_cuadro - flujo.pixel_inicial * len(flujo.indices) * flujo.bits_por_canal
+        progreso = Progreso(progreso_callback,
+                            _cuadros_del_flujo(cabecera.tam_cabecera + cabecera.len_datos, bits_cuadro,
+                                               bits_cuadro0),
+                            "cuadros", cancelar)
+        destino = io.BytesIO()
+        salida = SalidaDescomprimida(destino, cabecera.codigo_compresion, cabecera.tam_original)
+        _copiar_contenido(flujo.lector, salida, cabecera.len_datos, bits_cuadro, flujo.ancho * flujo.alto * 3,
+                          progreso, metricas)
+        with metricas.etapa("escritura"):
+            salida.cerrar()
+    finally:
+        cap.release()
+        if archivo is not None:
+            archivo.close()
+        metricas.publicar(forzar=True)
+
+    progreso.terminar()
+    if log_callback:
+        log_callback(f"> Archivo recuperado: {cabecera.nombre}\n> Tamaño: {cabecera.tam_original} bytes\n")
+    return cabecera.nombre, destino.getbuffer()
+
+
+def _posicion_en_flujo(byte, bits_cuadro, bits_cuadro0):
+    """(cuadro, bits a saltar en él) donde empieza el byte `byte` del flujo tras el prefijo."""
+    bit = byte * 8
+    if bit < bits_cuadro0:
+        return 0, bit
+    cuadro, saltados = divmod(bit - bits_cuadro0, bits_cuadro)
+    return cuadro + 1, saltados
+
+
+@perfilar
+def extraer_entrada_de_video(ruta_video_estego, nombre_entrada, carpeta_salida, log_callback=None,
+                             progreso_callback=None, cancelar=None, metricas=None):
+    """
+    Recupera solo la entrada `nombre_entrada` de una carpeta oculta (ver
+    estego.archivo). Tras la cabecera y la tabla de contenido calcula en qué
+    cuadro y bit empieza la entrada, salta hasta él con CAP_PROP_POS_FRAMES
+    (si el códec lo permite; si no, lee en secuencia) y decodifica solo los
+    cuadros que la contienen. Se guarda en `carpeta_salida` con sus subcarpetas.
+
+    Devuelve (ruta del archivo recuperado, tamaño).
+    """
+    metricas = como_metricas(metricas)
+    cap = abrir_video(ruta_video_estego)
+    if not cap.isOpened():
+        raise ValueError("No se pudo abrir el video con el secreto.")
+    try:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        with metricas.etapa("decodificacion"):
+            ret, frame = cap.read()
+        if not ret:
+            raise ValueError("No se encontraron datos en el video.")
+        version, bits_por_canal, indices, pixel_inicial = _leer_prefijo(frame)
+        lector = _LectorLSB(cap, bits_por_canal, indices, frame, pixel_inicial, metricas)
+        cabecera = _leer_cabecera(lector, version, bits_por_canal, indices)
+        tabla = None
+        if cabecera.codigo_compresion == 0 and cabecera.nombre.endswith(EXTENSION):
+            tabla = leer_tabla(lector.leer)
+        if tabla is None:
+            raise ValueError("El video no contiene una carpeta con entradas.")
+        entrada = buscar(tabla, nombre_entrada)
+        if tabla.tam + entrada.desplazamiento + entrada.longitud > cabecera.len_datos:
+            raise ValueError("Contenido incompleto o corrupto.")
+
+        bits_cuadro = width * height * len(indices) * bits_por_canal
+        bits_cuadro0 = bits_cuadro - pixel_inicial * len(indices) * bits_por_canal
+        inicio = cabecera.tam_cabecera + tabla.tam + entrada.desplazamiento
+        cuadro, saltados = _posicion_en_flujo(inicio, bits_cuadro, bits_cuadro0)
+        if cuadro > lector.cuadros_leidos + 1 and _fourcc(cap) in CODECS_BUSQUEDA_FIABLE:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, cuadro)
+            if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != cuadro:
+                raise ValueError("No se pudo saltar al cuadro de la entrada.")
+            with metricas.etapa("decodificacion"):
+                ret, frame = cap.read()
+            if not ret:
+                raise ValueError("Contenido incompleto o corrupto.")
+            lector = _LectorLSB(cap, bits_por_canal, indices, frame, 0, metricas, saltados)
+        else:
+            # Mismo cuadro o sin búsqueda fiable: se avanza en secuencia
+            lector.saltar(inicio - cabecera.tam_cabecera - tabla.tam)
+
+        progreso = Progreso(progreso_callback, entrada.longitud, "bytes", cancelar)
+
+        def avance(n):
+            metricas.sumar("bytes_secreto", n)
+            progreso.avanzar(n, n * 8)
+
+        ruta_salida = extraer_entrada(entrada, lector.leer, carpeta_salida, avance)
+    finally:
+        cap.release()
+        metricas.publicar(forzar=True)
+
+    progreso.terminar()
+    if log_callback:
+        log_callback(f"> Entrada recuperada: {ruta_salida}\n> Tamaño: {entrada.tam_original} bytes\n")
+    return ruta_salida, entrada.tam_original
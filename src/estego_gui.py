@@ -1,128 +1,19 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-from PIL import Image
 import os
-import struct
 import sys
 
-# CONFIGURACIÓN
-# Cabecera: 'STG' (3) + Tamaño (4) + Extensión (8) = 15 bytes
-HEADER_SIZE = 15 
-
-def prepare_blob(file_path):
-    """Convierte el archivo secreto a bits y añade cabecera corregida."""
-    file_ext = os.path.splitext(file_path)[1].lower()
-    file_size = os.path.getsize(file_path)
-    
-    with open(file_path, "rb") as f:
-        file_bytes = f.read()
-    
-    # Usamos [:8] para asegurar que no se pase y ljust para rellenar con ceros
-    ext_bytes = file_ext.encode('utf-8').ljust(8, b'\x00')[:8]
-    
-    # Estructura: Marca (3) + Tamaño (4) + Extensión (8)
-    header = b'STG' + struct.pack("I", file_size) + ext_bytes
-    
-    full_data = header + file_bytes
-    
-    bits = []
-    for byte in full_data:
-        for i in range(8):
-            bits.append((byte >> (7 - i)) & 1)
-    return bits
-
-def embed_logic(cover_path, secret_path, output_path):
-    try:
-        img = Image.open(cover_path).convert('RGB')
-        width, height = img.size
-        pixels = img.load()
-        
-        data_bits = prepare_blob(secret_path)
-        total_pixels = width * height
-        
-        # Verificación de capacidad
-        if len(data_bits) > total_pixels * 3:
-            return False, f"Error: Archivo muy grande. Necesitas una imagen de al menos {len(data_bits)//3 + 1} pixeles."
-        
-        idx = 0
-        for y in range(height):
-            for x in range(width):
-                if idx < len(data_bits):
-                    r, g, b = pixels[x, y]
-                    if idx < len(data_bits): r = (r & ~1) | data_bits[idx]; idx += 1
-                    if idx < len(data_bits): g = (g & ~1) | data_bits[idx]; idx += 1
-                    if idx < len(data_bits): b = (b & ~1) | data_bits[idx]; idx += 1
-                    pixels[x, y] = (r, g, b)
-                else:
-                    break
-        
-        img.save(output_path, "PNG")
-        return True, f"¡Éxito! Archivo ocultado en:\n{output_path}"
-    except Exception as e:
-        return False, f"Error inesperado: {str(e)}"
-
-def extract_logic(stego_path):
-    try:
-        img = Image.open(stego_path).convert('RGB')
-        pixels = img.load()
-        width, height = img.size
-        
-        extracted_bytes = bytearray()
-        temp_byte = 0
-        bit_count = 0
-        
-        reading_header = True
-        data_size = 0
-        ext = ""
-
-        for y in range(height):
-            for x in range(width):
-                r, g, b = pixels[x, y]
-                for val in [r, g, b]:
-                    bit = val & 1
-                    temp_byte = (temp_byte << 1) | bit
-                    bit_count += 1
-                    
-                    if bit_count == 8:
-                        extracted_bytes.append(temp_byte)
-                        temp_byte = 0
-                        bit_count = 0
-                        
-                        # Chequeo rápido de firma al inicio (3 bytes)
-                        if len(extracted_bytes) == 3 and extracted_bytes != b'STG':
-                            return False, "No se detectó firma 'STG'. La imagen está limpia."
-                            
-                        # Si completamos la lectura de la cabecera (15 bytes ahora)
-                        if len(extracted_bytes) == HEADER_SIZE and reading_header:
-                            # Bytes 3 al 7: Tamaño
-                            data_size = struct.unpack("I", extracted_bytes[3:7])[0]
-                            # Bytes 7 al 15: Extensión (CORREGIDO)
-                            try:
-                                ext = extracted_bytes[7:15].decode('utf-8').strip('\x00')
-                            except:
-                                ext = ".bin" # Fallback si falla la decodificación
-                            
-                            reading_header = False
-                            
-                        elif not reading_header and len(extracted_bytes) == HEADER_SIZE + data_size:
-                            # Fin de lectura del archivo completo
-                            base_name = os.path.splitext(os.path.basename(stego_path))[0]
-                            # Limpieza extra del nombre para evitar errores
-                            clean_ext = ext if ext.startswith('.') else '.' + ext
-                            
-                            output_filename = f"{base_name}_recuperado{clean_ext}"
-                            output_full_path = os.path.join(os.path.dirname(stego_path), output_filename)
-
-                            with open(output_full_path, "wb") as f:
-                                # Escribimos solo los datos, ignorando los primeros 15 bytes de cabecera
-                                f.write(extracted_bytes[HEADER_SIZE:])
-                            
-                            return True, f"¡Recuperado!\nTipo: {clean_ext}\nTamaño: {data_size} bytes\nGuardado: {output_filename}"
-                            
-        return False, "Análisis finalizado sin encontrar el final del archivo."
-
-    except Exception as e:
-         return False, f"Error crítico: {str(e)}"
+from estego.compresion import disponibles
+from estego.imagen import OUTPUT_FORMATS, embed_logic, extract_logic
+# Se reexportan para el código que los importaba de este script
+from estego.imagen import HEADER_SIZE, prepare_blob  # noqa: F401
+from estego.progreso import Tarea, formatear
+
+# Cada cuánto se revisa el progreso del trabajo en segundo plano (ms)
+POLL_MS = 100
+
+# Imágenes sin pérdida que se pueden leer de vuelta (portadas y salidas)
+LOSSLESS_TYPES = " ".join("*" + ext for _, exts in OUTPUT_FORMATS.values() for ext in exts)
 
 # ==========================================
 # INTERFAZ GRÁFICA
@@ -132,7 +23,7 @@ class StegoApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Esteganografía ")
-        self.root.geometry("600x550")
+        self.root.geometry("600x620")
         self.root.resizable(False, False)
         
         bg_color = "#f4f4f4"
@@ -152,8 +43,20 @@ class StegoApp:
         self.secret_entry.grid(row=3, column=0, padx=5)
         tk.Button(frame_hide, text="...", command=self.browse_secret).grid(row=3, column=1)
 
-        tk.Button(frame_hide, text="ENCRIPTAR Y GUARDAR", bg="#2ecc71", fg="white", font=("Arial", 10, "bold"), 
-                  command=self.run_hide).grid(row=4, column=0, columnspan=2, pady=10, sticky="we")
+        frame_comp = tk.Frame(frame_hide, bg=bg_color)
+        frame_comp.grid(row=4, column=0, sticky="w", pady=(5,0))
+        tk.Label(frame_comp, text="Compresión:", bg=bg_color).pack(side="left")
+        self.compression_var = tk.StringVar(value="none")
+        tk.OptionMenu(frame_comp, self.compression_var, *disponibles()).pack(side="left", padx=5)
+        tk.Label(frame_comp, text="Formato:", bg=bg_color).pack(side="left")
+        self.format_var = tk.StringVar(value="png")
+        tk.OptionMenu(frame_comp, self.format_var, *OUTPUT_FORMATS).pack(side="left", padx=5)
+        self.fast_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_comp, text="Rápido", variable=self.fast_var, bg=bg_color).pack(side="left")
+
+        self.hide_btn = tk.Button(frame_hide, text="ENCRIPTAR Y GUARDAR", bg="#2ecc71", fg="white", font=("Arial", 10, "bold"), 
+                                  command=self.run_hide)
+        self.hide_btn.grid(row=5, column=0, columnspan=2, pady=10, sticky="we")
 
         # --- SECCIÓN 2: EXTRAER ---
         frame_ext = tk.LabelFrame(root, text=" 2. RECUPERAR ", font=("Arial", 11, "bold"), bg=bg_color, padx=10, pady=10)
@@ -164,13 +67,19 @@ class StegoApp:
         self.stego_entry.grid(row=1, column=0, padx=5)
         tk.Button(frame_ext, text="...", command=self.browse_stego).grid(row=1, column=1)
 
-        tk.Button(frame_ext, text="ANALIZAR Y EXTRAER", bg="#3498db", fg="white", font=("Arial", 10, "bold"), 
-                  command=self.run_extract).grid(row=2, column=0, columnspan=2, pady=10, sticky="we")
+        self.extract_btn = tk.Button(frame_ext, text="ANALIZAR Y EXTRAER", bg="#3498db", fg="white", font=("Arial", 10, "bold"), 
+                                     command=self.run_extract)
+        self.extract_btn.grid(row=2, column=0, columnspan=2, pady=10, sticky="we")
 
         # --- LOG ---
         self.log = scrolledtext.ScrolledText(root, height=8, state='disabled', bg="#e8e8e8")
         self.log.pack(padx=15, pady=5, fill="both")
 
+        self.cancel_btn = tk.Button(root, text="CANCELAR", state="disabled", command=self.cancel_job)
+        self.cancel_btn.pack(padx=15, pady=(0, 10), anchor="e")
+
+        self.task = None
+
     def log_msg(self, msg):
         self.log.config(state='normal')
         self.log.insert(tk.END, "> " + msg + "\n")
@@ -178,7 +87,7 @@ class StegoApp:
         self.log.config(state='disabled')
 
     def browse_cover(self):
-        f = filedialog.askopenfilename(filetypes=[("Imágenes", "*.png *.jpg *.jpeg")])
+        f = filedialog.askopenfilename(filetypes=[("Imágenes", LOSSLESS_TYPES + " *.jpg *.jpeg")])
         if f: self.cover_entry.delete(0, tk.END); self.cover_entry.insert(0, f)
 
     def browse_secret(self):
@@ -186,27 +95,73 @@ class StegoApp:
         if f: self.secret_entry.delete(0, tk.END); self.secret_entry.insert(0, f)
 
     def browse_stego(self):
-        f = filedialog.askopenfilename(filetypes=[("PNG", "*.png")])
+        f = filedialog.askopenfilename(filetypes=[("Imágenes sin pérdida", LOSSLESS_TYPES)])
         if f: self.stego_entry.delete(0, tk.END); self.stego_entry.insert(0, f)
 
+    # --- Trabajos en segundo plano: la ventana sigue respondiendo ---
+
+    def start_job(self, func, args, on_done, **kwargs):
+        self.task = Tarea(func, *args, nombre_callback="progress_callback", nombre_cancelar="cancel_event",
+                          **kwargs).iniciar()
+        self.on_done = on_done
+        self.hide_btn.config(state="disabled")
+        self.extract_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        self.root.after(POLL_MS, self.poll_job)
+
+    def poll_job(self):
+        finished = self.task.terminada
+        for event in self.task.eventos():
+            self.log_msg(formatear(event))
+        if not finished:
+            self.root.after(POLL_MS, self.poll_job)
+            return
+
+        task, self.task = self.task, None
+        self.hide_btn.config(state="normal")
+        self.extract_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+
+        if task.error is not None:
+            ok, msg = False, f"Error inesperado: {task.error}"
+        else:
+            ok, msg = task.resultado
+        if not ok and task.cancelar.is_set():
+            self.log_msg(msg)
+            return
+        self.on_done(ok, msg)
+
+    def cancel_job(self):
+        if self.task is not None:
+            self.task.cancelar.set()
+            self.log_msg("Cancelando...")
+
     def run_hide(self):
         cover, secret = self.cover_entry.get(), self.secret_entry.get()
         if not cover or not secret: return messagebox.showerror("Error", "Faltan archivos")
         
-        out = os.path.splitext(cover)[0] + "_SECRETO.png"
+        fmt = self.format_var.get()
+        out = os.path.splitext(cover)[0] + "_SECRETO" + OUTPUT_FORMATS[fmt][1][0]
         self.log_msg("Ocultando...")
-        ok, msg = embed_logic(cover, secret, out)
-        if ok: messagebox.showinfo("Éxito", msg); self.log_msg("Listo: " + out)
-        else: messagebox.showerror("Error", msg); self.log_msg("Error: " + msg)
+
+        def done(ok, msg):
+            if ok: messagebox.showinfo("Éxito", msg); self.log_msg("Listo: " + out)
+            else: messagebox.showerror("Error", msg); self.log_msg("Error: " + msg)
+
+        self.start_job(embed_logic, (cover, secret, out), done, compression=self.compression_var.get(),
+                       output_format=fmt, preset="fast" if self.fast_var.get() else "default")
 
     def run_extract(self):
         stego = self.stego_entry.get()
         if not stego: return messagebox.showerror("Error", "Selecciona imagen")
         
         self.log_msg("Analizando...")
-        ok, msg = extract_logic(stego)
-        if ok: messagebox.showinfo("Éxito", msg); self.log_msg(msg)
-        else: messagebox.showwarning("Fallo", msg); self.log_msg(msg)
+
+        def done(ok, msg):
+            if ok: messagebox.showinfo("Éxito", msg); self.log_msg(msg)
+            else: messagebox.showwarning("Fallo", msg); self.log_msg(msg)
+
+        self.start_job(extract_logic, (stego,), done)
 
 if __name__ == "__main__":
     if getattr(sys, 'frozen', False): os.chdir(sys._MEIPASS)
@@ -1,190 +1,15 @@
 import os
-import struct
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
-import cv2
-import numpy as np
+from estego.video import CANALES, extraer_archivo_de_video, ocultar_archivo_en_video
+# Se reexportan para el código que los importaba de este script
+from estego.video import archivo_a_bits, bits_a_archivo, calcular_capacidad_video  # noqa: F401
+from estego.compresion import disponibles as compresiones_disponibles
+from estego.progreso import Tarea, formatear
 
-
-# ========= LÓGICA DE ESTEGANOGRAFÍA EN VIDEO =========
-
-def calcular_capacidad_video(ruta_video):
-    cap = cv2.VideoCapture(ruta_video)
-    if not cap.isOpened():
-        raise ValueError("No se pudo abrir el video de portada.")
-
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    cap.release()
-
-    # Usamos solo 1 canal (B) y 1 bit (LSB) por píxel
-    bits_totales = total_frames * width * height
-    bytes_totales = bits_totales // 8
-    return bytes_totales
-
-
-def archivo_a_bits(ruta_archivo):
-    """
-    Empaqueta:
-    [1 byte: len_nombre] [nombre utf-8] [4 bytes: len_datos] [datos]
-    y devuelve un arreglo de bits (0/1).
-    """
-    with open(ruta_archivo, "rb") as f:
-        datos = f.read()
-
-    nombre = os.path.basename(ruta_archivo).encode("utf-8")
-    if len(nombre) > 255:
-        nombre = nombre[:255]
-    len_nombre = len(nombre)
-    len_datos = len(datos)
-
-    cabecera = bytes([len_nombre]) + nombre + struct.pack("<I", len_datos)
-    payload = cabecera + datos
-
-    arr = np.frombuffer(payload, dtype=np.uint8)
-    bits = np.unpackbits(arr)
-    return bits
-
-
-def bits_a_archivo(bits, carpeta_salida):
-    """
-    Reconstruye el archivo a partir de los bits extraídos del video.
-    """
-    bits = np.array(bits, dtype=np.uint8)
-    if bits.size == 0:
-        raise ValueError("No se encontraron datos en el video.")
-
-    # A múltiplo de 8
-    if bits.size % 8 != 0:
-        padding = 8 - (bits.size % 8)
-        bits = np.concatenate([bits, np.zeros(padding, dtype=np.uint8)])
-
-    data = np.packbits(bits).tobytes()
-
-    if len(data) < 1:
-        raise ValueError("Datos insuficientes para leer el nombre del archivo.")
-
-    len_nombre = data[0]
-    indice = 1
-
-    if len(data) < 1 + len_nombre + 4:
-        raise ValueError("Cabecera incompleta o corrupta.")
-
-    nombre_bytes = data[indice:indice + len_nombre]
-    indice += len_nombre
-    try:
-        nombre_archivo = nombre_bytes.decode("utf-8", errors="ignore")
-    except UnicodeDecodeError:
-        nombre_archivo = "archivo_recuperado.bin"
-    
-    if not nombre_archivo or not nombre_archivo.strip():
-        nombre_archivo = "recuperado_sin_nombre.bin"
-    
-    nombre_archivo = "".join([c for c in nombre_archivo if c.isalnum() or c in "._- "])
-
-    len_datos = struct.unpack("<I", data[indice:indice + 4])[0]
-    indice += 4
-
-    if len(data) < indice + len_datos:
-        raise ValueError("Contenido incompleto o corrupto.")
-
-    contenido = data[indice:indice + len_datos]
-
-    if not os.path.isdir(carpeta_salida):
-        os.makedirs(carpeta_salida, exist_ok=True)
-
-    ruta_salida = os.path.join(carpeta_salida, nombre_archivo)
-    with open(ruta_salida, "wb") as f:
-        f.write(contenido)
-
-    return ruta_salida, len_datos
-
-
-def ocultar_archivo_en_video(ruta_video, ruta_archivo_secreto, ruta_video_salida, log_callback=None):
-    capacidad = calcular_capacidad_video(ruta_video)
-    bits = archivo_a_bits(ruta_archivo_secreto)
-    num_bits = bits.size
-
-    if num_bits > capacidad:
-        raise ValueError(
-            f"El archivo es demasiado grande para este video.\n"
-            f"Capacidad aproximada: {capacidad} bytes\n"
-            f"Archivo: {num_bits // 8} bytes"
-        )
-
-    cap = cv2.VideoCapture(ruta_video)
-    if not cap.isOpened():
-        raise ValueError("No se pudo abrir el video de portada.")
-
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    fourcc = cv2.VideoWriter_fourcc(*"FFV1") # Codec sin pérdida
-    if not ruta_video_salida.endswith(".avi"):
-        ruta_video_salida = os.path.splitext(ruta_video_salida)[0] + ".avi"
-    out = cv2.VideoWriter(ruta_video_salida, fourcc, fps, (width, height))
-
-    bit_index = 0
-    total_bits = num_bits
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if bit_index < total_bits:
-            canal_b = frame[:, :, 0].flatten()
-
-            espacio = canal_b.size
-            bits_restantes = total_bits - bit_index
-            bits_a_escribir = min(espacio, bits_restantes)
-
-            segmento = canal_b[:bits_a_escribir]
-            segmento = (segmento & ~1) | bits[bit_index:bit_index + bits_a_escribir]
-            canal_b[:bits_a_escribir] = segmento
-
-            frame[:, :, 0] = canal_b.reshape((height, width))
-
-            bit_index += bits_a_escribir
-
-        out.write(frame)
-
-    cap.release()
-    out.release()
-
-    if bit_index < total_bits:
-        raise RuntimeError("No se pudieron escribir todos los bits.")
-
-    if log_callback:
-        log_callback(f"> Oculto en: {ruta_video_salida}\n")
-
-
-def extraer_archivo_de_video(ruta_video_estego, carpeta_salida, log_callback=None):
-    cap = cv2.VideoCapture(ruta_video_estego)
-    if not cap.isOpened():
-        raise ValueError("No se pudo abrir el video con el secreto.")
-
-    bits = []
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        canal_b = frame[:, :, 0].flatten()
-        lsb = canal_b & 1
-        bits.extend(lsb.tolist())
-
-    cap.release()
-
-    ruta, tam = bits_a_archivo(bits, carpeta_salida)
-    if log_callback:
-        log_callback(f"> Archivo recuperado: {ruta}\n> Tamaño: {tam} bytes\n")
-    return ruta, tam
+# Cada cuánto se revisa el progreso del trabajo en segundo plano (ms)
+INTERVALO_SONDEO_MS = 100
 
 
 # ========= INTERFAZ GRÁFICA =========
@@ -194,7 +19,7 @@ class VideoStegoApp(tk.Tk):
         super().__init__()
 
         self.title("Esteganografía en video")
-        self.geometry("720x520")
+        self.geometry("720x600")
         self.resizable(False, False)
 
         self.style = ttk.Style(self)
@@ -234,10 +59,27 @@ class VideoStegoApp(tk.Tk):
         ttk.Button(frame_ocultar, text="…", width=3,
                    command=self.seleccionar_video_salida).grid(row=2, column=2, padx=2)
 
+        # Disposición: bits por canal y canales usados
+        self.bits_por_canal_var = tk.IntVar(value=1)
+        self.canal_vars = {c: tk.BooleanVar(value=(c == "B")) for c in CANALES}
+
+        ttk.Label(frame_ocultar, text="Bits por canal:").grid(row=3, column=0, sticky="w")
+        frame_disp = ttk.Frame(frame_ocultar)
+        frame_disp.grid(row=3, column=1, padx=5, pady=3, sticky="w")
+        ttk.Spinbox(frame_disp, from_=1, to=4, width=3, state="readonly",
+                    textvariable=self.bits_por_canal_var).pack(side="left")
+        for c in CANALES:
+            ttk.Checkbutton(frame_disp, text=c, variable=self.canal_vars[c]).pack(side="left", padx=(10, 0))
+
+        self.compresion_var = tk.StringVar(value="none")
+        ttk.Label(frame_disp, text="Compresión:").pack(side="left", padx=(20, 0))
+        ttk.Combobox(frame_disp, values=compresiones_disponibles(), width=6, state="readonly",
+                     textvariable=self.compresion_var).pack(side="left", padx=(5, 0))
+
         # Botón ocultar
-        btn_ocultar = ttk.Button(frame_ocultar, text="ENCRIPTAR Y GUARDAR",
-                                 command=self.accion_ocultar)
-        btn_ocultar.grid(row=3, column=0, columnspan=3, pady=(10, 0))
+        self.btn_ocultar = ttk.Button(frame_ocultar, text="ENCRIPTAR Y GUARDAR",
+                                      command=self.accion_ocultar)
+        self.btn_ocultar.grid(row=4, column=0, columnspan=3, pady=(10, 0))
         for i in range(3):
             frame_ocultar.columnconfigure(i, weight=[0, 1, 0][i])
 
@@ -263,9 +105,9 @@ class VideoStegoApp(tk.Tk):
                    command=self.seleccionar_carpeta_salida).grid(row=1, column=2, padx=2)
 
         # Botón recuperar
-        btn_recuperar = ttk.Button(frame_recuperar, text="ANALIZAR Y EXTRAER",
-                                   command=self.accion_recuperar)
-        btn_recuperar.grid(row=2, column=0, columnspan=3, pady=(10, 0))
+        self.btn_recuperar = ttk.Button(frame_recuperar, text="ANALIZAR Y EXTRAER",
+                                        command=self.accion_recuperar)
+        self.btn_recuperar.grid(row=2, column=0, columnspan=3, pady=(10, 0))
         for i in range(3):
             frame_recuperar.columnconfigure(i, weight=[0, 1, 0][i])
 
@@ -279,6 +121,11 @@ class VideoStegoApp(tk.Tk):
                                 font=("SF Pro Text", 10))
         self.text_log.pack(fill="both", expand=True)
 
+        self.btn_cancelar = ttk.Button(frame_log, text="CANCELAR", state="disabled",
+                                       command=self.cancelar_tarea)
+        self.btn_cancelar.pack(anchor="e", pady=(5, 0))
+        self.tarea = None
+
     # ===== funciones de UI =====
 
     def agregar_log(self, texto):
@@ -339,13 +186,17 @@ class VideoStegoApp(tk.Tk):
             salida = base + "_SECRETO.mp4"
             self.video_salida_var.set(salida)
 
+        bits_por_canal = self.bits_por_canal_var.get()
+        canales = "".join(c for c in CANALES if self.canal_vars[c].get())
+
         self.agregar_log("> Ocultando...\n")
-        try:
-            ocultar_archivo_en_video(video, archivo, salida, log_callback=self.agregar_log)
-            messagebox.showinfo("Listo", f"Video con secreto guardado en:\n{salida}")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.agregar_log(f"! Error: {e}\n")
+
+        def listo(ruta):
+            messagebox.showinfo("Listo", f"Video con secreto guardado en:\n{ruta}")
+
+        self.iniciar_tarea(ocultar_archivo_en_video, (video, archivo, salida), listo,
+                           bits_por_canal=bits_por_canal, canales=canales,
+                           compresion=self.compresion_var.get())
 
     def accion_recuperar(self):
         video_estego = self.video_estego_var.get().strip()
@@ -356,13 +207,53 @@ class VideoStegoApp(tk.Tk):
             return
 
         self.agregar_log("> Analizando...\n")
-        try:
-            ruta, tam = extraer_archivo_de_video(video_estego, carpeta, log_callback=self.agregar_log)
+
+        def listo(resultado):
+            ruta, tam = resultado
             messagebox.showinfo("Recuperado",
                                 f"Archivo recuperado:\n{ruta}\n\nTamaño: {tam} bytes")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.agregar_log(f"! Error: {e}\n")
+
+        self.iniciar_tarea(extraer_archivo_de_video, (video_estego, carpeta), listo)
+
+    # ===== trabajos en segundo plano =====
+
+    def iniciar_tarea(self, funcion, args, al_terminar, **kwargs):
+        """Ejecuta el trabajo en un hilo; la ventana sigue respondiendo y se puede cancelar."""
+        self.tarea = Tarea(funcion, *args, nombre_log="log_callback", **kwargs).iniciar()
+        self.al_terminar = al_terminar
+        self.btn_ocultar.configure(state="disabled")
+        self.btn_recuperar.configure(state="disabled")
+        self.btn_cancelar.configure(state="normal")
+        self.after(INTERVALO_SONDEO_MS, self.revisar_tarea)
+
+    def revisar_tarea(self):
+        terminada = self.tarea.terminada
+        for evento in self.tarea.eventos():
+            if isinstance(evento, str):
+                self.agregar_log(evento)
+            else:
+                self.agregar_log(f"> {formatear(evento)}\n")
+        if not terminada:
+            self.after(INTERVALO_SONDEO_MS, self.revisar_tarea)
+            return
+
+        tarea, self.tarea = self.tarea, None
+        self.btn_ocultar.configure(state="normal")
+        self.btn_recuperar.configure(state="normal")
+        self.btn_cancelar.configure(state="disabled")
+
+        if tarea.cancelada:
+            self.agregar_log("> Cancelado.\n")
+        elif tarea.error is not None:
+            messagebox.showerror("Error", str(tarea.error))
+            self.agregar_log(f"! Error: {tarea.error}\n")
+        else:
+            self.al_terminar(tarea.resultado)
+
+    def cancelar_tarea(self):
+        if self.tarea is not None:
+            self.tarea.cancelar.set()
+            self.agregar_log("> Cancelando...\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from estego.benchmark import generar_imagen, generar_secreto, generar_video  # noqa: E402
+
+
+@pytest.fixture
+def portada_video(tmp_path):
+    ruta = str(tmp_path / "portada.avi")
+    generar_video(ruta, 64, 48, 20)
+    return ruta
+
+
+@pytest.fixture
+def portada_imagen(tmp_path):
+    ruta = str(tmp_path / "portada.png")
+    generar_imagen(ruta, 96, 64)
+    return ruta
+
+
+@pytest.fixture
+def secreto(tmp_path):
+    ruta = str(tmp_path / "secreto.bin")
+    generar_secreto(ruta, 1500)
+    return ruta
+
+
+def leer(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import leer
+from estego import imagen
+
+# Cinco filas de la portada de 96 píxeles por banda: varias bandas por imagen
+BANDA = 96 * 3 * 5
+
+
+def _pixeles(ruta):
+    with Image.open(ruta) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def _ocultar(portada, secreto, salida, **opciones):
+    ok, msg = imagen.embed_logic(portada, secreto, str(salida), **opciones)
+    assert ok, msg
+    return str(salida)
+
+
+def _extraer(estego, carpeta):
+    ok, msg = imagen.extract_logic(estego, str(carpeta))
+    assert ok, msg
+    (recuperado,) = carpeta.iterdir()
+    return leer(recuperado)
+
+
+@pytest.mark.parametrize("modo", ["RGB", "RGBA", "L"])
+@pytest.mark.parametrize("opciones", [{}, {"preset": "fast"}, {"png_filter": "paeth", "png_strategy": "filtered"}])
+def test_bandas_igual_que_camino_normal(tmp_path, monkeypatch, portada_imagen, secreto, modo, opciones):
+    """
+    Mismos píxeles y mismo secreto recuperado. Con un filtro PNG fijo también
+    el mismo archivo; el adaptativo de las bandas elige filtros distintos a los de Pillow.
+    """
+    portada = str(tmp_path / f"portada-{modo}.png")
+    with Image.open(portada_imagen) as img:
+        img.convert(modo).save(portada)
+
+    normal = _ocultar(portada, secreto, tmp_path / "normal.png", **opciones)
+    monkeypatch.setattr(imagen, "STRIP_THRESHOLD", 0)
+    monkeypatch.setattr(imagen, "BAND_BYTES", BANDA)
+    usadas = []
+
+    class Lector(imagen.LectorBandasPNG):
+        def leer(self, filas):
+            usadas.append("lector")
+            return super().leer(filas)
+
+    embed_strips = imagen._embed_strips
+    monkeypatch.setattr(imagen, "LectorBandasPNG", Lector)
+    monkeypatch.setattr(imagen, "_embed_strips", lambda *args: usadas.append("escritor") or embed_strips(*args))
+    por_bandas = _ocultar(portada, secreto, tmp_path / "bandas.png", **opciones)
+    assert "escritor" in usadas
+
+    assert np.array_equal(_pixeles(normal), _pixeles(por_bandas))
+    if imagen.save_options(**{"preset": "default", **opciones})["png_filter"] != "adaptive":
+        assert leer(normal) == leer(por_bandas)
+    usadas.clear()
+    assert _extraer(por_bandas, tmp_path / "bandas") == leer(secreto)
+    assert usadas.count("lector") > 1
+    monkeypatch.undo()
+    assert _extraer(normal, tmp_path / "normal") == leer(secreto)
@@ -0,0 +1,13 @@
+from estego import cli
+
+
+def test_error_de_imagen_sin_prefijo_doble(tmp_path, capsys, portada_imagen):
+    grande = tmp_path / "grande.bin"
+    grande.write_bytes(b"x" * 100_000)
+
+    codigo = cli.main(["embed", portada_imagen, str(grande), "-o", str(tmp_path / "salida.png")])
+
+    error = capsys.readouterr().err
+    assert codigo == 1
+    assert error.startswith("Error: Archivo muy grande.")
+    assert "Error: Error:" not in error
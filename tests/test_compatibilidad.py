@@ -0,0 +1,16 @@
+import pytest
+
+from conftest import leer
+
+pytest.importorskip("tkinter")
+
+
+def test_scripts_reexportan_la_api_antigua(tmp_path, portada_video, secreto):
+    import estego_gui
+    import video_stego
+
+    bits = video_stego.archivo_a_bits(secreto)
+    ruta, tam = video_stego.bits_a_archivo(bits, str(tmp_path / "recuperado"))
+    assert leer(ruta) == leer(secreto) and tam == len(leer(secreto))
+    assert 0 < video_stego.calcular_capacidad_video(portada_video) <= 64 * 48 * 20 // 8
+    assert len(estego_gui.prepare_blob(secreto)) == (estego_gui.HEADER_SIZE + tam) * 8
@@ -0,0 +1,24 @@
+import pytest
+
+from estego.cli import ejecutar_trabajo
+from estego.deteccion import detect
+from estego.video import ocultar_archivo_en_video
+
+
+def test_detectar_video(tmp_path, portada_video, secreto):
+    salida = ocultar_archivo_en_video(portada_video, secreto, str(tmp_path / "estego.avi"))
+
+    assert detect(portada_video) is None
+    encontrado = detect(salida)
+    assert encontrado["name"] == "secreto.bin" and encontrado["verified"]
+
+
+@pytest.mark.parametrize("nombre", ["notas.txt", "sin_extension"])
+def test_formato_no_admitido(tmp_path, nombre):
+    ruta = tmp_path / nombre
+    ruta.write_text("no es un medio")
+
+    with pytest.raises(ValueError, match="Formato no admitido"):
+        detect(str(ruta))
+    resultado = ejecutar_trabajo({"op": "detect", "input": str(ruta)})
+    assert not resultado["ok"] and resultado["error"].startswith("Formato no admitido")
@@ -0,0 +1,38 @@
+import os
+
+from conftest import leer
+from estego.indice import ruta_indice
+from estego.video import extraer_archivo_de_video, ocultar_archivo_en_video
+
+
+def test_extraer_no_escribe_indice_por_defecto(tmp_path, portada_video, secreto):
+    salida = ocultar_archivo_en_video(portada_video, secreto, str(tmp_path / "estego.avi"))
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"))
+
+    assert leer(ruta) == leer(secreto)
+    assert not os.path.exists(ruta_indice(salida))
+
+
+def test_extraer_con_indice_lo_crea_y_lo_reusa(tmp_path, portada_video, secreto):
+    salida = ocultar_archivo_en_video(portada_video, secreto, str(tmp_path / "estego.avi"))
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"), usar_indice=True)
+    assert os.path.exists(ruta_indice(salida))
+
+    mensajes = []
+    otra, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"), usar_indice=True,
+                                       log_callback=mensajes.append)
+    assert otra == ruta
+    assert "Ya extraído" in "".join(mensajes)
+
+
+def test_carpeta_oculta_no_deja_indice(tmp_path, portada_video):
+    carpeta = tmp_path / "datos"
+    (carpeta / "sub").mkdir(parents=True)
+    (carpeta / "a.txt").write_bytes(b"hola" * 50)
+    (carpeta / "sub" / "b.bin").write_bytes(os.urandom(300))
+
+    salida = ocultar_archivo_en_video(portada_video, str(carpeta), str(tmp_path / "estego.avi"))
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"), usar_indice=True)
+
+    assert leer(os.path.join(ruta, "sub", "b.bin")) == leer(carpeta / "sub" / "b.bin")
+    assert not os.path.exists(ruta_indice(salida))
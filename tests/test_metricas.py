@@ -0,0 +1,37 @@
+import os
+import threading
+
+from conftest import leer
+from estego import metricas
+from estego.video import extraer_archivo_de_video, ocultar_archivo_en_video
+
+
+def test_embed_con_perfil(tmp_path, monkeypatch, portada_video, secreto):
+    perfiles = tmp_path / "perfiles"
+    monkeypatch.setenv(metricas.VARIABLE_PERFIL, str(perfiles))
+    salida = ocultar_archivo_en_video(portada_video, secreto, str(tmp_path / "estego.avi"))
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"))
+
+    assert leer(ruta) == leer(secreto)
+    # Un perfil por operación; los hilos de la tubería no abren otro
+    nombres = sorted(p.name.split("-")[0] for p in perfiles.iterdir())
+    assert nombres == ["extraer_archivo_de_video", "ocultar_archivo_en_video"]
+
+
+def test_perfilado_anidado_y_en_hilos(tmp_path, monkeypatch):
+    monkeypatch.setenv(metricas.VARIABLE_PERFIL, str(tmp_path))
+
+    def en_hilo():
+        with metricas.perfilado("hilo"):
+            sum(range(1000))
+
+    with metricas.perfilado("exterior"):
+        with metricas.perfilado("interior"):
+            pass
+        hilo = threading.Thread(target=en_hilo)
+        hilo.start()
+        hilo.join()
+    with metricas.perfilado("despues"):
+        pass
+
+    assert sorted(p.split("-")[0] for p in os.listdir(tmp_path)) == ["despues", "exterior"]
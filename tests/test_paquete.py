@@ -0,0 +1,9 @@
+import os
+import pkgutil
+
+import estego
+
+
+def test_docstring_lista_todos_los_modulos():
+    modulos = {m.name for m in pkgutil.iter_modules([os.path.dirname(estego.__file__)])} - {"__main__"}
+    assert {m for m in modulos if f"estego.{m}:" not in estego.__doc__} == set()
@@ -0,0 +1,36 @@
+import os
+import threading
+import time
+
+from estego import salidas
+
+
+def test_opciones_del_codec_no_se_mezclan_entre_hilos(monkeypatch):
+    monkeypatch.delenv(salidas.VARIABLE_OPCIONES, raising=False)
+    vistas = []
+
+    class Escritor:
+        """Anota las opciones que vería FFmpeg; la pausa deja que otros hilos intenten abrir a la vez."""
+
+        def __init__(self, ruta, *args):
+            opciones = os.environ.get(salidas.VARIABLE_OPCIONES)
+            time.sleep(0.01)
+            vistas.append((os.path.basename(ruta), opciones, os.environ.get(salidas.VARIABLE_OPCIONES)))
+
+        def isOpened(self):
+            return True
+
+    monkeypatch.setattr(salidas.cv2, "VideoWriter", Escritor)
+    formatos = [salidas.obtener("ffv1", hilos=2), salidas.obtener("ffv1", slices=16), salidas.obtener("huffyuv")]
+    hilos = [threading.Thread(target=formatos[i % 3].abrir, args=(f"{i % 3}-{i}.avi", 30, 64, 48))
+             for i in range(12)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    esperadas = [formato._opciones() for formato in formatos]
+    assert len(vistas) == 12
+    for nombre, al_abrir, al_terminar in vistas:
+        assert al_abrir == al_terminar == esperadas[int(nombre[0])]
+    assert salidas.VARIABLE_OPCIONES not in os.environ
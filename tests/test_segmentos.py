@@ -0,0 +1,87 @@
+import os
+import threading
+
+import cv2
+import pytest
+
+from conftest import leer
+from estego import avi, segmentos
+from estego.benchmark import generar_secreto
+from estego.progreso import Cancelado
+from estego.video import extraer_archivo_de_video, ocultar_archivo_en_video
+
+CUADROS_POR_SEGMENTO = 4
+
+
+@pytest.fixture
+def secreto_largo(tmp_path):
+    # ~13 cuadros de 64x48 con 1 bit en B: reparte el flujo entre varios segmentos
+    ruta = str(tmp_path / "largo.bin")
+    generar_secreto(ruta, 5000, semilla=1)
+    return ruta
+
+
+def _cuadros(ruta):
+    cap = cv2.VideoCapture(ruta)
+    try:
+        n = 0
+        while cap.read()[0]:
+            n += 1
+        return n
+    finally:
+        cap.release()
+
+
+def _ocultar(portada, secreto, salida, **opciones):
+    return ocultar_archivo_en_video(portada, secreto, salida, cuadros_por_segmento=CUADROS_POR_SEGMENTO,
+                                    **opciones)
+
+
+def test_ocultar_por_segmentos(tmp_path, portada_video, secreto_largo):
+    salida = _ocultar(portada_video, secreto_largo, str(tmp_path / "estego.avi"))
+
+    assert not os.path.exists(segmentos.carpeta_partes(salida))
+    assert _cuadros(salida) == 20
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"))
+    assert leer(ruta) == leer(secreto_largo)
+
+
+def test_reanudar_tras_cancelar(tmp_path, monkeypatch, portada_video, secreto_largo):
+    salida = str(tmp_path / "estego.avi")
+    cancelar = threading.Event()
+    guardar = segmentos.guardar
+
+    def guardar_y_cancelar(carpeta, trabajo, hechos):
+        guardar(carpeta, trabajo, hechos)
+        if len(hechos) == 2:
+            cancelar.set()
+
+    monkeypatch.setattr(segmentos, "guardar", guardar_y_cancelar)
+    with pytest.raises(Cancelado):
+        _ocultar(portada_video, secreto_largo, salida, cancelar=cancelar)
+    monkeypatch.undo()
+
+    assert not os.path.exists(salida)
+    assert sorted(os.listdir(segmentos.carpeta_partes(salida))) == [
+        "000000.avi", "000001.avi", segmentos.PUNTO_CONTROL]
+
+    mensajes = []
+    _ocultar(portada_video, secreto_largo, salida, log_callback=mensajes.append)
+    assert "Reanudando: 2 segmentos hechos (8/20 cuadros)" in "".join(mensajes)
+
+    directo = _ocultar(portada_video, secreto_largo, str(tmp_path / "directo" / "estego.avi"))
+    assert leer(salida) == leer(directo)
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"))
+    assert leer(ruta) == leer(secreto_largo)
+
+
+def test_union_en_varios_riff(tmp_path, monkeypatch, portada_video, secreto_largo):
+    # Cada cuadro FFV1 de ruido ocupa ~10 KB: con este límite salen varios RIFF (AVI + AVIX)
+    monkeypatch.setattr(avi, "LIMITE_RIFF", 40_000)
+    salida = _ocultar(portada_video, secreto_largo, str(tmp_path / "estego.avi"))
+
+    with open(salida, "rb") as f:
+        assert f.read().count(b"AVIX") >= 2
+    assert _cuadros(salida) == 20
+    ruta, _ = extraer_archivo_de_video(salida, str(tmp_path / "extraido"))
+    assert leer(ruta) == leer(secreto_largo)
@@ -0,0 +1,106 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+from urllib.parse import unquote, urlsplit
+
+import pytest
+
+from conftest import leer
+from estego import servicio as modulo_servicio
+from estego.servicio import servir
+
+
+@pytest.fixture
+def servicio():
+    """Servicio en un puerto libre con 1 proceso y sin cola: la segunda petición a la vez recibe 503."""
+    listo = threading.Event()
+    estado = {}
+
+    def ejecutar():
+        loop = asyncio.new_event_loop()
+        estado["loop"] = loop
+
+        def al_iniciar(direccion):
+            estado["direccion"] = direccion
+            listo.set()
+
+        estado["tarea"] = loop.create_task(servir(puerto=0, procesos=1, cola=0, al_iniciar=al_iniciar))
+        try:
+            loop.run_until_complete(estado["tarea"])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    hilo = threading.Thread(target=ejecutar)
+    hilo.start()
+    assert listo.wait(30)
+    url = urlsplit(estado["direccion"])
+    yield url.hostname, url.port
+    estado["loop"].call_soon_threadsafe(estado["tarea"].cancel)
+    hilo.join(30)
+
+
+def _post(direccion, ruta, cuerpo):
+    conexion = http.client.HTTPConnection(*direccion, timeout=60)
+    try:
+        conexion.request("POST", ruta, cuerpo)
+        respuesta = conexion.getresponse()
+        return respuesta.status, dict(respuesta.getheaders()), respuesta.read()
+    finally:
+        conexion.close()
+
+
+def test_ocultar_y_extraer(servicio, portada_imagen, secreto):
+    portada = leer(portada_imagen)
+    estado, _, imagen = _post(servicio, f"/embed?cover_size={len(portada)}&name=notas.txt",
+                              portada + leer(secreto))
+    assert estado == 200
+
+    estado, cabeceras, datos = _post(servicio, "/extract", imagen)
+    assert estado == 200
+    assert datos == leer(secreto)
+    assert unquote(cabeceras["X-Estego-Name"]) == "secreto.txt"
+
+    estado, _, cuerpo = _post(servicio, "/extract", portada)
+    assert estado == 400 and "error" in json.loads(cuerpo)
+    assert _post(servicio, "/jobs", b"{}")[0] == 404
+
+
+@pytest.mark.parametrize("portador", ["image", "video"])
+def test_secreto_grande_conserva_el_nombre(servicio, monkeypatch, portada_imagen, portada_video, secreto,
+                                          portador):
+    # Con un límite mínimo el secreto pasa por un archivo temporal, como uno de más de 64 MiB
+    monkeypatch.setattr(modulo_servicio, "TAM_EN_MEMORIA", 16)
+    portada = leer(portada_imagen if portador == "image" else portada_video)
+    estado, _, estego = _post(servicio, f"/embed?carrier={portador}&cover_size={len(portada)}&name=informe.pdf",
+                              portada + leer(secreto))
+    assert estado == 200
+
+    estado, cabeceras, datos = _post(servicio, f"/extract?carrier={portador}", estego)
+    assert estado == 200 and datos == leer(secreto)
+    # La imagen solo guarda la extensión
+    esperado = "secreto.pdf" if portador == "image" else "informe.pdf"
+    assert unquote(cabeceras["X-Estego-Name"]) == esperado
+
+
+def test_cola_llena_responde_503(servicio, portada_imagen):
+    portada = leer(portada_imagen)
+    with socket.create_connection(servicio, timeout=30) as ocupada:
+        # Admitida: el servidor confirma el 100-continue y espera el cuerpo
+        ocupada.sendall(b"POST /extract HTTP/1.1\r\nHost: x\r\nExpect: 100-continue\r\n"
+                        b"Content-Length: %d\r\n\r\n" % len(portada))
+        assert ocupada.recv(64).startswith(b"HTTP/1.1 100 Continue")
+
+        estado, cabeceras, _ = _post(servicio, "/extract", portada)
+        assert estado == 503
+        assert cabeceras["Retry-After"] == "1"
+
+    conexion = http.client.HTTPConnection(*servicio, timeout=30)
+    conexion.request("GET", "/metrics")
+    metricas = json.loads(conexion.getresponse().read())
+    conexion.close()
+    assert metricas["rechazadas"] == 1
+    assert metricas["latencia"]["/extract"]["cuenta"] >= 1